@@ -0,0 +1,131 @@
+"""
+Async implementations of the exam-path endpoints, routed in ASGI mode.
+
+They share their logic with the sync views in ``views.py``; database work
+runs on the bounded pool from ``smart_mcq.async_db`` and the event streams
+wait on the event loop instead of holding a thread per connection.
+"""
+
+import queue
+import time
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from smart_mcq.async_db import db_sync_to_async
+from smart_mcq.constants import LiveMonitorConfig, SessionWaitConfig
+from smart_mcq.sse import format_comment, format_event, format_retry, sse_response
+from test_sessions.live import (
+    Subscriber,
+    async_wait_for_session_event,
+    get_monitor,
+    get_watch_board,
+    session_fingerprint,
+    streams_open,
+)
+from test_sessions.models import TestSession
+from .views import _exam_clock_data, _live_monitor_message, _save_answer_data
+
+
+@login_required
+@csrf_exempt
+async def save_answer(request, attempt_id):
+    """Async AJAX endpoint to save answers and get answer count"""
+    user = await request.auser()
+    data = await db_sync_to_async(_save_answer_data)(user, attempt_id, request.method, request.body)
+    return JsonResponse(data)
+
+
+@login_required
+async def exam_clock(request, attempt_id):
+    """Async AJAX endpoint returning authoritative server time for the exam timer"""
+    user = await request.auser()
+    return JsonResponse(await db_sync_to_async(_exam_clock_data)(user, attempt_id))
+
+
+@login_required
+async def teacher_live_monitor_stream(request, session_id):
+    """Async Server-Sent Events stream for the teacher live monitor"""
+    user = await request.auser()
+    exists = await TestSession.objects.filter(id=session_id, created_by=user).aexists()
+    if not exists:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+
+    monitor = await db_sync_to_async(get_monitor)(session_id)
+    return sse_response(_live_monitor_events(monitor))
+
+
+async def _live_monitor_events(monitor):
+    """Async counterpart of ``views._live_monitor_events``"""
+    subscriber = monitor.subscribe()
+    deadline = time.monotonic() + LiveMonitorConfig.MAX_STREAM_SECONDS
+    try:
+        yield format_retry(LiveMonitorConfig.RECONNECT_MS)
+        yield _live_monitor_message(monitor, Subscriber.RESYNC)
+        while time.monotonic() < deadline and streams_open():
+            try:
+                delta = await subscriber.aget(timeout=LiveMonitorConfig.HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield format_comment()
+                continue
+            if delta is Subscriber.CLOSE:
+                break
+            yield _live_monitor_message(monitor, delta)
+    finally:
+        monitor.unsubscribe(subscriber)
+
+
+@login_required
+async def student_session_events(request):
+    """
+    Notify a waiting student once a joined upcoming session starts, is edited
+    or is cancelled. Serves Server-Sent Events by default and a single JSON
+    long-poll response with ``?transport=poll``. Only routed under ASGI, where
+    a held connection costs no worker thread (``views.student_session_events``
+    is the polled WSGI check).
+    """
+    user = await request.auser()
+    waiting = {}
+    rows = TestSession.objects.filter(
+        studenttestattempt__student=user,
+        is_active=True,
+        start_time__gt=timezone.now(),
+    ).values_list('id', 'start_time', 'updated_at', 'is_active')
+    async for row in rows:
+        waiting[row[0]] = session_fingerprint(*row[1:])
+
+    if request.GET.get('transport') == 'poll':
+        if not waiting:
+            return JsonResponse({'type': 'idle'})
+        board = get_watch_board()
+        board.watch(waiting)
+        try:
+            event = await async_wait_for_session_event(board, waiting, SessionWaitConfig.LONG_POLL_SECONDS)
+        finally:
+            board.unwatch(waiting)
+        return JsonResponse(event or {'type': 'timeout'})
+
+    return sse_response(_student_session_events(waiting))
+
+
+async def _student_session_events(waiting):
+    """Yield heartbeats until one waiting session fires, then send it and close"""
+    yield format_retry(SessionWaitConfig.RECONNECT_MS)
+    if not waiting:
+        yield format_event({'type': 'idle'}, event='idle')
+        return
+
+    board = get_watch_board()
+    board.watch(waiting)
+    deadline = time.monotonic() + SessionWaitConfig.MAX_STREAM_SECONDS
+    try:
+        while time.monotonic() < deadline and streams_open():
+            event = await async_wait_for_session_event(board, waiting, SessionWaitConfig.HEARTBEAT_SECONDS)
+            if event:
+                yield format_event(event, event=event['type'])
+                return
+            yield format_comment()
+    finally:
+        board.unwatch(waiting)
@@ -0,0 +1,68 @@
+"""
+Version counters for the dashboard fragment cache.
+
+Dashboard cards are cached with ``{% cache %}`` under keys that include the
+version of the user and session they show. Writes that change a card (join,
+submit, result release, session edit) bump those versions, so the next
+dashboard load renders fresh fragments while unchanged cards stay cached.
+
+The counters live in the database rather than in the cache: with a
+per-process cache, a bump made by one worker must still be seen by all
+the others. Reading them costs one query per dashboard load.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from smart_mcq.constants import CacheKeys
+from .models import CacheVersion
+
+
+def user_key(user_id):
+    return CacheKeys.USER_FRAGMENTS.format(user_id=user_id)
+
+
+def session_key(session_id):
+    return CacheKeys.SESSION_FRAGMENTS.format(session_id=session_id)
+
+
+def get_versions(keys):
+    """Current version of each key (0 for keys never bumped)"""
+    keys = list(keys)
+    versions = dict.fromkeys(keys, 0)
+    versions.update(CacheVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return versions
+
+
+def bump(*keys):
+    """Invalidate every fragment cached under ``keys``"""
+    now = timezone.now()
+    for key in keys:
+        if CacheVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(key=key, version=1)
+        except IntegrityError:
+            # Created concurrently by another request
+            CacheVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now)
+
+
+def bump_attempt(student_id, session_id):
+    """A student joined, submitted or had results released in a session"""
+    bump(user_key(student_id), session_key(session_id))
+
+
+def bump_session(session_id):
+    """A session was edited; the teacher's and every participant's cards change"""
+    bump(session_key(session_id))
+
+
+def bump_attempts(student_ids, session_id):
+    """``bump_attempt`` for many students of one session, with one UPDATE for the existing counters"""
+    keys = {user_key(student_id) for student_id in student_ids}
+    keys.add(session_key(session_id))
+    existing = set(CacheVersion.objects.filter(key__in=keys).values_list('key', flat=True))
+    CacheVersion.objects.filter(key__in=existing).update(version=F('version') + 1, updated_at=timezone.now())
+    bump(*(keys - existing))
@@ -0,0 +1,235 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from smart_mcq.synthetic_data import seed_exam_dataset
+from test_sessions.models import TestSession
+
+
+# Endpoints in the order a student hits them during an exam
+ENDPOINTS = ['join_test_session', 'take_test', 'save_answer', 'submit_test', 'result_detail']
+
+TAKE_TEST_URL = re.compile(r'/take-test/(\d+)/')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LoadRecorder:
+    """Thread-safe collector of per-endpoint latency and query counts"""
+
+    def __init__(self, endpoints=ENDPOINTS):
+        self._lock = threading.Lock()
+        self.endpoints = endpoints
+        self.samples = defaultdict(list)
+
+    def record(self, endpoint, started, duration, queries, failed):
+        with self._lock:
+            self.samples[endpoint].append((started, duration, queries, failed))
+
+    def report(self):
+        endpoints = {}
+        for endpoint in self.endpoints:
+            samples = self.samples.get(endpoint, [])
+            if not samples:
+                continue
+            latencies = sorted(s[1] * 1000 for s in samples)
+            queries = [s[2] for s in samples]
+            window = max(s[0] + s[1] for s in samples) - min(s[0] for s in samples)
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': sum(1 for s in samples if s[3]),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'max_ms': round(latencies[-1], 2),
+                'queries_mean': round(sum(queries) / len(queries), 2),
+                'queries_max': max(queries),
+                'throughput_rps': round(len(samples) / window, 2) if window > 0 else None,
+            }
+        return endpoints
+
+
+class SimulatedStudent:
+    """Drives one student through the exam lifecycle with the Django test client"""
+
+    def __init__(self, student, session, recorder, think_time=0.0):
+        self.student = student
+        self.session = session
+        self.recorder = recorder
+        self.think_time = think_time
+        self.client = Client()
+        self.client.force_login(student)
+        self.attempt_id = None
+
+    def _request(self, endpoint, method, path, **kwargs):
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = getattr(self.client, method)(path, secure=True, **kwargs)
+        duration = time.perf_counter() - started
+
+        # The AJAX endpoints report failures as 200 with {"success": false}
+        failed = response.status_code >= 400
+        if not failed and response.get('Content-Type', '').startswith('application/json'):
+            failed = response.json().get('success') is False
+        self.recorder.record(endpoint, started, duration, query_count, failed)
+        if self.think_time:
+            time.sleep(self.think_time)
+        return response
+
+    def take_exam(self):
+        response = self._request(
+            'join_test_session', 'post', reverse('join_test_session'),
+            data={'access_code': self.session.access_code},
+        )
+        match = TAKE_TEST_URL.search(response.get('Location', ''))
+        if not match:
+            return
+        self.attempt_id = int(match.group(1))
+
+        self._request('take_test', 'get', reverse('take_test', args=[self.attempt_id]))
+
+        save_url = reverse('save_answer', args=[self.attempt_id])
+        for index, question_id in enumerate(self.session.question_ids):
+            self._request(
+                'save_answer', 'post', save_url,
+                data=json.dumps({
+                    'question_id': question_id,
+                    'selected_choice': 'ABCD'[(self.student.id + index) % 4],
+                    'time_spent_seconds': 10,
+                }),
+                content_type='application/json',
+            )
+
+        self._request('submit_test', 'post', reverse('submit_test', args=[self.attempt_id]))
+
+    def view_result(self):
+        if self.attempt_id:
+            self._request('result_detail', 'get', reverse('result_detail', args=[self.attempt_id]))
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic exam and drive concurrent simulated students through the full exam lifecycle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=2)
+        parser.add_argument('--questions-per-teacher', type=int, default=200)
+        parser.add_argument('--questions-per-test', type=int, default=20)
+        parser.add_argument('--sessions-per-teacher', type=int, default=2)
+        parser.add_argument('--students', type=int, default=50, help='Number of simulated students (M)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Students running at the same time')
+        parser.add_argument('--think-time', type=float, default=0.0, help='Seconds to pause between requests')
+        parser.add_argument('--prefix', default='bench_', help='Username/title prefix for the synthetic rows')
+        parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write results to')
+        parser.add_argument('--keep-data', action='store_true', help='Do not delete the synthetic data afterwards')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users with prefix "{prefix}" already exist; use a different --prefix or remove them')
+
+        sessions_per_teacher = options['sessions_per_teacher']
+        total_sessions = options['teachers'] * sessions_per_teacher
+        if total_sessions < 1 or options['students'] < 1:
+            raise CommandError('Need at least one session and one student')
+
+        self.stdout.write('Seeding synthetic dataset...')
+        dataset = seed_exam_dataset(
+            teachers=options['teachers'],
+            questions_per_teacher=options['questions_per_teacher'],
+            tests_per_teacher=sessions_per_teacher,
+            questions_per_test=options['questions_per_test'],
+            sessions_per_teacher=sessions_per_teacher,
+            students_per_session=math.ceil(options['students'] / sessions_per_teacher),
+            create_attempts=False,
+            prefix=prefix,
+        )
+        sessions = list(TestSession.objects.filter(pk__in=[s.pk for s in dataset.sessions]).select_related('test'))
+        for session in sessions:
+            session.question_ids = list(session.test.questions.values_list('id', flat=True))
+
+        setup_test_environment()
+        try:
+            recorder = LoadRecorder()
+            students = [
+                SimulatedStudent(student, sessions[i % total_sessions], recorder, options['think_time'])
+                for i, student in enumerate(dataset.students[:options['students']])
+            ]
+
+            self.stdout.write(f"Running {len(students)} students with concurrency {options['concurrency']}...")
+            started = time.perf_counter()
+            self._run(students, 'take_exam', options['concurrency'])
+            exam_duration = time.perf_counter() - started
+
+            # Results only become visible once the exam timer has run out
+            TestSession.objects.filter(pk__in=[s.pk for s in sessions]).update(
+                start_time=timezone.now() - timezone.timedelta(days=1)
+            )
+            started = time.perf_counter()
+            self._run(students, 'view_result', options['concurrency'])
+            results_duration = time.perf_counter() - started
+        finally:
+            teardown_test_environment()
+            if not options['keep_data']:
+                User.objects.filter(username__startswith=prefix).delete()
+
+        report = {
+            'run_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'config': {
+                key: options[key] for key in (
+                    'teachers', 'questions_per_teacher', 'questions_per_test',
+                    'sessions_per_teacher', 'students', 'concurrency', 'think_time',
+                )
+            },
+            'exam_phase_seconds': round(exam_duration, 3),
+            'results_phase_seconds': round(results_duration, 3),
+            'endpoints': recorder.report(),
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.stdout.write(f"{'endpoint':20} {'reqs':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'rps':>8}")
+        for endpoint, stats in report['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:20} {stats['requests']:6d} {stats['errors']:5d} "
+                f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} "
+                f"{stats['queries_mean']:8.1f} {stats['throughput_rps'] or 0:8.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, students, step, concurrency):
+        def run_one(student):
+            try:
+                getattr(student, step)()
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(run_one, student) for student in students]:
+                future.result()
@@ -0,0 +1,135 @@
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from smart_mcq.constants import AnswerStorage
+from smart_mcq.synthetic_data import seed_exam_dataset
+from test_sessions import answer_sheets
+from test_sessions.models import Answer, AnswerSheet, TestAttempt
+
+
+class Command(BaseCommand):
+    help = 'Compare row and packed answer-sheet storage for one large session on a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=3, help='Timing runs per measurement; the best is kept')
+        parser.add_argument('--output', default='answer_storage_benchmark.json', help='JSON file to write the results to')
+        parser.add_argument('--keep-data', action='store_true', help='Commit the synthetic data instead of rolling back')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_answer_storage needs PostgreSQL (array columns)')
+
+        self.stdout.write('Seeding synthetic dataset...')
+
+        with transaction.atomic():
+            dataset = seed_exam_dataset(
+                teachers=1,
+                questions_per_teacher=options['questions'],
+                tests_per_teacher=1,
+                questions_per_test=options['questions'],
+                sessions_per_teacher=1,
+                students_per_session=options['students'],
+            )
+            attempt_ids = [attempt.id for attempt in dataset.attempts]
+
+            self.stdout.write('Packing answers into sheets...')
+            self._pack(dataset.attempts)
+            self._analyze()
+
+            rows = Answer.objects.filter(test_attempt_id__in=attempt_ids)
+            sheets = AnswerSheet.objects.filter(test_attempt_id__in=attempt_ids)
+            repeat = options['repeat']
+
+            results = {
+                'server_version': connection.pg_version,
+                'dataset': dataset.summary(),
+                'rows': {
+                    'row_count': rows.count(),
+                    'table_bytes': self._table_size(Answer),
+                    'score_each_ms': self._best_ms(repeat, lambda: [
+                        rows.filter(test_attempt_id=attempt_id).aggregate(
+                            correct=Count('id', filter=Q(is_correct=True))
+                        )
+                        for attempt_id in attempt_ids
+                    ]),
+                    'score_session_ms': self._best_ms(repeat, lambda: list(
+                        rows.values('test_attempt_id').annotate(correct=Count('id', filter=Q(is_correct=True)))
+                    )),
+                },
+                'sheets': {
+                    'row_count': sheets.count(),
+                    'table_bytes': self._table_size(AnswerSheet),
+                    'score_each_ms': self._best_ms(repeat, lambda: [
+                        answer_sheets.grade(sheet)
+                        for attempt_id in attempt_ids
+                        for sheet in sheets.filter(test_attempt_id=attempt_id)
+                    ]),
+                    'score_session_ms': self._best_ms(repeat, lambda: answer_sheets.grade_many(sheets)),
+                },
+            }
+
+            if not options['keep_data']:
+                transaction.set_rollback(True)
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+        for storage in ('rows', 'sheets'):
+            measured = results[storage]
+            self.stdout.write(
+                f"{storage:8} {measured['row_count']:9} rows  {measured['table_bytes'] / 1024:10.0f} KiB   "
+                f"score each {measured['score_each_ms']:9.2f} ms   "
+                f"score session {measured['score_session_ms']:8.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _pack(self, attempts):
+        # One sheet per attempt with the stored row answers in their slots
+        stored = defaultdict(dict)
+        for answer in Answer.objects.filter(test_attempt__in=attempts).iterator(chunk_size=5000):
+            stored[answer.test_attempt_id][answer.question_id] = answer
+
+        question_ids = {}
+        new_sheets = []
+        for attempt in attempts:
+            test_id = attempt.test.id
+            if test_id not in question_ids:
+                question_ids[test_id] = sorted(attempt.questions.values_list('id', flat=True))
+            slots = [stored[attempt.id].get(question_id) for question_id in question_ids[test_id]]
+            new_sheets.append(AnswerSheet(
+                test_attempt=attempt,
+                question_ids=question_ids[test_id],
+                choices=''.join(answer.selected_choice if answer else AnswerStorage.BLANK for answer in slots),
+                time_spent=[answer.time_spent_seconds if answer else 0 for answer in slots],
+                client_seqs=[answer.client_seq if answer else 0 for answer in slots],
+            ))
+        AnswerSheet.objects.bulk_create(new_sheets, batch_size=1000)
+        TestAttempt.objects.filter(id__in=[attempt.id for attempt in attempts]).update(
+            answer_storage=AnswerStorage.SHEET
+        )
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            for model in (Answer, AnswerSheet):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def _table_size(self, model):
+        # Heap, TOAST and indexes of the whole table
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_total_relation_size(%s::regclass)', [model._meta.db_table])
+            return cursor.fetchone()[0]
+
+    def _best_ms(self, repeat, run):
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(min(timings), 3)
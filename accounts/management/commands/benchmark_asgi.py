@@ -0,0 +1,258 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from smart_mcq.synthetic_data import seed_exam_dataset
+from test_sessions.models import TestAttempt
+from .benchmark import LoadRecorder
+
+ENDPOINTS = ['save_answer', 'exam_clock']
+
+# gunicorn arguments per serving mode (on top of gunicorn.conf.py); every mode
+# runs the same number of worker processes
+SERVER_MODES = {
+    'wsgi': ['smart_mcq.wsgi:application', '--worker-class', 'sync', '--threads', '1'],
+    'gthread': ['smart_mcq.wsgi:application', '--worker-class', 'gthread'],
+    'asgi': ['smart_mcq.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+def login_cookie(user):
+    """Create a database session for ``user`` and return its session key"""
+    store = SessionStore()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.create()
+    return store.session_key
+
+
+class HttpStudent:
+    """Saves answers over a keep-alive HTTP connection to a running server"""
+
+    def __init__(self, port, session_key, attempt_id, question_ids, recorder):
+        self.port = port
+        self.headers = {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}',
+            'Host': 'localhost',
+            'X-Forwarded-Proto': 'https',
+        }
+        self.attempt_id = attempt_id
+        self.question_ids = question_ids
+        self.recorder = recorder
+
+    def _request(self, conn, endpoint, method, path, body=None):
+        headers = dict(self.headers)
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        failed = True
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            failed = response.status >= 300 or json.loads(payload).get('success') is False
+        except (OSError, http.client.HTTPException, ValueError):
+            conn.close()
+        self.recorder.record(endpoint, started, time.perf_counter() - started, 0, failed)
+
+    def run(self, saves, clock_every):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        save_url = reverse('save_answer', args=[self.attempt_id])
+        clock_url = reverse('exam_clock', args=[self.attempt_id])
+        try:
+            for index in range(saves):
+                question_id = self.question_ids[index % len(self.question_ids)]
+                body = json.dumps({
+                    'question_id': question_id,
+                    'selected_choice': 'ABCD'[index % 4],
+                    'time_spent_seconds': 10,
+                })
+                self._request(conn, 'save_answer', 'POST', save_url, body)
+                if clock_every and (index + 1) % clock_every == 0:
+                    self._request(conn, 'exam_clock', 'GET', clock_url)
+        finally:
+            conn.close()
+
+
+class IdleStream(threading.Thread):
+    """Holds one teacher live-monitor event stream open for the whole run"""
+
+    def __init__(self, port, session_key, session_id):
+        super().__init__(daemon=True)
+        self.port = port
+        self.session_key = session_key
+        self.path = reverse('teacher_live_monitor_stream', args=[session_id])
+        self.stop_event = threading.Event()
+
+    def run(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        try:
+            conn.request('GET', self.path, headers={
+                'Cookie': f'{settings.SESSION_COOKIE_NAME}={self.session_key}',
+                'Host': 'localhost',
+                'X-Forwarded-Proto': 'https',
+            })
+            response = conn.getresponse()
+            while not self.stop_event.is_set():
+                try:
+                    if not response.read1(1024):
+                        break
+                except socket.timeout:
+                    continue
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+
+
+class Command(BaseCommand):
+    help = 'Compare sync, threaded (WSGI) and async (ASGI/uvicorn) serving of the exam endpoints on the same hardware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,gthread,asgi', help='Comma-separated serving modes to run')
+        parser.add_argument('--workers', type=int, default=3, help='gunicorn worker processes for every mode')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=25, help='Students sending requests at the same time')
+        parser.add_argument('--saves', type=int, default=20, help='save_answer requests per student')
+        parser.add_argument('--clock-every', type=int, default=5, help='Send an exam_clock request every N saves')
+        parser.add_argument('--idle-streams', type=int, default=0,
+                            help='Live-monitor SSE connections held open during the run (models waiting clients)')
+        parser.add_argument('--prefix', default='asgibench_', help='Username/title prefix for the synthetic rows')
+        parser.add_argument('--output', default='benchmark_asgi_results.json')
+        parser.add_argument('--keep-data', action='store_true', help='Do not delete the synthetic data afterwards')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(SERVER_MODES)
+        if unknown:
+            raise CommandError(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users with prefix "{prefix}" already exist; use a different --prefix or remove them')
+
+        self.stdout.write('Seeding synthetic dataset...')
+        dataset = seed_exam_dataset(
+            teachers=1,
+            questions_per_teacher=50,
+            tests_per_teacher=1,
+            questions_per_test=20,
+            sessions_per_teacher=1,
+            students_per_session=options['students'],
+            answered_ratio=0,
+            submitted_ratio=0,
+            prefix=prefix,
+        )
+        session = dataset.sessions[0]
+        question_ids = list(session.test.questions.values_list('id', flat=True))
+        attempts = TestAttempt.objects.filter(
+            student_test_attempt__test_session=session
+        ).select_related('student_test_attempt__student')
+        students = [(login_cookie(a.student_test_attempt.student), a.id) for a in attempts]
+        teacher_key = login_cookie(dataset.teachers[0])
+
+        results = {}
+        try:
+            for mode in modes:
+                self.stdout.write(f'Running {mode} with {options["workers"]} workers...')
+                results[mode] = self._run_mode(mode, options, students, question_ids, teacher_key, session.id)
+        finally:
+            if not options['keep_data']:
+                Session.objects.filter(
+                    session_key__in=[key for key, _ in students] + [teacher_key]
+                ).delete()
+                User.objects.filter(username__startswith=prefix).delete()
+
+        report = {
+            'run_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'cpu_count': os.cpu_count(),
+            'config': {
+                key: options[key] for key in (
+                    'workers', 'students', 'concurrency', 'saves', 'clock_every', 'idle_streams',
+                )
+            },
+            'modes': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.stdout.write(f"{'mode':8} {'endpoint':12} {'reqs':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8}")
+        for mode, result in results.items():
+            for endpoint, stats in result['endpoints'].items():
+                self.stdout.write(
+                    f"{mode:8} {endpoint:12} {stats['requests']:6d} {stats['errors']:5d} "
+                    f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} "
+                    f"{stats['throughput_rps'] or 0:8.1f}"
+                )
+            self.stdout.write(f"{mode:8} {'total':12} {result['total_rps']:>51.1f}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run_mode(self, mode, options, students, question_ids, teacher_key, session_id):
+        port = options['port']
+        env = dict(os.environ, DJANGO_ASGI_MODE='true' if mode == 'asgi' else 'false')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *SERVER_MODES[mode],
+             '--bind', f'127.0.0.1:{port}', '--workers', str(options['workers']), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        streams = []
+        try:
+            self._wait_for_port(port, server)
+            streams = [IdleStream(port, teacher_key, session_id) for _ in range(options['idle_streams'])]
+            for stream in streams:
+                stream.start()
+
+            recorder = LoadRecorder(ENDPOINTS)
+            clients = [HttpStudent(port, key, attempt_id, question_ids, recorder) for key, attempt_id in students]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                futures = [pool.submit(c.run, options['saves'], options['clock_every']) for c in clients]
+                for future in futures:
+                    future.result()
+            duration = time.perf_counter() - started
+        finally:
+            for stream in streams:
+                stream.stop_event.set()
+            # Graceful stop; workers close their held streams on SIGTERM
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+        endpoints = recorder.report()
+        total = sum(stats['requests'] for stats in endpoints.values())
+        return {
+            'duration_seconds': round(duration, 3),
+            'total_requests': total,
+            'total_rps': round(total / duration, 2) if duration else 0,
+            'endpoints': endpoints,
+        }
+
+    def _wait_for_port(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with code {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on port {port}')
@@ -0,0 +1,124 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from questions.models import Question
+from smart_mcq.synthetic_data import seed_exam_dataset
+from test_sessions.models import Answer, TestAttempt, TestSession
+from tests.models import Test
+
+
+# Models whose Meta.indexes are toggled off for the "before" plans
+INDEXED_MODELS = [Question, Test, TestSession, TestAttempt, Answer]
+
+
+class Command(BaseCommand):
+    help = 'Record EXPLAIN plans for hot queries with and without the composite indexes on a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--questions-per-teacher', type=int, default=500)
+        parser.add_argument('--sessions-per-teacher', type=int, default=10)
+        parser.add_argument('--students-per-session', type=int, default=30)
+        parser.add_argument('--questions-per-test', type=int, default=20)
+        parser.add_argument('--output', default='index_benchmark.json', help='JSON file to write the plans to')
+        parser.add_argument('--keep-data', action='store_true', help='Commit the synthetic data instead of rolling back')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_indexes needs PostgreSQL (EXPLAIN ANALYZE and transactional DDL)')
+
+        self.stdout.write('Seeding synthetic dataset...')
+
+        with transaction.atomic():
+            dataset = seed_exam_dataset(
+                teachers=options['teachers'],
+                questions_per_teacher=options['questions_per_teacher'],
+                tests_per_teacher=max(1, options['sessions_per_teacher'] // 2),
+                questions_per_test=options['questions_per_test'],
+                sessions_per_teacher=options['sessions_per_teacher'],
+                students_per_session=options['students_per_session'],
+            )
+            teacher = dataset.teachers[0]
+            session = dataset.sessions[0]
+            attempt = dataset.attempts[0] if dataset.attempts else None
+            student = attempt.student if attempt else dataset.students[0]
+
+            queries = {
+                'question_list': Question.objects.filter(
+                    created_by=teacher, is_active=True
+                ).order_by('-created_at', '-id')[:11],
+                'test_list': Test.objects.filter(
+                    created_by=teacher, is_active=True
+                ).order_by('-created_at', '-id')[:11],
+                'session_list': TestSession.objects.filter(
+                    created_by=teacher
+                ).order_by('-start_time', '-id')[:11],
+                'teacher_dashboard_sessions': TestSession.objects.filter(
+                    created_by=teacher, is_active=True
+                ).order_by('-created_at', '-id')[:9],
+                'session_submitted_attempts': TestAttempt.objects.filter(
+                    student_test_attempt__test_session=session, is_submitted=True
+                ),
+                'student_completed_attempts': TestAttempt.objects.filter(
+                    student_test_attempt__student=student, is_submitted=True
+                ).order_by('-submitted_at', '-id')[:11],
+                'attempt_correct_answers': Answer.objects.filter(
+                    test_attempt=attempt, is_correct=True
+                ),
+            }
+
+            results = {
+                'server_version': connection.pg_version,
+                'dataset': dataset.summary(),
+                'queries': {},
+            }
+
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            self._analyze()
+            for name, queryset in queries.items():
+                results['queries'][name] = {'before': self._explain(queryset)}
+
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.add_index(model, index)
+            self._analyze()
+            for name, queryset in queries.items():
+                results['queries'][name]['after'] = self._explain(queryset)
+
+            if not options['keep_data']:
+                transaction.set_rollback(True)
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+        for name, plans in results['queries'].items():
+            self.stdout.write(
+                f"{name:32} before {plans['before']['duration_ms']:8.2f} ms   "
+                f"after {plans['after']['duration_ms']:8.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Plans written to {options['output']}"))
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def _explain(self, queryset):
+        plan = json.loads(queryset.explain(format='json', analyze=True, buffers=True))
+
+        started = time.perf_counter()
+        list(queryset)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            'plan': plan,
+            'execution_time_ms': plan[0].get('Execution Time'),
+            'duration_ms': round(duration_ms, 3),
+        }
@@ -20,3 +20,13 @@ class Profile(models.Model):
     
     class Meta:
         ordering = ['user__username']
+
+
+class CacheVersion(models.Model):
+    """Version counter for a group of cached dashboard fragments (see accounts.fragment_cache)"""
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.key} v{self.version}"
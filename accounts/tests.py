@@ -1,3 +1,138 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from questions.models import Choice, Question
+from test_sessions.models import StudentTestAttempt, TestAttempt, TestSession
+from tests.models import Test
+from . import fragment_cache
+from .models import CacheVersion, Profile
+
+
+# The manifest only exists after collectstatic
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ResultsTestCase(TestCase):
+    """A submitted attempt at a manually released test whose session has ended"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher')
+        Profile.objects.create(user=cls.teacher, role='teacher')
+        cls.teacher.groups.add(Group.objects.get_or_create(name='Teachers')[0])
+        cls.student = User.objects.create_user('student')
+        Profile.objects.create(user=cls.student, role='student')
+        question = Question.objects.create(title='Q', description='', created_by=cls.teacher)
+        for label in 'ABCD':
+            Choice.objects.create(question=question, label=label, text=label, is_correct=label == 'B')
+        cls.test = Test.objects.create(
+            title='Test', description='', time_limit_minutes=30, created_by=cls.teacher,
+            result_release_mode='manual',
+        )
+        cls.test.questions.add(question)
+        cls.session = TestSession.objects.create(
+            test=cls.test, start_time=timezone.now() - timedelta(hours=1), created_by=cls.teacher
+        )
+        joined = StudentTestAttempt.objects.create(student=cls.student, test_session=cls.session)
+        cls.attempt = TestAttempt.objects.create(
+            student_test_attempt=joined, is_submitted=True, submitted_at=timezone.now() - timedelta(minutes=40)
+        )
+        cls.result_url = reverse('result_detail', args=[cls.attempt.id])
+
+    def setUp(self):
+        cache.clear()
+
+    def release(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('individual_result_release', args=[self.session.id, self.attempt.id]))
+        self.assertTrue(response.json()['success'])
+        self.client.force_login(self.student)
+
+
+class ResultPageCacheTests(ResultsTestCase):
+    def test_unreleased_result_redirects_without_etag(self):
+        self.client.force_login(self.student)
+        response = self.client.get(self.result_url)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertNotIn('ETag', response)
+
+    def test_revalidation_with_matching_etag_returns_304(self):
+        self.release()
+        first = self.client.get(self.result_url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        second = self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], etag)
+
+    def test_editing_the_session_changes_the_etag(self):
+        self.release()
+        etag = self.client.get(self.result_url)['ETag']
+
+        self.session.session_name = 'Renamed'
+        self.session.save()
+        response = self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_students_get_no_cached_result(self):
+        self.release()
+        self.client.get(self.result_url)
+        other = User.objects.create_user('other')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.result_url).status_code, 302)
+
+
+class FragmentVersionTests(ResultsTestCase):
+    def versions(self):
+        return fragment_cache.get_versions([
+            fragment_cache.user_key(self.student.id), fragment_cache.session_key(self.session.id)
+        ])
+
+    def test_bump_creates_then_increments(self):
+        key = fragment_cache.user_key(self.student.id)
+        self.assertEqual(fragment_cache.get_versions([key]), {key: 0})
+        fragment_cache.bump(key)
+        fragment_cache.bump(key)
+        self.assertEqual(fragment_cache.get_versions([key]), {key: 2})
+
+    def test_bump_attempts_increments_existing_and_new_counters(self):
+        other = User.objects.create_user('other')
+        fragment_cache.bump(fragment_cache.user_key(self.student.id))
+        fragment_cache.bump_attempts([self.student.id, other.id], self.session.id)
+
+        keys = [
+            fragment_cache.user_key(self.student.id),
+            fragment_cache.user_key(other.id),
+            fragment_cache.session_key(self.session.id),
+        ]
+        self.assertEqual(list(fragment_cache.get_versions(keys).values()), [2, 1, 1])
+
+    def test_release_bumps_student_and_session(self):
+        before = self.versions()
+        self.release()
+        after = self.versions()
+        for key, version in before.items():
+            self.assertEqual(after[key], version + 1)
+
+    def test_session_edit_bumps_session(self):
+        upcoming = TestSession.objects.create(
+            test=self.test, start_time=timezone.now() + timedelta(days=1), created_by=self.teacher
+        )
+        key = fragment_cache.session_key(upcoming.id)
+        self.client.force_login(self.teacher)
+        start = timezone.now() + timedelta(days=2)
+        response = self.client.post(
+            reverse('test_sessions:session_edit', args=[upcoming.id]),
+            {'start_time': start.strftime('%Y-%m-%dT%H:%M'), 'user_timezone': 'UTC'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(CacheVersion.objects.get(key=key).version, 1)
@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
 
+# Under ASGI the exam-path endpoints use their async implementations
+if settings.ASGI_MODE:
+    from . import async_views as exam_views
+else:
+    exam_views = views
+
 urlpatterns = [
     # Authentication
     path('login/', views.CustomLoginView.as_view(), name='login'),
@@ -10,6 +17,7 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('dashboard/session-events/', exam_views.student_session_events, name='student_session_events'),
     
     # Student access code join
     path('join-test/', views.join_test_session, name='join_test_session'),
@@ -20,7 +28,8 @@ urlpatterns = [
     # Test taking interface
     path('take-test/<int:attempt_id>/', views.take_test, name='take_test'),
     path('take-test/<int:attempt_id>/navigate/', views.navigate_question, name='navigate_question'),
-    path('take-test/<int:attempt_id>/save-answer/', views.save_answer, name='save_answer'),
+    path('take-test/<int:attempt_id>/clock/', exam_views.exam_clock, name='exam_clock'),
+    path('take-test/<int:attempt_id>/save-answer/', exam_views.save_answer, name='save_answer'),
     path('take-test/<int:attempt_id>/submit/', views.submit_test, name='submit_test'),
     
     # Test results
@@ -29,6 +38,8 @@ urlpatterns = [
     
     # Teacher result views (v1.4)
     path('teacher-results/<int:session_id>/', views.teacher_test_results, name='teacher_test_results'),
+    path('teacher-results/<int:session_id>/live/', views.teacher_live_monitor, name='teacher_live_monitor'),
+    path('teacher-results/<int:session_id>/live/stream/', exam_views.teacher_live_monitor_stream, name='teacher_live_monitor_stream'),
     path('teacher-results/<int:session_id>/student/<int:attempt_id>/', views.teacher_student_detail, name='teacher_student_detail'),
     
     # Result release management (v1.4.1)
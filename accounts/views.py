@@ -1,21 +1,39 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
 from django.db import models
 from .models import Profile
+from . import fragment_cache
+from test_sessions import answer_journal, answer_sheets, answers, navigation, submission
 from test_sessions.models import TestSession, StudentTestAttempt, TestAttempt, Answer
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from smart_mcq.constants import UserRoles
+from smart_mcq.constants import (
+    UserRoles, PaginationConfig, LiveMonitorConfig, SessionWaitConfig, SystemConfig, CacheKeys, ResultCacheConfig,
+    DashboardCacheConfig, AnswerStorage, NavigationConfig,
+)
+from smart_mcq.db_router import replica_reads
+from smart_mcq.pagination import KeysetPaginator
+from smart_mcq.sse import format_comment, format_event, format_retry, sse_response
+from test_sessions.live import Subscriber, get_monitor, streams_open
+import functools
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime
+import queue
+import time
+from datetime import datetime, timezone as dt_timezone
 
 
 
@@ -91,35 +109,27 @@ def dashboard_view(request):
                 is_active=True
             ).select_related('test').prefetch_related(
                 'studenttestattempt_set__attempt_detail'
-            ).order_by('-created_at')
+            )
             
-            # Add result statistics to each session
-            for session in teacher_sessions:
-                completed_attempts = TestAttempt.objects.filter(
-                    student_test_attempt__test_session=session,
-                    is_submitted=True
-                )
-                session.total_attempts = completed_attempts.count()
-                session.has_results = session.total_attempts > 0
-                
-                if session.has_results:
-                    scores = []
-                    for attempt in completed_attempts:
-                        total_questions = attempt.total_questions
-                        correct_answers = attempt.answers.filter(is_correct=True).count()
-                        score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
-                        scores.append(score_percentage)
-                    
-                    session.average_score = round(sum(scores) / len(scores)) if scores else 0
+            # Keyset pagination for teacher sessions on dashboard; statistics are
+            # only computed for the sessions on the current page
+            paginator = KeysetPaginator(
+                teacher_sessions,
+                PaginationConfig.TEACHER_DASHBOARD_PAGE_SIZE,
+                ordering=('-created_at', '-id')
+            )
+            page_obj = paginator.get_page(request.GET)
             
-            # Pagination for teacher sessions on dashboard
-            from django.core.paginator import Paginator
-            paginator = Paginator(teacher_sessions, 8)  # Show 8 sessions per page on dashboard
-            page_number = request.GET.get('page')
-            page_obj = paginator.get_page(page_number)
+            # Result statistics are computed by the template only for rows
+            # missing from the fragment cache
+            versions = fragment_cache.get_versions(fragment_cache.session_key(session.id) for session in page_obj)
+            for session in page_obj:
+                session.fragment_version = versions[fragment_cache.session_key(session.id)]
+                session.result_stats = functools.partial(_session_result_stats, session)
             
             context['teacher_sessions'] = page_obj
             context['page_obj'] = page_obj
+            context['fragment_timeout'] = DashboardCacheConfig.FRAGMENT_TIMEOUT
             return render(request, 'accounts/teacher_dashboard.html', context)
         else:
             # For students, get ONLY test sessions they have joined via access code
@@ -143,16 +153,31 @@ def dashboard_view(request):
             ).select_related(
                 'student_test_attempt__test_session__test',
                 'student_test_attempt__test_session__created_by'
-            ).order_by('-submitted_at')
+            )
+            
+            # Keyset pagination for completed tests on student dashboard
+            paginator = KeysetPaginator(
+                completed_attempts,
+                PaginationConfig.STUDENT_DASHBOARD_PAGE_SIZE,
+                ordering=('-submitted_at', '-id')
+            )
+            page_obj = paginator.get_page(request.GET)
             
             # Categorize sessions by status
             upcoming_sessions = []
             ongoing_sessions = []
             completed_sessions = []
             
+            all_sessions = list(all_sessions)
+            user_fragments = fragment_cache.user_key(request.user.id)
+            versions = fragment_cache.get_versions(
+                [user_fragments] + [fragment_cache.session_key(session.id) for session in all_sessions]
+            )
+            
             for session in all_sessions:
                 # Add joined status to session object
                 session.has_joined = session.id in joined_session_ids
+                session.fragment_version = versions[fragment_cache.session_key(session.id)]
                 
                 if session.status == 'upcoming':
                     upcoming_sessions.append(session)
@@ -160,34 +185,29 @@ def dashboard_view(request):
                     ongoing_sessions.append(session)
                 # expired sessions are not shown in student dashboard
             
-            # Add completed attempts as completed sessions with result data
-            for attempt in completed_attempts:
+            # Add completed attempts on this page as completed sessions with result data
+            for attempt in page_obj:
                 session = attempt.student_test_attempt.test_session
-                # Calculate basic results for dashboard display
-                total_questions = attempt.total_questions
-                correct_answers = attempt.answers.filter(is_correct=True).count()
-                score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
                 
-                # Add result data to session object for template
+                # Add result data to session object for template; the score is
+                # only calculated when the card is not in the fragment cache
                 session.attempt_id = attempt.id
-                session.score_percentage = score_percentage
-                session.correct_answers = correct_answers
-                session.total_questions = total_questions
+                session.score = functools.partial(_attempt_score, attempt)
                 session.submitted_at = attempt.submitted_at
                 
                 completed_sessions.append(session)
             
-            # Pagination for completed sessions on student dashboard
-            from django.core.paginator import Paginator
-            paginator = Paginator(completed_sessions, 10)  # Show 10 completed tests per page
-            page_number = request.GET.get('page')
-            page_obj = paginator.get_page(page_number)
-            
             context.update({
                 'upcoming_sessions': upcoming_sessions,
                 'ongoing_sessions': ongoing_sessions,
-                'completed_sessions': page_obj,
+                'completed_sessions': completed_sessions,
                 'completed_page_obj': page_obj,
+                'auto_refresh_delay': SystemConfig.AUTO_REFRESH_DELAY,
+                # Held connections only under ASGI; WSGI workers have a few threads each
+                'session_events_stream': settings.ASGI_MODE,
+                'session_status_poll_ms': SessionWaitConfig.STATUS_POLL_SECONDS * 1000,
+                'user_fragment_version': versions[user_fragments],
+                'fragment_timeout': DashboardCacheConfig.FRAGMENT_TIMEOUT,
             })
             
             return render(request, 'accounts/student_dashboard.html', context)
@@ -197,6 +217,31 @@ def dashboard_view(request):
         return redirect('login')
 
 
+def _attempt_score(attempt):
+    """Score summary of a submitted attempt for the student dashboard"""
+    total_questions = attempt.total_questions
+    correct_answers, _ = answers.attempt_totals(attempt)
+    return {
+        'correct_answers': correct_answers,
+        'total_questions': total_questions,
+        'score_percentage': round((correct_answers / total_questions) * 100) if total_questions > 0 else 0,
+    }
+
+
+def _session_result_stats(session):
+    """Submitted attempt count and average score of a session for the teacher dashboard"""
+    completed_attempts = TestAttempt.objects.filter(
+        student_test_attempt__test_session=session,
+        is_submitted=True
+    )
+    scores = [_attempt_score(attempt)['score_percentage'] for attempt in completed_attempts]
+    return {
+        'total_attempts': len(scores),
+        'has_results': bool(scores),
+        'average_score': round(sum(scores) / len(scores)) if scores else 0,
+    }
+
+
 @login_required
 def join_test_session(request):
     """Handle student joining a test session via access code"""
@@ -242,8 +287,12 @@ def join_test_session(request):
                 )
                 # Create test attempt detail record
                 test_attempt = TestAttempt.objects.create(
-                    student_test_attempt=student_attempt
+                    student_test_attempt=student_attempt,
+                    answer_storage=settings.ANSWER_STORAGE,
                 )
+                if test_attempt.answer_storage == AnswerStorage.SHEET:
+                    answer_sheets.create_sheet(test_attempt)
+                fragment_cache.bump_attempt(request.user.id, session.id)
                 # Redirect to test taking interface
                 return redirect('take_test', attempt_id=test_attempt.id)
             else:
@@ -326,22 +375,40 @@ def take_test(request, attempt_id):
             messages.info(request, 'You have already submitted this test.')
             return redirect('dashboard')
         
+        # Question named in the URL (after navigating), else the attempt's cursor
+        requested = request.GET.get(NavigationConfig.QUESTION_PARAM, '')
+        if requested.isdigit():
+            navigation.move_to(test_attempt, int(requested) - 1)
+        else:
+            navigation.current_index(test_attempt)
+        
         # Get current question
         current_question = test_attempt.current_question
         if not current_question:
             messages.error(request, 'No questions found for this test.')
             return redirect('dashboard')
         
+        # A reload must show answers this process still holds in the write-behind journal
+        if answer_journal.write_behind_enabled():
+            answer_journal.flush_attempt(test_attempt.id)
+        
         # Get existing answer for current question
-        existing_answer = test_attempt.answers.filter(question=current_question).first()
+        existing_answer = test_attempt.answer_rows.filter(question=current_question).first()
+        
+        # Choices under the labels this student sees (see test_sessions.shuffle)
+        layout = test_attempt.layout
+        choices = layout.display_choices(current_question.id, list(current_question.choices.all()))
+        selected_label = layout.display_label(current_question.id, existing_answer.selected_choice) if existing_answer else None
         
         # Get answered questions count for submission modal
-        answered_questions_count = test_attempt.answers.count()
+        answered_questions_count = test_attempt.answer_rows.count()
         
         context = {
             'test_attempt': test_attempt,
             'current_question': current_question,
             'existing_answer': existing_answer,
+            'choices': choices,
+            'selected_label': selected_label,
             'question_number': test_attempt.current_question_index + 1,
             'total_questions': test_attempt.total_questions,
             'answered_questions_count': answered_questions_count,
@@ -377,66 +444,117 @@ def navigate_question(request, attempt_id):
         
         direction = request.POST.get('direction')
         
-        if direction == 'next' and not test_attempt.is_last_question:
-            test_attempt.current_question_index += 1
-            test_attempt.save()
-        elif direction == 'previous' and not test_attempt.is_first_question:
-            test_attempt.current_question_index -= 1
-            test_attempt.save()
+        # The page posts the index it shows, so any worker can serve the click
+        try:
+            index = int(request.POST['index'])
+        except (KeyError, ValueError):
+            index = navigation.current_index(test_attempt)
         
-        return redirect('take_test', attempt_id=attempt_id)
+        if direction == 'next':
+            index += 1
+        elif direction == 'previous':
+            index -= 1
+        index = navigation.move_to(test_attempt, index)
+        
+        return redirect(f"{reverse('take_test', args=[attempt_id])}?{NavigationConfig.QUESTION_PARAM}={index + 1}")
         
     except TestAttempt.DoesNotExist:
         messages.error(request, 'Test attempt not found.')
         return redirect('dashboard')
 
 
+@login_required
+def exam_clock(request, attempt_id):
+    """AJAX endpoint returning authoritative server time so the exam timer can resync"""
+    return JsonResponse(_exam_clock_data(request.user, attempt_id))
+
+
+def _exam_clock_data(user, attempt_id):
+    """Server time and remaining seconds for an attempt; shared by the sync and async views"""
+    test_attempt = TestAttempt.objects.select_related(
+        'student_test_attempt__test_session__test'
+    ).filter(id=attempt_id, student_test_attempt__student=user).first()
+    if test_attempt is None:
+        return {'success': False, 'error': 'Test attempt not found'}
+
+    session = test_attempt.test_session
+    now = timezone.now()
+    original_end_time = session.start_time + timezone.timedelta(minutes=session.test.time_limit_minutes)
+    return {
+        'success': True,
+        'server_time_utc': now,
+        'remaining_seconds': max(0, int((original_end_time - now).total_seconds())),
+        'is_submitted': test_attempt.is_submitted,
+    }
+
+
 @login_required
 @csrf_exempt
 def save_answer(request, attempt_id):
     """AJAX endpoint to save answers and get answer count"""
+    return JsonResponse(_save_answer_data(request.user, attempt_id, request.method, request.body))
+
+
+def _save_answer_data(user, attempt_id, method, body):
+    """Save an answer (POST) or report the answered count (GET); shared by the sync and async views"""
     try:
+        if method == 'POST':
+            # Retries of writes that already landed are answered from the cache
+            data = json.loads(body)
+            seq = data.get('seq')
+            if isinstance(seq, int) and seq > 0 and data.get('question_id'):
+                seen = answers.check_sequence(user.id, attempt_id, data['question_id'], seq)
+                if seen:
+                    return {'success': True, seen: True}
+        
         test_attempt = TestAttempt.objects.get(id=attempt_id)
         
         # Security check
-        if test_attempt.student != request.user:
-            return JsonResponse({'success': False, 'error': 'Access denied'})
+        if test_attempt.student != user:
+            return {'success': False, 'error': 'Access denied'}
         
         # Check if test is still active - allow saving for expired sessions since answers are continuously saved
         session_status = test_attempt.test_session.status
         
         if session_status not in ['active', 'expired']:
-            return JsonResponse({'success': False, 'error': 'Test session is no longer active'})
+            return {'success': False, 'error': 'Test session is no longer active'}
+        
+        # The score was computed at submission; later writes must not change it
+        if method == 'POST' and test_attempt.is_submitted:
+            return {'success': False, 'error': 'Test has already been submitted'}
         
         # Handle GET request - return current answered count
-        if request.method == 'GET':
-            answered_count = test_attempt.answers.count()
-            return JsonResponse({
+        if method == 'GET':
+            if answer_journal.write_behind_enabled():
+                answer_journal.flush_attempt(test_attempt.id)
+            answered_count = test_attempt.answer_rows.count()
+            return {
                 'success': True,
                 'answered_count': answered_count
-            })
+            }
         
         # Handle POST request - save answer or log entry
-        elif request.method == 'POST':
+        elif method == 'POST':
             try:
-                data = json.loads(request.body)
-                
                 # Skip old auto-submit logging entries
                 if 'log_entry' in data and data.get('log_type') == 'auto_submit_debug':
-                    return JsonResponse({'success': True, 'logged': False, 'message': 'Auto-submit logging disabled'})
+                    return {'success': True, 'logged': False, 'message': 'Auto-submit logging disabled'}
                 
                 # Handle normal answer saving
                 question_id = data.get('question_id')
                 selected_choice = data.get('selected_choice')
                 time_spent_seconds = data.get('time_spent_seconds', 0)
-                
+                seq = data.get('seq')
                 
                 # Validate inputs
                 if not question_id or not selected_choice:
-                    return JsonResponse({'success': False, 'error': 'Missing required data'})
+                    return {'success': False, 'error': 'Missing required data'}
                 
                 if selected_choice not in ['A', 'B', 'C', 'D']:
-                    return JsonResponse({'success': False, 'error': 'Invalid choice'})
+                    return {'success': False, 'error': 'Invalid choice'}
+                
+                if seq is not None and (not isinstance(seq, int) or seq <= 0):
+                    return {'success': False, 'error': 'Invalid sequence number'}
                 
                 # Validate time spent (should be reasonable)
                 if time_spent_seconds < 0 or time_spent_seconds > 3600:  # Max 1 hour per question
@@ -445,42 +563,54 @@ def save_answer(request, attempt_id):
                 # Get the question
                 question = test_attempt.test.questions.get(id=question_id)
                 
-                # Create or update answer
-                answer, created = Answer.objects.get_or_create(
-                    test_attempt=test_attempt,
-                    question=question,
-                    defaults={
-                        'selected_choice': selected_choice,
-                        'time_spent_seconds': time_spent_seconds
-                    }
-                )
+                # The page sends the label the student saw; answers are stored under the question's own
+                selected_choice = test_attempt.layout.original_label(question.id, selected_choice)
                 
-                if not created:
-                    answer.selected_choice = selected_choice
-                    answer.time_spent_seconds = time_spent_seconds
-                    answer.save()
+                if answer_journal.write_behind_enabled() and test_attempt.answer_storage == AnswerStorage.ROWS:
+                    # Acknowledged once on disk; merged into Answer within the flush interval
+                    answer_journal.journal.append({
+                        'attempt_id': test_attempt.id,
+                        'question_id': question.id,
+                        'choice': selected_choice,
+                        'time_spent': time_spent_seconds,
+                        'seq': seq or 0,
+                        'at': timezone.now().isoformat(),
+                    })
+                    if seq:
+                        answers.record_sequence(user.id, attempt_id, question.id, seq)
+                    return {'success': True, 'queued': True}
                 
+                # Create or update answer, unless a newer write for the question is stored
+                outcome, is_correct = answers.write_answer(
+                    test_attempt, question, selected_choice, time_spent_seconds, seq
+                )
+                if outcome == answers.SUBMITTED:
+                    return {'success': False, 'error': 'Test has already been submitted'}
+                if seq:
+                    answers.record_sequence(user.id, attempt_id, question.id, seq)
+                if outcome == answers.STALE:
+                    return {'success': True, 'stale': True}
                 
                 # Refresh test attempt to get updated progress
                 test_attempt.refresh_from_db()
                 
-                return JsonResponse({
+                return {
                     'success': True,
-                    'is_correct': answer.is_correct,
+                    'is_correct': is_correct,
                     'progress_percentage': test_attempt.progress_percentage,
-                    'answered_count': test_attempt.answers.count()
-                })
+                    'answered_count': test_attempt.answer_rows.count()
+                }
                 
             except Exception as e:
-                return JsonResponse({'success': False, 'error': f'Server error: {str(e)}'})
+                return {'success': False, 'error': f'Server error: {str(e)}'}
         
         else:
-            return JsonResponse({'success': False, 'error': 'Invalid request method'})
+            return {'success': False, 'error': 'Invalid request method'}
         
     except TestAttempt.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Test attempt not found'})
+        return {'success': False, 'error': 'Test attempt not found'}
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
+        return {'success': False, 'error': str(e)}
 
 
 @login_required
@@ -499,22 +629,24 @@ def submit_test(request, attempt_id):
         # Check if this is a JSON request (auto-submission)
         is_json_request = request.content_type == 'application/json'
         
-        test_attempt = TestAttempt.objects.get(id=attempt_id)
+        test_attempt = TestAttempt.objects.select_related(
+            'student_test_attempt__test_session__test'
+        ).get(id=attempt_id)
         
         # Security check
-        if test_attempt.student != request.user:
+        if test_attempt.student_test_attempt.student_id != request.user.id:
             error_msg = 'Access denied.'
             if is_json_request:
                 return JsonResponse({'success': False, 'error': error_msg})
             messages.error(request, error_msg)
             return redirect('dashboard')
         
-        # Check if already submitted
+        # Check if already submitted (submit_attempt checks again atomically)
+        already_submitted_msg = 'Test has already been submitted.'
         if test_attempt.is_submitted:
-            info_msg = 'Test has already been submitted.'
             if is_json_request:
-                return JsonResponse({'success': False, 'error': info_msg})
-            messages.info(request, info_msg)
+                return JsonResponse({'success': False, 'error': already_submitted_msg})
+            messages.info(request, already_submitted_msg)
             return redirect('dashboard')
         
         # Only handle manual submissions
@@ -536,20 +668,24 @@ def submit_test(request, attempt_id):
             messages.error(request, error_msg)
             return redirect('dashboard')
         
-        # Calculate total time spent
-        total_time_spent = int((timezone.now() - test_attempt.started_at).total_seconds())
-        question_time_spent = test_attempt.answers.aggregate(total=models.Sum('time_spent_seconds'))['total'] or 0
+        # Answers still in the write-behind journal of any process must count towards the score
+        if answer_journal.write_behind_enabled():
+            answer_journal.flush_attempt(test_attempt.id, other_processes=True)
         
-        # Mark as submitted with time tracking
-        test_attempt.is_submitted = True
-        test_attempt.submitted_at = timezone.now()
-        test_attempt.total_time_spent = total_time_spent
-        test_attempt.save()
+        # Mark as submitted and score (simple scoring: correct = 1, incorrect/blank = 0).
+        # Of two concurrent submissions only one gets a result
+        result = submission.submit_attempt(test_attempt)
+        if result is None:
+            if is_json_request:
+                return JsonResponse({'success': False, 'error': already_submitted_msg})
+            messages.info(request, already_submitted_msg)
+            return redirect('dashboard')
+        fragment_cache.bump_attempt(request.user.id, test_attempt.test_session.id)
         
-        # Calculate score (simple scoring: correct = 1, incorrect/blank = 0)
-        total_questions = test_attempt.total_questions
-        correct_answers = test_attempt.answers.filter(is_correct=True).count()
-        score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
+        total_questions = result.total_questions
+        total_time_spent = result.total_time_spent
+        correct_answers = result.correct_answers
+        question_time_spent = result.question_time_spent
         
         # Format time for display
         def format_time(seconds):
@@ -567,13 +703,12 @@ def submit_test(request, attempt_id):
         avg_time_per_question = int(total_time_spent / total_questions) if total_questions > 0 else 0
         
         # Store comprehensive results in session for results page
-        incorrect_answers = total_questions - correct_answers
         request.session['test_results'] = {
             'attempt_id': test_attempt.id,
             'total_questions': total_questions,
             'correct_answers': correct_answers,
-            'incorrect_answers': incorrect_answers,
-            'score_percentage': score_percentage,
+            'incorrect_answers': result.incorrect_answers,
+            'score_percentage': result.score_percentage,
             'test_title': test_attempt.test.title,
             'total_time_spent': total_time_spent,
             'total_time_formatted': format_time(total_time_spent),
@@ -581,10 +716,11 @@ def submit_test(request, attempt_id):
             'question_time_formatted': format_time(question_time_spent),
             'avg_time_per_question': avg_time_per_question,
             'avg_time_per_question_formatted': format_time(avg_time_per_question),
-            'submitted_at': timezone.localtime(timezone.now()).strftime('%B %d, %Y at %I:%M %p'),
+            'submitted_at': timezone.localtime(result.submitted_at).strftime('%B %d, %Y at %I:%M %p'),
         }
         
         # Handle response based on request type
+        messages.success(request, SuccessMessages.TEST_SUBMITTED)
         if is_json_request:
             return JsonResponse({
                 'success': True,
@@ -592,7 +728,6 @@ def submit_test(request, attempt_id):
                 'redirect_url': reverse('test_results')
             })
         else:
-            messages.success(request, SuccessMessages.TEST_SUBMITTED)
             return redirect('test_results')
         
     except TestAttempt.DoesNotExist:
@@ -611,7 +746,34 @@ def submit_test(request, attempt_id):
 
 
 
+def _question_reviews(test_attempt):
+    """Per-question review rows for the results pages, in the order and with the choice labels the student saw"""
+    question_reviews = []
+    layout = test_attempt.layout
+    questions = test_attempt.test.questions.in_bulk()
+    for question in (questions[question_id] for question_id in test_attempt.question_order):
+        student_answer = test_attempt.answer_rows.filter(question=question).first()
+        correct_choice = question.choices.filter(is_correct=True).first()
+        
+        question_review = {
+            'question': question,
+            'choices': layout.display_choices(question.id, list(question.choices.all())),
+            'student_answer': student_answer,
+            'student_label': layout.display_label(question.id, student_answer.selected_choice) if student_answer else None,
+            'correct_choice': correct_choice,
+            'correct_label': layout.display_label(question.id, correct_choice.label) if correct_choice else None,
+            'is_answered': student_answer is not None,
+            'is_correct': student_answer.is_correct if student_answer else False,
+            'student_choice_text': student_answer.question.choices.filter(label=student_answer.selected_choice).first().text if student_answer else None,
+            'correct_choice_text': correct_choice.text if correct_choice else None,
+            'time_spent': student_answer.time_spent_seconds if student_answer else 0,
+        }
+        question_reviews.append(question_review)
+    return question_reviews
+
+
 @login_required  
+@replica_reads
 def test_results(request):
     """Display test results after submission (v1.3 + v1.4.1 result release control)"""
     results = request.session.get('test_results')
@@ -646,22 +808,7 @@ def test_results(request):
             return redirect('dashboard')
         
         # Build detailed question review data
-        question_reviews = []
-        for question in test_attempt.test.questions.all():
-            student_answer = test_attempt.answers.filter(question=question).first()
-            correct_choice = question.choices.filter(is_correct=True).first()
-            
-            question_review = {
-                'question': question,
-                'student_answer': student_answer,
-                'correct_choice': correct_choice,
-                'is_answered': student_answer is not None,
-                'is_correct': student_answer.is_correct if student_answer else False,
-                'student_choice_text': student_answer.question.choices.filter(label=student_answer.selected_choice).first().text if student_answer else None,
-                'correct_choice_text': correct_choice.text if correct_choice else None,
-                'time_spent': student_answer.time_spent_seconds if student_answer else 0,
-            }
-            question_reviews.append(question_review)
+        question_reviews = _question_reviews(test_attempt)
         
     except TestAttempt.DoesNotExist:
         messages.error(request, 'Test attempt details not found.')
@@ -681,8 +828,17 @@ def test_results(request):
 
 
 @login_required
+@replica_reads
 def result_detail(request, attempt_id):
     """Display persistent test results for a specific attempt (v1.3.1 + v1.4.1 result release control)"""
+    cache_state = _result_cache_state(request.user, attempt_id)
+    if cache_state is not None:
+        cached_content = cache.get(cache_state[0])
+        if cached_content is not None:
+            # Only results that passed the checks below are ever cached, under a
+            # key that changes with every input those checks depend on
+            return _result_page_response(request, cached_content, cache_state[1])
+
     try:
         test_attempt = TestAttempt.objects.select_related(
             'student_test_attempt__test_session__test',
@@ -720,26 +876,11 @@ def result_detail(request, attempt_id):
             return redirect('dashboard')
         
         # Build detailed question review data (same as v1.3)
-        question_reviews = []
-        for question in test_attempt.test.questions.all():
-            student_answer = test_attempt.answers.filter(question=question).first()
-            correct_choice = question.choices.filter(is_correct=True).first()
-            
-            question_review = {
-                'question': question,
-                'student_answer': student_answer,
-                'correct_choice': correct_choice,
-                'is_answered': student_answer is not None,
-                'is_correct': student_answer.is_correct if student_answer else False,
-                'student_choice_text': student_answer.question.choices.filter(label=student_answer.selected_choice).first().text if student_answer else None,
-                'correct_choice_text': correct_choice.text if correct_choice else None,
-                'time_spent': student_answer.time_spent_seconds if student_answer else 0,
-            }
-            question_reviews.append(question_review)
+        question_reviews = _question_reviews(test_attempt)
         
         # Calculate results data (same as submit_test view)
         total_questions = test_attempt.total_questions
-        correct_answers = test_attempt.answers.filter(is_correct=True).count()
+        correct_answers, _ = answers.attempt_totals(test_attempt)
         score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
         
         # Format time for display
@@ -781,14 +922,61 @@ def result_detail(request, attempt_id):
             'is_persistent_view': True,  # Flag to distinguish from post-submission view
         }
         
-        return render(request, 'accounts/test_results.html', context)
+        if cache_state is None:
+            return render(request, 'accounts/test_results.html', context)
+        content = render_to_string('accounts/test_results_content.html', context, request=request)
+        cache.set(cache_state[0], content, ResultCacheConfig.TIMEOUT)
+        return _result_page_response(request, content, cache_state[1])
         
     except TestAttempt.DoesNotExist:
         messages.error(request, 'Test results not found.')
         return redirect('dashboard')
 
 
+def _result_cache_state(user, attempt_id):
+    """
+    Cache key and strong ETag for the rendered results of ``user``'s submitted
+    attempt, or None if it is not one. Once released, a result only changes
+    when the release state or the test/session settings do, so those columns
+    make up the version.
+    """
+    row = TestAttempt.objects.filter(
+        id=attempt_id,
+        is_submitted=True,
+        student_test_attempt__student=user,
+    ).values_list(
+        'submitted_at',
+        'result_released_at',
+        'student_test_attempt__test_session__updated_at',
+        'student_test_attempt__test_session__test__updated_at',
+        'student_test_attempt__test_session__test__answer_visibility_level',
+    ).first()
+    if row is None:
+        return None
+    version = hashlib.sha256(repr((ResultCacheConfig.VERSION,) + row).encode()).hexdigest()[:32]
+    cache_key = CacheKeys.RESULT_DETAIL.format(attempt_id=attempt_id, version=version)
+    # The page around the fragment shows the user and links hashed static files
+    page = f'{version}:{user.id}:{getattr(staticfiles_storage, "manifest_hash", "")}'
+    etag = quote_etag(hashlib.sha256(page.encode()).hexdigest()[:32])
+    return cache_key, etag
+
+
+def _result_page_response(request, content, etag):
+    """Result page around pre-rendered ``content``, answering conditional GETs with 304"""
+    # A page carrying one-off flash messages must not be revalidated later
+    revalidate = len(messages.get_messages(request)) == 0
+    response = get_conditional_response(request, etag=etag) if revalidate else None
+    if response is None:
+        response = render(request, 'accounts/test_results.html', {'result_content': content})
+    if revalidate:
+        response.headers['ETag'] = etag
+    # Browsers keep the page but check back each time (refresh, back button)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
+@replica_reads
 def teacher_test_results(request, session_id):
     """Teacher view of all student results for a test session (v1.4)"""
     try:
@@ -817,7 +1005,7 @@ def teacher_test_results(request, session_id):
         for attempt in completed_attempts:
             student = attempt.student_test_attempt.student
             total_questions = attempt.total_questions
-            correct_answers = attempt.answers.filter(is_correct=True).count()
+            correct_answers, _ = answers.attempt_totals(attempt)
             score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
             
             # Calculate completion time
@@ -873,13 +1061,117 @@ def teacher_test_results(request, session_id):
         }
         
         return render(request, 'accounts/teacher_test_results.html', context)
-        
+
     except TestSession.DoesNotExist:
         messages.error(request, 'Test session not found.')
         return redirect('dashboard')
 
 
 @login_required
+def teacher_live_monitor(request, session_id):
+    """Teacher live view of who has joined, answered and submitted"""
+    try:
+        test_session = TestSession.objects.select_related('test', 'created_by').get(id=session_id)
+    except TestSession.DoesNotExist:
+        messages.error(request, 'Test session not found.')
+        return redirect('dashboard')
+
+    if test_session.created_by != request.user:
+        messages.error(request, 'Access denied. You can only monitor tests you created.')
+        return redirect('dashboard')
+
+    questions = list(test_session.test.questions.order_by('id').only('id', 'title'))
+    context = {
+        'test_session': test_session,
+        'questions': questions,
+        'reconnect_ms': LiveMonitorConfig.RECONNECT_MS,
+    }
+    return render(request, 'accounts/teacher_live_monitor.html', context)
+
+
+@login_required
+def teacher_live_monitor_stream(request, session_id):
+    """
+    Polling fallback for the monitor page under WSGI, where a held stream
+    would take one of the worker's few request threads. Each request gets
+    one full snapshot in SSE format and the connection closes; EventSource
+    polls again after ``LiveMonitorConfig.RECONNECT_MS``. ``Last-Event-ID``
+    is ignored and no deltas are sent. Under ASGI the async view streams
+    deltas instead.
+    """
+    test_session = TestSession.objects.filter(id=session_id, created_by=request.user).only('id').first()
+    if test_session is None:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+
+    monitor = get_monitor(test_session.id)
+    return sse_response(_live_monitor_events(monitor, LiveMonitorConfig.WSGI_STREAM_SECONDS))
+
+
+@login_required
+def student_session_events(request):
+    """
+    Report whether a joined session started, was edited or was cancelled
+    after ``?since=`` (epoch seconds of the dashboard render).
+
+    Under WSGI a held stream would occupy one of the worker's few request
+    threads for minutes, so the dashboard polls this check every
+    ``SessionWaitConfig.STATUS_POLL_SECONDS`` instead; under ASGI the async
+    view streams the events.
+    """
+    try:
+        since = datetime.fromtimestamp(float(request.GET['since']), tz=dt_timezone.utc)
+    except (KeyError, ValueError, OverflowError, OSError):
+        return JsonResponse({'type': 'error', 'error': 'Invalid since'}, status=400)
+
+    now = timezone.now()
+    joined = TestSession.objects.filter(studenttestattempt__student=request.user)
+    changed = joined.filter(
+        models.Q(updated_at__gt=since) | models.Q(start_time__gt=since, start_time__lte=now)
+    ).values_list('id', 'start_time', 'is_active').first()
+    if changed:
+        session_id, start_time, is_active = changed
+        if not is_active:
+            return JsonResponse({'type': 'cancelled', 'session_id': session_id})
+        if start_time <= now:
+            return JsonResponse({'type': 'started', 'session_id': session_id})
+        return JsonResponse({'type': 'updated', 'session_id': session_id, 'start_time': start_time})
+
+    if not joined.filter(is_active=True, start_time__gt=now).exists():
+        return JsonResponse({'type': 'idle'})
+    return JsonResponse({'type': 'waiting'})
+
+
+def _live_monitor_message(monitor, delta):
+    """SSE message for a queued delta; a resync marker becomes a fresh snapshot"""
+    if delta is Subscriber.RESYNC:
+        snapshot = monitor.snapshot()
+        return format_event(snapshot, event='snapshot', event_id=snapshot['seq'])
+    return format_event(delta, event='delta', event_id=delta['seq'])
+
+
+def _live_monitor_events(monitor, max_seconds=LiveMonitorConfig.MAX_STREAM_SECONDS):
+    """Yield a snapshot, then deltas and heartbeats until ``max_seconds`` have passed"""
+    # Subscribing keeps the monitor running between reconnects
+    subscriber = monitor.subscribe()
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield format_retry(LiveMonitorConfig.RECONNECT_MS)
+        yield _live_monitor_message(monitor, Subscriber.RESYNC)
+        while time.monotonic() < deadline and streams_open():
+            try:
+                delta = subscriber.get(timeout=LiveMonitorConfig.HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield format_comment()
+                continue
+            if delta is Subscriber.CLOSE:
+                break
+            yield _live_monitor_message(monitor, delta)
+    finally:
+        monitor.unsubscribe(subscriber)
+
+
+@login_required
+@replica_reads
 def teacher_student_detail(request, session_id, attempt_id):
     """Teacher view of individual student's detailed answer breakdown (v1.4)"""
     try:
@@ -905,17 +1197,17 @@ def teacher_student_detail(request, session_id, attempt_id):
         
         # Calculate basic results
         total_questions = test_attempt.total_questions
-        correct_answers = test_attempt.answers.filter(is_correct=True).count()
+        correct_answers, _ = answers.attempt_totals(test_attempt)
         score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
         
         # Get detailed question breakdown (reuse v1.3 logic)
-        answers = test_attempt.answers.select_related('question').order_by('question__id')
+        attempt_answers = test_attempt.answer_rows.select_related('question').order_by('question__id')
         questions = test_attempt.test.questions.all().prefetch_related('choices').order_by('id')
         
         question_reviews = []
         for question in questions:
             # Find student's answer for this question
-            student_answer = answers.filter(question=question).first()
+            student_answer = attempt_answers.filter(question=question).first()
             
             # Get question choices
             choices = []
@@ -1016,7 +1308,7 @@ def teacher_result_release_management(request, session_id):
             # Calculate scores if submitted
             if attempt.is_submitted:
                 total_questions = attempt.total_questions
-                correct_answers = attempt.answers.filter(is_correct=True).count()
+                correct_answers, _ = answers.attempt_totals(attempt)
                 score_percentage = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
             else:
                 total_questions = 0
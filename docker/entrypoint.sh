@@ -46,6 +46,10 @@ export DJANGO_SETTINGS_MODULE=smart_mcq.production_settings
 echo "📦 Running database migrations..."
 python manage.py migrate --noinput
 
+# Generate variants for question images that have none (new uploads are processed on save)
+echo "📦 Processing question images..."
+python manage.py process_question_images
+
 # Collect static files
 echo "📦 Collecting static files..."
 python manage.py collectstatic --noinput --clear
@@ -68,7 +72,12 @@ else:
 
 # Start Django with Gunicorn
 echo "🔧 Starting Django application..."
-gunicorn smart_mcq.wsgi:application --bind 0.0.0.0:8000 --workers 3 --timeout 60 &
+# Workers, threads and worker class come from gunicorn.conf.py (SERVER_MODE=asgi for uvicorn)
+gunicorn --config /app/gunicorn.conf.py &
+
+# Submit attempts left open when their session ends (students who closed the tab)
+echo "🔧 Starting expired attempt sweeper..."
+python manage.py finalize_expired_attempts --loop &
 
 # Start Nginx
 echo "🔧 Starting Nginx..."
@@ -30,6 +30,14 @@ echo "📂 Collecting static files..."
 echo "📦 Running database migrations..."
 /app/.venv/bin/python manage.py migrate --noinput
 
+# Generate variants for question images that have none (new uploads are processed on save)
+echo "📦 Processing question images..."
+/app/.venv/bin/python manage.py process_question_images
+
+# Merge answers journaled before the last shutdown (write-behind mode)
+echo "📝 Merging leftover answer journal..."
+/app/.venv/bin/python manage.py flush_answer_journal
+
 # Create superuser if it doesn't exist
 echo "👤 Creating superuser if needed..."
 /app/.venv/bin/python -c "
@@ -48,7 +56,12 @@ else:
 
 # Start Django with Gunicorn
 echo "🔧 Starting Django application..."
-/app/.venv/bin/gunicorn smart_mcq.wsgi:application --bind 0.0.0.0:8000 --workers 3 --timeout 60 &
+# Workers, threads and worker class come from gunicorn.conf.py (SERVER_MODE=asgi for uvicorn)
+/app/.venv/bin/gunicorn --config /app/gunicorn.conf.py &
+
+# Submit attempts left open when their session ends (students who closed the tab)
+echo "🔧 Starting expired attempt sweeper..."
+/app/.venv/bin/python manage.py finalize_expired_attempts --loop &
 
 # Start Nginx
 echo "🔧 Starting Nginx..."
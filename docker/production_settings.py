@@ -2,6 +2,8 @@
 import os
 import socket
 from smart_mcq.settings import *
+from smart_mcq.database import configure_connections, configure_replica
+from smart_mcq.structured_logging import logging_config
 
 # Security
 DEBUG = False
@@ -66,13 +68,11 @@ else:
             'PASSWORD': os.environ.get('DB_PASSWORD', 'mcq_secure_password_2024'),
             'HOST': os.environ.get('DB_HOST', 'localhost'),
             'PORT': os.environ.get('DB_PORT', '5432'),
-            'CONN_MAX_AGE': 300,
-            'CONN_HEALTH_CHECKS': True,
-            'OPTIONS': {
-                'connect_timeout': 10,
-            }
         }
     }
+    # Routers and middleware for DATABASE_REPLICA_URL come from smart_mcq.settings
+    configure_replica(DATABASES)
+    configure_connections(DATABASES, workers=int(os.environ.get('GUNICORN_WORKERS') or 1), threads=DB_REQUEST_THREADS)
 
 # Static files
 STATIC_URL = '/static/'
@@ -81,6 +81,11 @@ STATIC_ROOT = '/app/staticfiles'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/app/media'
+MEDIA_ACCEL_REDIRECT = True  # nginx in this container serves /protected-media/
+
+# Write-behind answer journal (ANSWER_WRITE_BEHIND=true); on a volume so a
+# restart does not lose acknowledged answers
+ANSWER_JOURNAL_DIR = '/app/journal'
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -101,41 +106,8 @@ CSRF_COOKIE_SECURE = True      # HTTPS required
 SESSION_COOKIE_AGE = 3600      # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
-# Logging
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-    },
-    'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': '/app/logs/django.log',
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
-        },
-    },
-    'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO',
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-    },
-}
+# Logging - JSON lines on stdout and in a rotated file, written off the request path
+LOGGING = logging_config('/app/logs/django.log')
 
 # Cache (optional - can be enabled with Redis later)
 CACHES = {
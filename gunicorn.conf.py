@@ -0,0 +1,189 @@
+"""
+Gunicorn configuration for Smart MCQ.
+
+Workers and threads are sized from the CPUs and memory actually available
+to the container (cgroup limits included) instead of a fixed ``--workers 3``.
+The app is preloaded in the master and its heap frozen before forking so
+workers share the imported Django code and compiled templates copy-on-write.
+
+Environment overrides: SERVER_MODE (wsgi|asgi), GUNICORN_BIND,
+GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_WORKER_CLASS, GUNICORN_TIMEOUT.
+"""
+
+import gc
+import os
+
+from smart_mcq.constants import AsgiConfig, ServerConfig
+
+
+def _cgroup_cpu_limit():
+    """CPU quota from cgroup v2 ``cpu.max`` (or v1 cfs files), or None"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def cpu_count():
+    """Cores usable by this process, honouring CPU affinity and cgroup quotas"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit:
+        cores = min(cores, max(1, round(limit)))
+    return cores
+
+
+def memory_mb():
+    """Memory available to the container in MB (cgroup limit or physical RAM)"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # Unlimited cgroups report "max" or a huge sentinel value
+            if value != 'max' and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+
+
+def default_workers():
+    by_cpu = ServerConfig.WORKERS_PER_CPU * cpu_count() + 1
+    by_memory = (memory_mb() - ServerConfig.RESERVED_MEMORY_MB) // ServerConfig.WORKER_MEMORY_MB
+    return max(ServerConfig.MIN_WORKERS, min(by_cpu, by_memory, ServerConfig.MAX_WORKERS))
+
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+if server_mode == 'asgi':
+    wsgi_app = 'smart_mcq.asgi:application'
+    default_worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'smart_mcq.wsgi:application'
+    # Threads let slow saves share a worker. Nothing holds a thread for long:
+    # held SSE/long-poll connections are only served under SERVER_MODE=asgi,
+    # while under WSGI the dashboard polls and the live monitor reconnects
+    default_worker_class = 'gthread'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', default_worker_class)
+workers = int(os.environ.get('GUNICORN_WORKERS') or default_workers())
+threads = int(os.environ.get('GUNICORN_THREADS') or ServerConfig.THREADS_PER_WORKER)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or ServerConfig.TIMEOUT)
+graceful_timeout = ServerConfig.GRACEFUL_TIMEOUT
+keepalive = ServerConfig.KEEPALIVE
+max_requests = ServerConfig.MAX_REQUESTS
+max_requests_jitter = ServerConfig.MAX_REQUESTS_JITTER
+
+# Heartbeat files on tmpfs so a slow disk cannot make healthy workers look hung
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+preload_app = True
+
+
+def when_ready(server):
+    """Warm shared state in the master, then freeze it before workers fork"""
+    if not server.cfg.preload_app:
+        return
+
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    from server_status.admission import admission
+    from smart_mcq.database import close_pools, resize_pools
+
+    # Settings were loaded with the environment's defaults; size the
+    # per-worker connection pools and exam endpoint limits for the final
+    # worker and thread counts
+    request_threads = AsgiConfig.DB_THREADS if server_mode == 'asgi' else server.cfg.threads
+    resize_pools(server.cfg.workers, request_threads)
+    admission.configure(request_threads)
+
+    get_resolver().url_patterns
+    for name in ServerConfig.PRELOAD_TEMPLATES:
+        try:
+            get_template(name)
+        except Exception as e:
+            server.log.warning('Could not preload template %s: %s', name, e)
+
+    # Never hand an inherited database socket or pool thread to the workers
+    connections.close_all()
+    close_pools()
+
+    # Move everything allocated so far out of the collector's view so GC passes
+    # in the workers do not touch (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(
+        'Serving %s with %d %s workers x %d threads (%d CPUs, %d MB), %d objects frozen',
+        server_mode, server.cfg.workers, server.cfg.worker_class_str, server.cfg.threads,
+        cpu_count(), memory_mb(), gc.get_freeze_count(),
+    )
+
+
+def post_fork(server, worker):
+    """Per-worker warm-up: start background threads and check the database"""
+    from django.db import connection
+    from server_status.sampler import get_sampler
+
+    # Threads do not survive fork, so each worker starts its own sampler
+    get_sampler()
+    try:
+        connection.ensure_connection()
+    except Exception as e:
+        server.log.warning('Worker %s could not reach the database: %s', worker.pid, e)
+    finally:
+        # Request threads open their own connections
+        connection.close()
+
+
+def _close_streams():
+    from test_sessions.live import shutdown_streams
+
+    # SSE and long-poll requests would otherwise keep a stopping or recycled
+    # worker alive until graceful_timeout expires
+    shutdown_streams()
+
+
+def worker_int(worker):
+    _close_streams()
+
+
+def post_request(worker, req, environ, resp):
+    # A worker that reached max_requests stops accepting and then waits for
+    # its in-flight requests, held streams included, before it is replaced
+    if not worker.alive:
+        _close_streams()
+
+
+def post_worker_init(worker):
+    """Close held event streams as soon as the master asks a worker to stop"""
+    import signal
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        _close_streams()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .images import schedule_image_processing, strip_metadata
 from .models import Question, Choice
 
 
@@ -14,7 +15,7 @@ class QuestionAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'difficulty', 'created_by', 'created_at', 'is_active']
     list_filter = ['difficulty', 'category', 'is_active']
     search_fields = ['title', 'description', 'category']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'image_variants']
     inlines = [ChoiceInline]
     
     def get_queryset(self, request):
@@ -22,6 +23,17 @@ class QuestionAdmin(admin.ModelAdmin):
         if not request.user.is_superuser:
             qs = qs.filter(created_by=request.user)
         return qs
+    
+    def save_model(self, request, obj, form, change):
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            # Replaced or cleared: the old variants no longer show this image
+            obj.image_variants = []
+            if obj.image:
+                obj.image = strip_metadata(obj.image)
+        super().save_model(request, obj, form, change)
+        if image_changed:
+            schedule_image_processing(obj)
 
 
 @admin.register(Choice)
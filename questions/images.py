@@ -0,0 +1,202 @@
+"""
+Question image pipeline.
+
+Uploaded images are stored without their metadata (``strip_metadata``),
+then re-encoded in the background into WebP and JPEG variants at
+``ImageConfig.VARIANT_WIDTHS``. Variants are rotated according to their
+EXIF orientation and written without any metadata (EXIF, including GPS
+position, and comments). They are named after a hash of their content, in
+a directory per question, so they can be cached forever. Replacing or
+clearing the image deletes the variants of the previous one. Templates
+serve them through ``srcset`` (``components/question_image.html``) and
+fall back to the original upload until processing has finished.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from smart_mcq.constants import ImageConfig
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Threads do not survive fork: each gunicorn worker starts its own pool
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=ImageConfig.PROCESSING_THREADS,
+                thread_name_prefix='question-images',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def strip_metadata(upload):
+    """
+    The uploaded image ``upload`` re-encoded without metadata (EXIF,
+    including GPS position, and comments) and rotated per its EXIF
+    orientation, as a file to store in its place. Files Pillow cannot read
+    are returned unchanged.
+    """
+    try:
+        with Image.open(upload) as original:
+            image_format = original.format
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (OSError, Image.DecompressionBombError):
+        upload.seek(0)
+        return upload
+
+    root, _extension = os.path.splitext(os.path.basename(upload.name))
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=ImageConfig.ORIGINAL_QUALITY, optimize=True)
+        name = f'{root}.jpg'
+    elif image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=ImageConfig.ORIGINAL_QUALITY)
+        name = f'{root}.webp'
+    else:
+        # PNG, GIF (first frame), BMP, TIFF...: lossless
+        if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        image.save(buffer, 'PNG', optimize=True)
+        name = f'{root}.png'
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def variant_directory(pk):
+    return f'{ImageConfig.VARIANT_DIR}/{pk}'
+
+
+def schedule_image_processing(question):
+    """
+    Generate ``question``'s image variants in the background once the upload
+    is committed, or delete the old ones once a cleared image is committed
+    """
+    pk = question.pk
+    if not question.image:
+        transaction.on_commit(lambda: _get_executor().submit(_delete_in_background, pk))
+        return
+    image_name = question.image.name
+    transaction.on_commit(lambda: _get_executor().submit(_process_in_background, pk, image_name))
+
+
+def _process_in_background(pk, image_name):
+    close_old_connections()
+    try:
+        process_question_image(pk, image_name)
+    except Exception:
+        logger.exception('Processing image %s of question %s failed', image_name, pk)
+    finally:
+        close_old_connections()
+
+
+def _delete_in_background(pk):
+    try:
+        delete_variants(pk)
+    except Exception:
+        logger.exception('Deleting image variants of question %s failed', pk)
+
+
+def delete_variants(pk, keep=()):
+    """Delete the files in question ``pk``'s variant directory, except the names in ``keep``"""
+    directory = variant_directory(pk)
+    try:
+        _subdirectories, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        name = f'{directory}/{filename}'
+        if name not in keep:
+            default_storage.delete(name)
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'webp':
+        image.save(buffer, 'WEBP', quality=ImageConfig.WEBP_QUALITY, method=6)
+    else:
+        if image.mode == 'RGBA':
+            # JPEG has no alpha channel: flatten onto white rather than black
+            flattened = Image.new('RGB', image.size, 'white')
+            flattened.paste(image, mask=image.getchannel('A'))
+            image = flattened
+        image.save(buffer, 'JPEG', quality=ImageConfig.JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_variants(source, directory=ImageConfig.VARIANT_DIR):
+    """Resized, metadata-free encodings of the image file ``source``, named under ``directory``"""
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        # Drop palette/CMYK/16-bit modes; keep transparency for WebP
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    # Never upscale: smaller originals are offered at their own width instead
+    widths = [width for width in ImageConfig.VARIANT_WIDTHS if width < image.width]
+    if image.width <= max(ImageConfig.VARIANT_WIDTHS):
+        widths.append(image.width)
+
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format in ('webp', 'jpeg'):
+            data = _encode(resized, image_format)
+            digest = hashlib.sha256(data).hexdigest()[:16]
+            extension = 'webp' if image_format == 'webp' else 'jpg'
+            variants.append({
+                'name': f'{directory}/{digest}-{width}w.{extension}',
+                'format': image_format,
+                'width': width,
+                'height': height,
+                'bytes': len(data),
+                'data': data,
+            })
+    return variants
+
+
+def process_question_image(pk, image_name=None):
+    """
+    Write the variants of question ``pk``'s image and record them on the
+    question. ``image_name`` guards against a newer upload having replaced
+    the image while this one was being processed. Returns the variants.
+    """
+    question = Question.objects.filter(pk=pk).only('image').first()
+    if question is None or not question.image:
+        return []
+    image_name = image_name or question.image.name
+    if question.image.name != image_name:
+        return []
+
+    with default_storage.open(image_name, 'rb') as source:
+        # The question id in the path lets protected_media check access to a variant
+        variants = build_variants(source, variant_directory(pk))
+
+    for variant in variants:
+        data = variant.pop('data')
+        # Content-addressed: an existing file already holds these bytes
+        if not default_storage.exists(variant['name']):
+            default_storage.save(variant['name'], ContentFile(data))
+
+    if Question.objects.filter(pk=pk, image=image_name).update(image_variants=variants):
+        # Variants of a replaced image; the names are content hashes, so an
+        # unchanged re-upload keeps its files
+        delete_variants(pk, keep={variant['name'] for variant in variants})
+    return variants
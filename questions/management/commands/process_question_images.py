@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from questions.images import process_question_image
+from questions.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive WebP/JPEG variants for question images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants for every question image')
+
+    def handle(self, *args, **options):
+        questions = Question.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            questions = questions.filter(image_variants=[])
+
+        processed = failed = 0
+        original_bytes = variant_bytes = 0
+        for question in questions.only('id', 'image').iterator():
+            try:
+                variants = process_question_image(question.pk)
+            except Exception as e:  # unreadable or missing upload
+                failed += 1
+                self.stderr.write(f'Question {question.pk} ({question.image.name}): {e}')
+                continue
+            processed += 1
+            try:
+                original_bytes += question.image.size
+            except OSError:
+                pass
+            # What a browser fetches: the largest WebP
+            webp = [variant for variant in variants if variant['format'] == 'webp']
+            if webp:
+                variant_bytes += max(webp, key=lambda variant: variant['width'])['bytes']
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} question image(s), {failed} failed; '
+            f'originals {original_bytes // 1024} KB, largest WebP variants {variant_bytes // 1024} KB'
+        ))
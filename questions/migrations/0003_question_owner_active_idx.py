@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0002_remove_question_organization'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by', '-created_at', '-id'], name='question_owner_active_idx'),
+        ),
+    ]
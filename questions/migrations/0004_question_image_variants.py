@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_question_owner_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+VARIANT_DIR = 'questions/variants'
+
+
+def move_flat_variants(apps, schema_editor):
+    """
+    Move variants recorded under the flat ``questions/variants/`` directory
+    into ``questions/variants/<question id>/``, where protected_media looks
+    for them. Questions with a missing variant file are reset to no variants,
+    so ``manage.py process_question_images`` regenerates them.
+    """
+    Question = apps.get_model('questions', 'Question')
+    flat_names = set()
+    for question in Question.objects.exclude(image_variants=[]).only('id', 'image_variants').iterator():
+        directory = f'{VARIANT_DIR}/{question.pk}/'
+        variants = []
+        for variant in question.image_variants:
+            name = variant['name']
+            if name.startswith(directory):
+                variants.append(variant)
+                continue
+            new_name = directory + name.rsplit('/', 1)[-1]
+            if not default_storage.exists(new_name):
+                if not default_storage.exists(name):
+                    variants = []
+                    break
+                with default_storage.open(name, 'rb') as source:
+                    default_storage.save(new_name, source)
+            flat_names.add(name)
+            variants.append({**variant, 'name': new_name})
+        if variants != question.image_variants:
+            Question.objects.filter(pk=question.pk).update(image_variants=variants)
+
+    # Identical uploads share flat files, so they go once every question has its copy
+    for name in flat_names:
+        default_storage.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_question_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_flat_variants, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 
 
 class Question(models.Model):
@@ -15,6 +16,9 @@ class Question(models.Model):
     category = models.CharField(max_length=100, blank=True)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='medium')
     image = models.ImageField(upload_to='questions/', blank=True, null=True)
+    # Resized copies of ``image`` written by questions.images:
+    # [{'name': ..., 'format': 'webp' | 'jpeg', 'width': ..., 'height': ...}]
+    image_variants = models.JSONField(default=list, blank=True)
     
     # Tracking fields
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -25,8 +29,39 @@ class Question(models.Model):
     def __str__(self):
         return self.title[:100]
     
+    def _image_srcset(self, image_format):
+        return ', '.join(
+            f"{default_storage.url(variant['name'])} {variant['width']}w"
+            for variant in self.image_variants if variant['format'] == image_format
+        )
+    
+    @property
+    def image_webp_srcset(self):
+        return self._image_srcset('webp')
+    
+    @property
+    def image_jpeg_srcset(self):
+        return self._image_srcset('jpeg')
+    
+    @property
+    def image_fallback(self):
+        """Largest JPEG variant with its URL, for ``src``, ``width`` and ``height``"""
+        jpegs = [variant for variant in self.image_variants if variant['format'] == 'jpeg']
+        if not jpegs:
+            return None
+        largest = max(jpegs, key=lambda variant: variant['width'])
+        return {**largest, 'url': default_storage.url(largest['name'])}
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Teacher question bank: filter(created_by, is_active=True) ordered by (-created_at, -id)
+            models.Index(
+                fields=['created_by', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='question_owner_active_idx',
+            ),
+        ]
 
 
 class Choice(models.Model):
@@ -1,3 +1,123 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from smart_mcq.pagination import KeysetPaginator
+from test_sessions.models import StudentTestAttempt, TestSession
+from tests.models import Test
+from .images import strip_metadata
+from .models import Question
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user('teacher')
+        Question.objects.bulk_create(
+            Question(title=f'Q{number}', description='', created_by=teacher) for number in range(7)
+        )
+        # Imports create questions in one statement, so created_at ties are common
+        Question.objects.update(created_at=timezone.now())
+        cls.expected = list(Question.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def paginator(self):
+        return KeysetPaginator(Question.objects.all(), 3, ordering=('-created_at', '-id'))
+
+    def ids(self, page):
+        return [question.id for question in page]
+
+    def test_next_pages_across_equal_created_at(self):
+        paginator = self.paginator()
+        page = paginator.get_page({})
+        seen = self.ids(page)
+        while page.has_next():
+            page = paginator.get_page({'after': paginator.encode_cursor(page[-1]), 'page': page.number + 1})
+            seen += self.ids(page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(page.number, 3)
+
+    def test_previous_page_across_equal_created_at(self):
+        paginator = self.paginator()
+        second = paginator.get_page({'after': paginator.encode_cursor(paginator.get_page({})[-1]), 'page': 2})
+        third = paginator.get_page({'after': paginator.encode_cursor(second[-1]), 'page': 3})
+
+        back = paginator.get_page({'before': paginator.encode_cursor(third[0]), 'page': 2})
+        self.assertEqual(self.ids(back), self.ids(second))
+        self.assertTrue(back.has_previous())
+
+        first = paginator.get_page({'before': paginator.encode_cursor(back[0]), 'page': 1})
+        self.assertEqual(self.ids(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self.paginator().get_page({'after': 'not-a-cursor', 'page': 4})
+        self.assertEqual(page.number, 1)
+        self.assertEqual(self.ids(page), self.expected[:3])
+
+
+class ImageMetadataTests(TestCase):
+    def upload(self, image_format, **save_options):
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, image_format, **save_options)
+        return SimpleUploadedFile(f'photo.{image_format.lower()}', buffer.getvalue())
+
+    def test_strip_metadata_drops_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'
+        exif[0x0112] = 6  # Rotated 90 degrees
+        stripped = strip_metadata(self.upload('JPEG', exif=exif.tobytes()))
+
+        self.assertEqual(stripped.name, 'photo.jpg')
+        with Image.open(stripped) as image:
+            self.assertEqual(dict(image.getexif()), {})
+            self.assertEqual(image.size, (20, 40))
+
+    def test_strip_metadata_drops_png_text(self):
+        info = PngInfo()
+        info.add_text('Comment', 'secret')
+        stripped = strip_metadata(self.upload('PNG', pnginfo=info))
+        with Image.open(stripped) as image:
+            self.assertNotIn('Comment', image.info)
+
+    def test_unreadable_upload_is_unchanged(self):
+        upload = SimpleUploadedFile('notes.jpg', b'not an image')
+        self.assertIs(strip_metadata(upload), upload)
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT=True)
+class ProtectedMediaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher')
+        cls.student = User.objects.create_user('student')
+        cls.question = Question.objects.create(
+            title='Q', description='', created_by=cls.teacher, image='questions/photo.jpg'
+        )
+        test = Test.objects.create(title='Test', description='', time_limit_minutes=30, created_by=cls.teacher)
+        test.questions.add(cls.question)
+        session = TestSession.objects.create(
+            test=test, start_time=timezone.now() - timedelta(minutes=1), created_by=cls.teacher
+        )
+        StudentTestAttempt.objects.create(student=cls.student, test_session=session)
+        cls.variant = f'questions/variants/{cls.question.pk}/abc-320w.webp'
+
+    def get(self, user, path):
+        self.client.force_login(user)
+        return self.client.get(f'/media/{path}')
+
+    def test_original_is_served_until_variants_exist(self):
+        self.assertEqual(self.get(self.student, 'questions/photo.jpg').status_code, 200)
+
+    def test_students_get_only_variants_once_they_exist(self):
+        Question.objects.filter(pk=self.question.pk).update(
+            image_variants=[{'name': self.variant, 'format': 'webp', 'width': 320, 'height': 160}]
+        )
+        self.assertEqual(self.get(self.student, 'questions/photo.jpg').status_code, 404)
+        self.assertEqual(self.get(self.student, self.variant).status_code, 200)
+        self.assertEqual(self.get(self.teacher, 'questions/photo.jpg').status_code, 200)
@@ -1,8 +1,21 @@
+import mimetypes
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from smart_mcq.constants import ImageConfig, MediaConfig, PaginationConfig
+from smart_mcq.pagination import KeysetPaginator
+from test_sessions.models import TestSession
+from tests.models import Test
+from .images import schedule_image_processing, strip_metadata
 from .models import Question, Choice
 
 
@@ -28,12 +41,11 @@ def question_list(request):
     questions = Question.objects.filter(
         created_by=request.user,
         is_active=True
-    ).order_by('-created_at')
+    )
     
-    # Pagination
-    paginator = Paginator(questions, 10)  # Show 10 questions per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id) - no OFFSET scans on deep pages
+    paginator = KeysetPaginator(questions, PaginationConfig.LIST_PAGE_SIZE, ordering=('-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET)
     
     context = {
         'questions': page_obj,
@@ -72,8 +84,9 @@ def question_create(request):
         
         # Handle image upload
         if 'image' in request.FILES:
-            question.image = request.FILES['image']
+            question.image = strip_metadata(request.FILES['image'])
             question.save()
+            schedule_image_processing(question)
         
         # Create 4 choices
         choices_data = [
@@ -154,9 +167,13 @@ def question_edit(request, pk):
         
         # Handle image upload
         if 'image' in request.FILES:
-            question.image = request.FILES['image']
+            question.image = strip_metadata(request.FILES['image'])
+            # The old variants show the previous image; serve the upload until the new ones exist
+            question.image_variants = []
         
         question.save()
+        if 'image' in request.FILES:
+            schedule_image_processing(question)
         
         # Update choices
         choices = question.choices.all().order_by('label')
@@ -200,3 +217,70 @@ def question_delete(request, pk):
     
     context = {'question': question}
     return render(request, 'questions/question_confirm_delete.html', context)
+
+
+def _teaches_question(user, question):
+    """The question's owner, or a teacher whose tests use it"""
+    if question.created_by_id == user.id:
+        return True
+    return Test.objects.filter(questions=question, created_by=user).exists()
+
+
+def _can_view_question_media(user, question):
+    """Teachers of the question; students once a session of a test using it has started"""
+    if _teaches_question(user, question):
+        return True
+    return TestSession.objects.filter(
+        test__questions=question,
+        studenttestattempt__student=user,
+        start_time__lte=timezone.now(),
+    ).exists()
+
+
+def _question_for_media(path):
+    """The question an uploaded image or one of its variants belongs to"""
+    variant_prefix = ImageConfig.VARIANT_DIR + '/'
+    if path.startswith(variant_prefix):
+        question_id = path[len(variant_prefix):].split('/', 1)[0]
+        if not question_id.isdigit():
+            return None
+        question = Question.objects.filter(pk=question_id).first()
+        if question is None or path not in (variant['name'] for variant in question.image_variants):
+            return None
+        return question
+    return Question.objects.filter(image=path).first()
+
+
+@login_required
+def protected_media(request, path):
+    """
+    Serve a question image after checking access to it. Behind nginx the
+    response only carries X-Accel-Redirect and nginx sends the file.
+    """
+    normalized = posixpath.normpath(path)
+    if normalized != path or normalized.startswith(('.', '/')):
+        raise Http404
+    question = _question_for_media(path)
+    if question is None or not _can_view_question_media(request.user, question):
+        # Same answer as a missing file, so URLs cannot be probed
+        raise Http404
+    is_variant = path.startswith(ImageConfig.VARIANT_DIR + '/')
+    if not is_variant and question.image_variants and not _teaches_question(request.user, question):
+        # Students get the re-encoded variants; originals uploaded before
+        # metadata stripping may still carry EXIF
+        raise Http404
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = MediaConfig.ACCEL_PREFIX + quote(path)
+    else:
+        try:
+            response = FileResponse(default_storage.open(path, 'rb'), content_type=content_type)
+        except FileNotFoundError:
+            raise Http404
+    if is_variant:
+        patch_cache_control(response, private=True, max_age=MediaConfig.VARIANT_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=MediaConfig.ORIGINAL_MAX_AGE)
+    return response
@@ -0,0 +1,122 @@
+"""
+Admission control for the exam endpoints.
+
+When a session ends every student submits within seconds. Without a limit
+those requests occupy every worker thread and the rest wait in gunicorn's
+backlog until nginx gives up after 60 seconds. Each endpoint in
+``AdmissionConfig.LIMITS`` instead gets a fixed number of concurrent slots per
+process. A request that finds them full is answered at once with 429 and a
+jittered ``Retry-After``, which the exam page honours before trying again.
+Under ASGI it first waits briefly in a short queue, parked on the event
+loop; a waiting WSGI request would hold the very thread the limit protects.
+
+Like the request metrics, gates are per process; the metrics endpoint
+reports their limits, in-flight requests and queue depth.
+"""
+
+import asyncio
+import threading
+import time
+
+from smart_mcq.constants import AdmissionConfig
+
+
+class EndpointGate:
+    """Concurrency limit with a bounded wait queue for one endpoint"""
+
+    def __init__(self, name, limit, max_queue=None):
+        self.name = name
+        self.limit = limit
+        self.max_queue = AdmissionConfig.MAX_QUEUE if max_queue is None else max_queue
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _try_enter(self):
+        # Called with the lock held
+        if self.in_flight < self.limit:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        return False
+
+    def _join_queue(self):
+        # Called with the lock held
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        return True
+
+    def acquire(self):
+        """Take a slot without waiting (WSGI); False if the request is turned away"""
+        with self._lock:
+            if self._try_enter():
+                return True
+            self.rejected += 1
+            return False
+
+    async def acquire_async(self, timeout=None):
+        """Take a slot, waiting up to ``timeout`` seconds in the queue; False if the request is turned away"""
+        timeout = AdmissionConfig.QUEUE_TIMEOUT if timeout is None else timeout
+        with self._lock:
+            if self._try_enter():
+                return True
+            if not self._join_queue():
+                return False
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(AdmissionConfig.ASYNC_POLL_INTERVAL)
+                with self._lock:
+                    if self._try_enter():
+                        return True
+            with self._lock:
+                self.rejected += 1
+            return False
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'max_queue': self.max_queue,
+                'peak_queue_depth': self.peak_waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
+
+
+class AdmissionRegistry:
+    """Process-wide gates keyed by URL name"""
+
+    def __init__(self):
+        self.gates = {}
+
+    def configure(self, threads):
+        """Size every configured endpoint's gate for ``threads`` request threads"""
+        self.gates = {
+            name: EndpointGate(name, max(1, round(share * threads)))
+            for name, share in AdmissionConfig.LIMITS.items()
+        }
+
+    def get(self, url_name):
+        return self.gates.get(url_name)
+
+    def snapshot(self):
+        return {name: gate.snapshot() for name, gate in self.gates.items()}
+
+
+admission = AdmissionRegistry()
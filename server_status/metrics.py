@@ -0,0 +1,174 @@
+"""
+In-process rolling request metrics for the server status endpoints.
+
+Each gunicorn worker keeps its own registry, so numbers reported by the
+metrics endpoint are per process (the payload includes the pid).
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from smart_mcq.constants import MetricsConfig
+
+
+class RollingHistogram:
+    """Fixed-bucket histogram over a sliding window of time slots"""
+
+    def __init__(self, buckets, window_seconds=None, window_count=None):
+        self.buckets = list(buckets)
+        self.window_seconds = window_seconds or MetricsConfig.WINDOW_SECONDS
+        self.window_count = window_count or MetricsConfig.WINDOW_COUNT
+        self._slots = [None] * self.window_count
+
+    def _slot(self, now):
+        epoch = int(now // self.window_seconds)
+        index = epoch % self.window_count
+        slot = self._slots[index]
+        if slot is None or slot['epoch'] != epoch:
+            slot = {
+                'epoch': epoch,
+                'counts': [0] * (len(self.buckets) + 1),
+                'count': 0,
+                'sum': 0.0,
+                'min': None,
+                'max': 0.0,
+            }
+            self._slots[index] = slot
+        return slot
+
+    def observe(self, value, now=None):
+        slot = self._slot(now if now is not None else time.time())
+        slot['counts'][bisect.bisect_left(self.buckets, value)] += 1
+        slot['count'] += 1
+        slot['sum'] += value
+        slot['min'] = value if slot['min'] is None else min(slot['min'], value)
+        slot['max'] = max(slot['max'], value)
+
+    def snapshot(self, now=None):
+        now = now if now is not None else time.time()
+        oldest_epoch = int(now // self.window_seconds) - self.window_count + 1
+        counts = [0] * (len(self.buckets) + 1)
+        count = 0
+        total = 0.0
+        minimum = None
+        maximum = 0.0
+        for slot in self._slots:
+            if slot is None or slot['epoch'] < oldest_epoch:
+                continue
+            for i, c in enumerate(slot['counts']):
+                counts[i] += c
+            count += slot['count']
+            total += slot['sum']
+            maximum = max(maximum, slot['max'])
+            if slot['min'] is not None:
+                minimum = slot['min'] if minimum is None else min(minimum, slot['min'])
+
+        return {
+            'count': count,
+            'mean': round(total / count, 2) if count else 0,
+            'max': round(maximum, 2),
+            'p50': self._quantile(counts, count, 0.50, minimum, maximum),
+            'p95': self._quantile(counts, count, 0.95, minimum, maximum),
+            'p99': self._quantile(counts, count, 0.99, minimum, maximum),
+        }
+
+    def _quantile(self, counts, count, q, minimum, maximum):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not count:
+            return 0
+        target = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= target:
+                # Clamp the bucket to the observed range so sparse data stays sensible
+                lower = max(self.buckets[i - 1] if i > 0 else 0, minimum)
+                upper = min(self.buckets[i] if i < len(self.buckets) else maximum, maximum)
+                lower = min(lower, upper)
+                fraction = (target - seen) / c
+                return round(lower + (upper - lower) * fraction, 2)
+            seen += c
+        return round(maximum, 2)
+
+
+class ViewMetrics:
+    """Rolling latency, DB time, query count and N+1 statistics for one view"""
+
+    def __init__(self):
+        self.wall_ms = RollingHistogram(MetricsConfig.LATENCY_BUCKETS_MS)
+        self.db_ms = RollingHistogram(MetricsConfig.LATENCY_BUCKETS_MS)
+        self.queries = RollingHistogram(MetricsConfig.QUERY_COUNT_BUCKETS)
+        self.n_plus_one = RollingHistogram([1])
+        self.duplicate_patterns = {}
+
+    def record(self, wall_ms, db_ms, query_count, duplicates, now):
+        self.wall_ms.observe(wall_ms, now)
+        self.db_ms.observe(db_ms, now)
+        self.queries.observe(query_count, now)
+        if duplicates:
+            self.n_plus_one.observe(1, now)
+            for sql, count in duplicates:
+                pattern = self.duplicate_patterns.get(sql)
+                if pattern is None:
+                    if len(self.duplicate_patterns) >= MetricsConfig.MAX_DUPLICATE_PATTERNS:
+                        continue
+                    pattern = self.duplicate_patterns[sql] = {'requests': 0, 'max_repeats': 0}
+                pattern['requests'] += 1
+                pattern['max_repeats'] = max(pattern['max_repeats'], count)
+                pattern['last_seen'] = now
+
+    def snapshot(self, now):
+        patterns = sorted(
+            ({'sql': sql, **data} for sql, data in self.duplicate_patterns.items()),
+            key=lambda p: p['requests'],
+            reverse=True,
+        )
+        return {
+            'wall_ms': self.wall_ms.snapshot(now),
+            'db_ms': self.db_ms.snapshot(now),
+            'queries': self.queries.snapshot(now),
+            'n_plus_one_requests': self.n_plus_one.snapshot(now)['count'],
+            'duplicate_query_patterns': patterns,
+        }
+
+
+class MetricsRegistry:
+    """Process-wide collection of ViewMetrics keyed by view name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self.started_at = time.time()
+
+    def record(self, view_name, wall_ms, db_ms, query_count, duplicates=()):
+        now = time.time()
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.record(wall_ms, db_ms, query_count, duplicates, now)
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            views = {name: metrics.snapshot(now) for name, metrics in self._views.items()}
+        views = dict(sorted(
+            views.items(),
+            key=lambda item: item[1]['wall_ms']['mean'] * item[1]['wall_ms']['count'],
+            reverse=True,
+        ))
+        return {
+            'pid': os.getpid(),
+            'collecting_since': self.started_at,
+            'window_seconds': MetricsConfig.WINDOW_SECONDS * MetricsConfig.WINDOW_COUNT,
+            'views': views,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,224 @@
+import logging
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import add_never_cache_headers
+
+from smart_mcq.async_db import install_query_wrapper_dispatch, query_wrappers
+from smart_mcq.constants import AdmissionConfig, LoggingConfig, MetricsConfig
+from smart_mcq.structured_logging import request_context
+from .admission import admission
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+# One line per request, sampled by the logging configuration
+request_logger = logging.getLogger('smart_mcq.requests')
+
+_REQUEST_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match._func_path) if match else 'unresolved'
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook that counts queries, DB time and repeated SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            # SQL arrives with %s placeholders, so identical text means the same pattern
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        threshold = MetricsConfig.DUPLICATE_QUERY_THRESHOLD
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, DB time and query count per resolved view, and log
+    them as one structured line per request under a request id (taken from
+    the ``X-Request-ID`` header set by nginx, or generated).
+
+    Requests that repeat the same SQL pattern DUPLICATE_QUERY_THRESHOLD or more
+    times are flagged as likely N+1 queries. Numbers are aggregated into the
+    in-process rolling histograms served by the ``server_status:metrics`` view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Under ASGI queries run on other threads; hook every connection instead
+            connection_created.connect(install_query_wrapper_dispatch)
+            for connection in connections.all(initialized_only=True):
+                install_query_wrapper_dispatch(None, connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        context_token = request_context.set(self._context(request))
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+            self._record(request, response, recorder, started)
+        finally:
+            request_context.reset(context_token)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        context_token = request_context.set(self._context(request))
+        token = query_wrappers.set(query_wrappers.get() + (recorder,))
+        try:
+            try:
+                response = await self.get_response(request)
+            finally:
+                query_wrappers.reset(token)
+            self._record(request, response, recorder, started)
+        finally:
+            request_context.reset(context_token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Log records emitted by the view carry its name from here on
+        request_context.get()['view'] = _view_name(request)
+
+    def _context(self, request):
+        request_id = request.headers.get(LoggingConfig.REQUEST_ID_HEADER, '')
+        if not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return {'request_id': request_id, 'view': None}
+
+    def _record(self, request, response, recorder, started):
+        wall_ms = (time.perf_counter() - started) * 1000
+        view_name = _view_name(request)
+
+        duplicates = recorder.duplicates()
+        if duplicates:
+            sql, repeats = duplicates[0]
+            logger.info(
+                'Possible N+1 in %s: %d queries, pattern repeated %d times: %s',
+                view_name, recorder.count, repeats, sql[:200],
+            )
+
+        registry.record(view_name, wall_ms, recorder.duration * 1000, recorder.count, duplicates)
+
+        response[LoggingConfig.REQUEST_ID_HEADER] = request.request_id
+        request_logger.log(
+            logging.WARNING if response.status_code >= 500 else logging.INFO,
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(wall_ms, 1),
+                'query_count': recorder.count,
+                'db_ms': round(recorder.duration * 1000, 1),
+            },
+        )
+
+
+class AdmissionControlMiddleware:
+    """
+    Cap concurrent requests per exam endpoint (``AdmissionConfig.LIMITS``)
+    and answer the excess with 429 and a jittered ``Retry-After`` instead of
+    letting it queue behind busy worker threads. Runs before the session and
+    auth middleware so turning a request away costs no database query.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        admission.configure(settings.DB_REQUEST_THREADS)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        gate = self._gate(request)
+        if gate is None:
+            return self.get_response(request)
+        if not gate.acquire():
+            return self._busy_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            gate.release()
+
+    async def __acall__(self, request):
+        gate = self._gate(request)
+        if gate is None:
+            return await self.get_response(request)
+        if not await gate.acquire_async():
+            return self._busy_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            gate.release()
+
+    def _gate(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        # Lets the request metrics attribute rejected requests to their view
+        request.resolver_match = match
+        return admission.get(match.url_name)
+
+    def _busy_response(self, request):
+        retry_after = AdmissionConfig.RETRY_AFTER + random.randint(0, AdmissionConfig.RETRY_JITTER)
+        if 'text/html' in request.headers.get('Accept', ''):
+            # A page load retries itself; a form post has to be sent again
+            refresh = f'<meta http-equiv="refresh" content="{retry_after}">' if request.method == 'GET' else ''
+            response = HttpResponse(
+                f'<!DOCTYPE html><html><head><title>Server busy</title>{refresh}</head><body>'
+                f'<p>The server is busy. Please try again in {retry_after} seconds.</p></body></html>',
+                status=429,
+            )
+        else:
+            response = JsonResponse(
+                {'success': False, 'error': 'Server busy, please retry', 'retry_after': retry_after},
+                status=429,
+            )
+        response['Retry-After'] = str(retry_after)
+        add_never_cache_headers(response)
+        return response
@@ -0,0 +1,137 @@
+"""
+Background resource sampler for the server status page.
+
+``psutil.cpu_percent(interval=1)`` blocks the calling worker for a full
+second, so instead each process runs one daemon thread that samples CPU,
+memory, disk, database latency and connection usage every few seconds into
+a ring buffer.
+The status views read the latest sample without doing any blocking work.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+from django.db import connection, connections
+
+from smart_mcq.constants import SamplerConfig
+from smart_mcq.database import REPLICA_ALIAS, connection_stats
+
+logger = logging.getLogger(__name__)
+
+
+def _gb(value):
+    return round(value / (1024**3), 2)
+
+
+def probe(conn):
+    """Time a ``SELECT 1`` on ``conn``; returns (ok, latency_ms, error)"""
+    try:
+        started = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        # Hand a pooled connection back between samples
+        conn.close_if_unusable_or_obsolete()
+        return True, latency_ms, None
+    except Exception as e:
+        conn.close()
+        return False, None, str(e)
+
+
+def take_sample():
+    """Collect one resource sample (non-blocking apart from the DB round trip)"""
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    sample = {
+        'timestamp': time.time(),
+        # interval=None measures since the previous call instead of sleeping
+        'cpu_percent': psutil.cpu_percent(interval=None),
+        'cpu_count': psutil.cpu_count(),
+        'memory_total': _gb(memory.total),
+        'memory_used': _gb(memory.used),
+        'memory_percent': memory.percent,
+        'disk_total': _gb(disk.total),
+        'disk_used': _gb(disk.used),
+        'disk_percent': round((disk.used / disk.total) * 100, 2),
+        'process_rss_mb': round(psutil.Process().memory_info().rss / (1024**2), 1),
+        'db_ok': False,
+        'db_latency_ms': None,
+        'db_error': None,
+    }
+
+    sample['db_ok'], sample['db_latency_ms'], sample['db_error'] = probe(connection)
+    if REPLICA_ALIAS in connections:
+        sample['replica_ok'], sample['replica_latency_ms'], sample['replica_error'] = probe(connections[REPLICA_ALIAS])
+
+    try:
+        sample['db_connections'] = connection_stats()
+    except Exception as e:
+        sample['db_connections'] = {'mode': 'unknown', 'error': str(e)}
+
+    return sample
+
+
+class ResourceSampler(threading.Thread):
+    """Daemon thread keeping a ring buffer of recent resource samples"""
+
+    def __init__(self, interval=None, history_size=None):
+        super().__init__(name='server-status-sampler', daemon=True)
+        self.interval = interval or SamplerConfig.INTERVAL_SECONDS
+        self.samples = deque(maxlen=history_size or SamplerConfig.HISTORY_SIZE)
+        self.pid = os.getpid()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # Prime cpu_percent so the first real sample covers a full interval
+        psutil.cpu_percent(interval=None)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.samples.append(take_sample())
+                except Exception:
+                    logger.exception('Resource sampling failed')
+                self._stop_event.wait(self.interval)
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def latest(self):
+        return self.samples[-1] if self.samples else None
+
+    def history(self):
+        return list(self.samples)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """
+    Return this process's sampler, starting it on first use.
+
+    The pid check restarts the thread in forked gunicorn workers, since
+    threads do not survive a fork.
+    """
+    global _sampler
+    if _sampler is not None and _sampler.pid == os.getpid() and _sampler.is_alive():
+        return _sampler
+    with _sampler_lock:
+        if _sampler is None or _sampler.pid != os.getpid() or not _sampler.is_alive():
+            _sampler = ResourceSampler()
+            _sampler.start()
+    return _sampler
+
+
+def latest_sample():
+    """Latest sample, taking one inline if the sampler has not produced any yet"""
+    sample = get_sampler().latest()
+    if sample is None:
+        sample = take_sample()
+    return sample
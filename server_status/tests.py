@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from smart_mcq.constants import AdmissionConfig
+from .admission import EndpointGate, admission
+from .middleware import AdmissionControlMiddleware
+
+
+class EndpointGateTests(SimpleTestCase):
+    def test_sync_acquire_turns_away_without_waiting(self):
+        gate = EndpointGate('save_answer', limit=1)
+        self.assertTrue(gate.acquire())
+        self.assertFalse(gate.acquire())
+        self.assertEqual(gate.snapshot()['rejected'], 1)
+        self.assertEqual(gate.snapshot()['peak_queue_depth'], 0)
+
+        gate.release()
+        self.assertTrue(gate.acquire())
+
+    def test_async_acquire_waits_for_a_released_slot(self):
+        gate = EndpointGate('save_answer', limit=1)
+        gate.acquire()
+
+        async def wait_for_slot():
+            waiter = asyncio.ensure_future(gate.acquire_async(timeout=1))
+            await asyncio.sleep(AdmissionConfig.ASYNC_POLL_INTERVAL)
+            self.assertEqual(gate.waiting, 1)
+            gate.release()
+            return await waiter
+
+        self.assertTrue(asyncio.run(wait_for_slot()))
+        self.assertEqual(gate.snapshot()['in_flight'], 1)
+        self.assertEqual(gate.waiting, 0)
+
+    def test_async_acquire_turns_away_after_timeout_or_full_queue(self):
+        gate = EndpointGate('save_answer', limit=1, max_queue=0)
+        gate.acquire()
+        self.assertFalse(asyncio.run(gate.acquire_async(timeout=1)))
+
+        gate.max_queue = 1
+        self.assertFalse(asyncio.run(gate.acquire_async(timeout=0.01)))
+        self.assertEqual(gate.snapshot()['rejected'], 2)
+
+
+@override_settings(ADMISSION_CONTROL=True)
+class AdmissionControlMiddlewareTests(SimpleTestCase):
+    path = '/accounts/take-test/1/save-answer/'
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = AdmissionControlMiddleware(lambda request: HttpResponse('ok'))
+        self.gate = admission.get('save_answer')
+
+    def fill(self):
+        for _ in range(self.gate.limit):
+            self.assertTrue(self.gate.acquire())
+        self.addCleanup(lambda: [self.gate.release() for _ in range(self.gate.limit)])
+
+    def test_full_endpoint_gets_429_with_retry_after(self):
+        self.fill()
+        response = self.middleware(self.factory.post(self.path))
+
+        self.assertEqual(response.status_code, 429)
+        retry_after = int(response['Retry-After'])
+        self.assertGreaterEqual(retry_after, AdmissionConfig.RETRY_AFTER)
+        self.assertLessEqual(retry_after, AdmissionConfig.RETRY_AFTER + AdmissionConfig.RETRY_JITTER)
+        self.assertEqual(json.loads(response.content)['retry_after'], retry_after)
+
+    def test_page_loads_get_an_html_429(self):
+        self.fill()
+        response = self.middleware(self.factory.get(self.path, HTTP_ACCEPT='text/html'))
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, 'http-equiv="refresh"', status_code=429)
+
+    def test_other_endpoints_are_not_limited(self):
+        self.fill()
+        self.assertEqual(self.middleware(self.factory.get('/')).status_code, 200)
+
+    def test_slot_is_released_when_the_view_raises(self):
+        def failing_view(request):
+            raise RuntimeError('view failed')
+
+        middleware = AdmissionControlMiddleware(failing_view)
+        gate = admission.get('save_answer')
+        with self.assertRaises(RuntimeError):
+            middleware(self.factory.post(self.path))
+        self.assertEqual(gate.snapshot()['in_flight'], 0)
+        self.assertTrue(gate.acquire())
+        gate.release()
@@ -6,4 +6,5 @@ app_name = 'server_status'
 urlpatterns = [
     path('', views.server_status, name='status'),
     path('health/', views.health_check, name='health'),
+    path('metrics/', views.request_metrics, name='metrics'),
 ]
\ No newline at end of file
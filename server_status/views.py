@@ -4,66 +4,160 @@ import psutil
 import time
 import pytz
 from datetime import datetime
+from functools import lru_cache
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, HttpResponse
 from django.db import connection
 from django.conf import settings
 from django.utils import timezone
+from smart_mcq.db_router import replica_reads
+from .admission import admission
+from .metrics import registry
+from .sampler import get_sampler, latest_sample
 
 
+@lru_cache(maxsize=1)
+def get_system_info():
+    """Platform details never change for the life of the process"""
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'python_version': platform.python_version(),
+        'architecture': platform.architecture()[0],
+        'processor': platform.processor() or 'Unknown',
+    }
+
+
+@lru_cache(maxsize=1)
+def get_app_info():
+    """Application settings are fixed once the process has started"""
+    return {
+        'django_version': getattr(settings, 'DJANGO_VERSION', 'Unknown'),
+        'debug_mode': settings.DEBUG,
+        'time_zone': settings.TIME_ZONE,
+        'secret_key_set': bool(getattr(settings, 'SECRET_KEY', None)),
+        'database_engine': settings.DATABASES['default']['ENGINE'].split('.')[-1],
+    }
+
+
+@lru_cache(maxsize=1)
+def get_boot_time():
+    try:
+        return datetime.fromtimestamp(psutil.boot_time())
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_timezone_comparison(minute):
+    """Timezone comparison table, recomputed at most once per minute"""
+    now_utc = datetime.fromtimestamp(minute * 60, tz=pytz.UTC)
+    common_timezones = ['UTC', 'US/Eastern', 'US/Pacific', 'Europe/London', 'Asia/Tokyo']
+    timezone_comparison = {}
+    for tz_name in common_timezones:
+        try:
+            tz = pytz.timezone(tz_name)
+            local_time = now_utc.astimezone(tz)
+            timezone_comparison[tz_name] = {
+                'time': local_time.strftime('%Y-%m-%d %H:%M'),
+                'offset': local_time.strftime('%z'),
+                'dst': local_time.dst() != None
+            }
+        except:
+            timezone_comparison[tz_name] = {'error': 'Invalid timezone'}
+    return timezone_comparison
+
+
+def prometheus_exposition(sample):
+    """Render a resource sample in the Prometheus text exposition format"""
+    metrics = [
+        ('smart_mcq_cpu_percent', 'gauge', 'Host CPU utilisation percent', sample['cpu_percent']),
+        ('smart_mcq_memory_percent', 'gauge', 'Host memory utilisation percent', sample['memory_percent']),
+        ('smart_mcq_disk_percent', 'gauge', 'Root filesystem utilisation percent', sample['disk_percent']),
+        ('smart_mcq_process_rss_megabytes', 'gauge', 'Resident memory of this worker', sample['process_rss_mb']),
+        ('smart_mcq_db_up', 'gauge', 'Whether the last database probe succeeded', int(sample['db_ok'])),
+    ]
+    pool = sample.get('db_connections') or {}
+    if pool.get('mode') == 'pool':
+        metrics.extend([
+            ('smart_mcq_db_pool_size', 'gauge', 'Open connections in this worker\'s pool', pool.get('pool_size', 0)),
+            ('smart_mcq_db_pool_in_use', 'gauge', 'Pooled connections checked out by threads', pool['pool_in_use']),
+            ('smart_mcq_db_pool_max', 'gauge', 'Configured maximum size of the pool', pool.get('pool_max', 0)),
+            ('smart_mcq_db_pool_requests_waiting', 'gauge', 'Threads waiting for a pooled connection',
+             pool.get('requests_waiting', 0)),
+        ])
+    if sample['db_latency_ms'] is not None:
+        metrics.append((
+            'smart_mcq_db_latency_milliseconds', 'gauge', 'Latency of the last SELECT 1 probe', sample['db_latency_ms'],
+        ))
+
+    lines = []
+    pid = os.getpid()
+    for name, metric_type, help_text, value in metrics:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.append(f'{name}{{pid="{pid}"}} {value}')
+
+    gates = admission.snapshot()
+    admission_metrics = [
+        ('smart_mcq_admission_limit', 'gauge', 'Concurrent requests admitted per endpoint', 'limit'),
+        ('smart_mcq_admission_in_flight', 'gauge', 'Admitted requests still running', 'in_flight'),
+        ('smart_mcq_admission_queue_depth', 'gauge', 'Requests waiting for a slot', 'queue_depth'),
+        ('smart_mcq_admission_admitted_total', 'counter', 'Requests admitted', 'admitted'),
+        ('smart_mcq_admission_rejected_total', 'counter', 'Requests turned away with 429', 'rejected'),
+    ]
+    for name, metric_type, help_text, key in admission_metrics:
+        if not gates:
+            break
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for endpoint, gate in gates.items():
+            lines.append(f'{name}{{pid="{pid}",endpoint="{endpoint}"}} {gate[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+@replica_reads
 def server_status(request):
     """Display comprehensive server status information"""
     try:
+        # Resource and database numbers come from the background sampler,
+        # so this view never blocks on psutil or a database probe
+        sample = latest_sample()
+        
+        # Prometheus text exposition
+        if request.GET.get('format') == 'prometheus':
+            return HttpResponse(prometheus_exposition(sample), content_type='text/plain; version=0.0.4; charset=utf-8')
+        
         # System Information
-        system_info = {
-            'hostname': platform.node(),
-            'platform': platform.platform(),
-            'python_version': platform.python_version(),
-            'architecture': platform.architecture()[0],
-            'processor': platform.processor() or 'Unknown',
-        }
+        system_info = get_system_info()
         
         # Server Resources
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
         resources = {
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'cpu_count': psutil.cpu_count(),
-            'memory_total': round(memory.total / (1024**3), 2),  # GB
-            'memory_used': round(memory.used / (1024**3), 2),    # GB
-            'memory_percent': memory.percent,
-            'disk_total': round(disk.total / (1024**3), 2),      # GB
-            'disk_used': round(disk.used / (1024**3), 2),        # GB
-            'disk_percent': round((disk.used / disk.total) * 100, 2),
+            key: sample[key] for key in (
+                'cpu_percent', 'cpu_count', 'memory_total', 'memory_used', 'memory_percent',
+                'disk_total', 'disk_used', 'disk_percent', 'process_rss_mb', 'db_latency_ms',
+            )
         }
+        resources['sampled_at'] = datetime.fromtimestamp(sample['timestamp']).isoformat()
         
         # Database Status
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                db_status = "Connected"
-                db_error = None
-        except Exception as e:
-            db_status = "Error"
-            db_error = str(e)
+        db_status = "Connected" if sample['db_ok'] else "Error"
+        db_error = sample['db_error']
+        db_connections = sample.get('db_connections', {})
+        replica = None
+        if 'replica_ok' in sample:
+            replica = {
+                'status': "Connected" if sample['replica_ok'] else "Error",
+                'latency_ms': sample['replica_latency_ms'],
+                'error': sample['replica_error'],
+            }
         
         # Application Status
-        app_info = {
-            'django_version': getattr(settings, 'DJANGO_VERSION', 'Unknown'),
-            'debug_mode': settings.DEBUG,
-            'time_zone': settings.TIME_ZONE,
-            'secret_key_set': bool(getattr(settings, 'SECRET_KEY', None)),
-            'database_engine': settings.DATABASES['default']['ENGINE'].split('.')[-1],
-        }
+        app_info = get_app_info()
         
         # Server Uptime (approximate)
-        try:
-            uptime_seconds = psutil.boot_time()
-            uptime = datetime.fromtimestamp(uptime_seconds)
-            uptime_str = f"{(datetime.now() - uptime).days} days"
-        except:
-            uptime_str = "Unknown"
+        boot_time = get_boot_time()
+        uptime_str = f"{(datetime.now() - boot_time).days} days" if boot_time else "Unknown"
         
         # Environment Variables (safe ones only)
         env_vars = {
@@ -96,19 +190,7 @@ def server_status(request):
         }
         
         # Test different timezone representations
-        common_timezones = ['UTC', 'US/Eastern', 'US/Pacific', 'Europe/London', 'Asia/Tokyo']
-        timezone_comparison = {}
-        for tz_name in common_timezones:
-            try:
-                tz = pytz.timezone(tz_name)
-                local_time = now_utc.astimezone(tz)
-                timezone_comparison[tz_name] = {
-                    'time': local_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'offset': local_time.strftime('%z'),
-                    'dst': local_time.dst() != None
-                }
-            except:
-                timezone_comparison[tz_name] = {'error': 'Invalid timezone'}
+        timezone_comparison = get_timezone_comparison(int(now_utc.timestamp() // 60))
         
         # Network and request timing
         request_info = {
@@ -126,6 +208,8 @@ def server_status(request):
             'resources': resources,
             'db_status': db_status,
             'db_error': db_error,
+            'db_connections': db_connections,
+            'replica': replica,
             'app_info': app_info,
             'uptime': uptime_str,
             'env_vars': env_vars,
@@ -138,6 +222,8 @@ def server_status(request):
         
         # Return JSON for API requests
         if request.headers.get('Accept') == 'application/json':
+            if request.GET.get('history') == '1':
+                context['history'] = get_sampler().history()
             return JsonResponse(context)
         
         return render(request, 'server_status/status.html', context)
@@ -172,4 +258,15 @@ def health_check(request):
             'status': 'unhealthy',
             'timestamp': datetime.now().isoformat(),
             'error': str(e)
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+
+@replica_reads
+def request_metrics(request):
+    """Per-view latency, DB time, query count, N+1 flags and admission gates for this worker process (staff only)"""
+    # The report holds SQL text and per-view timings; hide it like a missing page
+    if not request.user.is_staff:
+        raise Http404
+    if request.GET.get('reset') == '1':
+        registry.reset()
+    return JsonResponse({**registry.snapshot(), 'admission': admission.snapshot()})
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_mcq.settings')
+# Route the exam endpoints to their async views (see settings.ASGI_MODE)
+os.environ.setdefault('DJANGO_ASGI_MODE', 'true')
 
 application = get_asgi_application()
@@ -0,0 +1,60 @@
+"""
+Bounded thread pool for running ORM code from async views.
+
+Django's ``sync_to_async`` gives every ASGI request its own thread in
+thread-sensitive mode, so a burst of slow requests can open an unbounded
+number of threads and database connections. Async views here instead run
+their database work on one fixed-size pool per process, which also caps the
+connections each ASGI worker holds at ``AsgiConfig.DB_THREADS``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from smart_mcq.constants import AsgiConfig
+
+# execute_wrapper hooks of the current request. Under ASGI a request's queries
+# run on pool threads with their own connections, so hooks travel in this
+# contextvar (copied into threads by sync_to_async) instead.
+query_wrappers = ContextVar('query_wrappers', default=())
+
+_executor = ThreadPoolExecutor(max_workers=AsgiConfig.DB_THREADS, thread_name_prefix='async-db')
+
+
+def dispatch_query_wrappers(execute, sql, params, many, context):
+    """Connection-level execute_wrapper calling the hooks of the current context"""
+    call = execute
+    for wrapper in reversed(query_wrappers.get()):
+        call = functools.partial(wrapper, call)
+    return call(sql, params, many, context)
+
+
+def install_query_wrapper_dispatch(sender, connection, **kwargs):
+    """``connection_created`` receiver attaching ``dispatch_query_wrappers``"""
+    if dispatch_query_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_query_wrappers)
+
+
+def _run_with_connections(func, *args, **kwargs):
+    # Pool threads never see request_started/finished, so apply CONN_MAX_AGE
+    # (or hand pooled connections back) around every call instead
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def db_sync_to_async(func):
+    """Like ``sync_to_async`` but runs ``func`` on the bounded database pool"""
+    runner = sync_to_async(_run_with_connections, thread_sensitive=False, executor=_executor)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await runner(func, *args, **kwargs)
+
+    return wrapper
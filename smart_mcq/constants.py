@@ -212,6 +212,306 @@ class SystemConfig:
     AUTO_REFRESH_DELAY = 3000         # 3 seconds for status updates
 
 
+# ============================================================================
+# PAGINATION CONSTANTS
+# ============================================================================
+
+class PaginationConfig:
+    """Constants for keyset pagination of list views (see smart_mcq/pagination.py)"""
+    
+    # Count Modes
+    COUNT_EXACT = 'exact'             # Always run COUNT(*)
+    COUNT_ESTIMATED = 'estimated'     # Use PostgreSQL planner statistics (reltuples)
+    COUNT_AUTO = 'auto'               # Exact for small tables, estimated for large ones
+    
+    COUNT_MODE = COUNT_AUTO
+    EXACT_COUNT_THRESHOLD = 50000     # Table rows above which COUNT(*) is considered too expensive
+    
+    # Page Sizes
+    LIST_PAGE_SIZE = 10               # Questions, tests and sessions lists
+    TEACHER_DASHBOARD_PAGE_SIZE = 8   # Sessions on the teacher dashboard
+    STUDENT_DASHBOARD_PAGE_SIZE = 10  # Completed tests on the student dashboard
+
+
+# ============================================================================
+# REQUEST METRICS CONSTANTS
+# ============================================================================
+
+class MetricsConfig:
+    """Constants for per-view request metrics (see server_status/middleware.py)"""
+    
+    # Rolling Window (10 slots of 60 seconds = last 10 minutes)
+    WINDOW_SECONDS = 60
+    WINDOW_COUNT = 10
+    
+    # Histogram Buckets
+    LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+    QUERY_COUNT_BUCKETS = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377]
+    
+    # N+1 Detection
+    DUPLICATE_QUERY_THRESHOLD = 5     # Same SQL pattern repeated this often in one request
+    MAX_DUPLICATE_PATTERNS = 20       # Distinct patterns remembered per view
+
+
+# ============================================================================
+# SERVER STATUS SAMPLER CONSTANTS
+# ============================================================================
+
+class SamplerConfig:
+    """Constants for the background resource sampler (see server_status/sampler.py)"""
+    
+    INTERVAL_SECONDS = 5              # Seconds between samples
+    HISTORY_SIZE = 120                # Samples kept in the ring buffer (10 minutes)
+
+
+# ============================================================================
+# LIVE EXAM MONITOR CONSTANTS
+# ============================================================================
+
+class LiveMonitorConfig:
+    """Constants for the teacher live exam monitor (see test_sessions/live.py)"""
+    
+    POLL_INTERVAL_SECONDS = 2         # Delta query interval per watched session
+    CURSOR_OVERLAP_SECONDS = 5        # Re-read window to catch late-committed rows
+    IDLE_SHUTDOWN_SECONDS = 30        # Stop the monitor thread after this long without viewers
+    SUBSCRIBER_QUEUE_SIZE = 50        # Pending deltas per stream before forcing a resync
+    HEARTBEAT_SECONDS = 15            # Keepalive comment interval on idle streams
+    MAX_STREAM_SECONDS = 300          # Close long streams so workers are recycled (client reconnects)
+    WSGI_STREAM_SECONDS = 0           # Under WSGI: polling fallback, one snapshot per request (no deltas)
+    RECONNECT_MS = 3000               # EventSource retry delay
+
+
+class SessionWaitConfig:
+    """Constants for the students' "session started" stream (see test_sessions/live.py)"""
+    
+    POLL_INTERVAL_SECONDS = 5         # Shared re-read of watched sessions for edits/cancellation
+    IDLE_SHUTDOWN_SECONDS = 60        # Stop the watch thread after this long without waiters
+    HEARTBEAT_SECONDS = 15            # Keepalive comment interval on the event stream
+    MAX_STREAM_SECONDS = 300          # Close long streams so workers are recycled (client reconnects)
+    LONG_POLL_SECONDS = 25            # Maximum hold time of the long-poll fallback
+    RECONNECT_MS = 3000               # EventSource retry delay
+    STATUS_POLL_SECONDS = 5           # Dashboard status poll interval under WSGI (no held connections)
+
+
+# ============================================================================
+# ASGI MODE CONSTANTS
+# ============================================================================
+
+class AsgiConfig:
+    """Constants for the async exam endpoints (see smart_mcq/async_db.py)"""
+    
+    DB_THREADS = 8                    # ORM worker threads (and DB connections) per ASGI process
+
+
+# ============================================================================
+# APPLICATION SERVER CONSTANTS
+# ============================================================================
+
+class ServerConfig:
+    """Constants for gunicorn worker sizing (see gunicorn.conf.py)"""
+    
+    # Worker Sizing
+    WORKERS_PER_CPU = 2               # Workers = WORKERS_PER_CPU * cores + 1, capped by memory
+    MIN_WORKERS = 2
+    MAX_WORKERS = 16
+    WORKER_MEMORY_MB = 160            # Expected RSS of one worker after warm-up
+    RESERVED_MEMORY_MB = 768          # Left for PostgreSQL, nginx and the OS on a shared box
+    THREADS_PER_WORKER = 4            # gthread threads for short requests (streams need SERVER_MODE=asgi)
+    
+    # Timeouts
+    TIMEOUT = 60                      # Seconds before a silent worker is killed
+    GRACEFUL_TIMEOUT = 30
+    KEEPALIVE = 5                     # Seconds to hold idle keep-alive connections from nginx
+    
+    # Recycling
+    MAX_REQUESTS = 1000
+    MAX_REQUESTS_JITTER = 100
+    
+    # Templates compiled in the master before forking (shared copy-on-write)
+    PRELOAD_TEMPLATES = [
+        'base.html',
+        'accounts/take_test.html',
+        'accounts/student_dashboard.html',
+        'accounts/teacher_dashboard.html',
+        'accounts/test_results.html',
+    ]
+
+
+# ============================================================================
+# DATABASE CONNECTION CONSTANTS
+# ============================================================================
+
+class DatabaseConfig:
+    """Constants for database connection management (see smart_mcq/database.py)"""
+    
+    # Persistent Connections (default)
+    CONN_MAX_AGE = 300                # Seconds a thread reuses its connection (DB_CONN_MAX_AGE overrides)
+    CONN_HEALTH_CHECKS = True         # Ping a reused connection before its first query in a request
+    CONNECT_TIMEOUT = 10              # Seconds to wait for a new PostgreSQL connection
+    
+    # Connection Pool (DB_POOL=true, requires psycopg[pool])
+    POOL_MIN_SIZE = 2                 # Connections kept open per worker process
+    POOL_BACKGROUND_CONNECTIONS = 3   # Sampler, live monitor/session board and async ORM threads
+    POOL_TIMEOUT = 10                 # Seconds a request waits for a free connection
+    POOL_MAX_IDLE = 300               # Seconds before idle connections above min_size are closed
+    
+    # Server Budget
+    SERVER_MAX_CONNECTIONS = 100      # PostgreSQL max_connections (DB_MAX_CONNECTIONS overrides)
+    RESERVED_CONNECTIONS = 10         # Left for migrations, shells and the superuser
+
+
+# ============================================================================
+# READ REPLICA CONSTANTS
+# ============================================================================
+
+class ReplicaConfig:
+    """Constants for read-replica routing (see smart_mcq/db_router.py)"""
+    
+    STICKY_SECONDS = 10               # Reads stay on the primary this long after a client writes
+    STICKY_COOKIE = 'primary_until'   # Cookie holding the end of the sticky window (unix time)
+
+
+# ============================================================================
+# LOGGING CONSTANTS
+# ============================================================================
+
+class LoggingConfig:
+    """Constants for the queued JSON logging pipeline (see smart_mcq/structured_logging.py)"""
+    
+    QUEUE_SIZE = 10000                # Records buffered per process before new ones are dropped
+    MAX_BYTES = 20 * 1024 * 1024      # Rotate the log file at 20 MB
+    BACKUP_COUNT = 5                  # Rotated files kept
+    INFO_SAMPLE_RATE = 0.1            # Fraction of per-request INFO lines kept
+    SLOW_REQUEST_MS = 1000            # Requests at least this slow are always logged
+    REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+# ============================================================================
+# RENDERED FRAGMENT CACHE CONSTANTS
+# ============================================================================
+
+class ResultCacheConfig:
+    """Constants for the rendered result page cache (accounts.views.result_detail)"""
+    
+    TIMEOUT = 6 * 60 * 60             # Seconds a rendered result fragment is kept
+    VERSION = 1                       # Bump when test_results_content.html changes shape
+
+
+class DashboardCacheConfig:
+    """Constants for dashboard card fragments (accounts.fragment_cache)"""
+    
+    FRAGMENT_TIMEOUT = 30 * 60        # Seconds a rendered card is kept
+
+
+# ============================================================================
+# ANSWER WRITE CONSTANTS
+# ============================================================================
+
+class AnswerWriteConfig:
+    """Constants for the exam answer write path (test_sessions/answers.py, answer_journal.py)"""
+    
+    SEQUENCE_TIMEOUT = 6 * 60 * 60    # Seconds a per-attempt high-water mark stays cached
+    JOURNAL_FLUSH_INTERVAL = 0.3      # Seconds between merges of the write-behind journal
+    JOURNAL_ORPHAN_CHECK_INTERVAL = 10  # Seconds between scans for segments of dead processes
+
+
+class AnswerStorage:
+    """How an attempt's answers are stored (see test_sessions/answer_sheets.py)"""
+    
+    ROWS = 'rows'                     # One Answer row per answered question
+    SHEET = 'sheet'                   # One packed AnswerSheet row per attempt (PostgreSQL)
+    
+    STORAGE_CHOICES = [
+        (ROWS, 'Answer rows'),
+        (SHEET, 'Packed answer sheet'),
+    ]
+    
+    BLANK = '-'                       # Choice character of an unanswered slot
+
+
+# ============================================================================
+# EXAM NAVIGATION CONSTANTS
+# ============================================================================
+
+class NavigationConfig:
+    """Constants for the question cursor of an attempt (test_sessions/navigation.py)"""
+    
+    WRITE_THROUGH_INTERVAL = 30       # Seconds between writes of the cursor to TestAttempt
+    CURSOR_TIMEOUT = 6 * 60 * 60      # Seconds a cursor stays cached
+    QUESTION_PARAM = 'question'       # Query parameter naming the 1-based question shown
+
+
+# ============================================================================
+# ATTEMPT EXPIRY CONSTANTS
+# ============================================================================
+
+class ExpiryConfig:
+    """Constants for finalising attempts of ended sessions (test_sessions/submission.py)"""
+    
+    SWEEP_INTERVAL = 30               # Seconds between sweeps of finalize_expired_attempts --loop
+    BATCH_SIZE = 500                  # Attempts submitted per UPDATE
+
+
+# ============================================================================
+# IMAGE PIPELINE CONSTANTS
+# ============================================================================
+
+class ImageConfig:
+    """Constants for question image variants (see questions/images.py)"""
+    
+    VARIANT_WIDTHS = (320, 640, 1024)  # Pixel widths generated for srcset
+    VARIANT_DIR = 'questions/variants'
+    WEBP_QUALITY = 80
+    JPEG_QUALITY = 82
+    ORIGINAL_QUALITY = 95             # Uploads are re-encoded at this quality to drop their metadata
+    PROCESSING_THREADS = 2            # Background image workers per process
+
+
+class MediaConfig:
+    """Constants for access-checked media delivery (questions.views.protected_media)"""
+    
+    ACCEL_PREFIX = '/protected-media/'  # nginx internal location aliased to MEDIA_ROOT
+    VARIANT_MAX_AGE = 365 * 24 * 60 * 60  # Content-hashed variants never change
+    ORIGINAL_MAX_AGE = 60 * 60        # Uploads keep their name when a question is edited
+
+
+# ============================================================================
+# SHUFFLING CONSTANTS
+# ============================================================================
+
+class ShuffleConfig:
+    """Constants for per-student question and choice order (see test_sessions/shuffle.py)"""
+    
+    CACHED_ORDERS = 4096              # Question orders memoised per process (one per attempt)
+    CACHED_CHOICE_LAYOUTS = 16384     # Choice layouts memoised per process (one per attempt and question)
+
+
+# ============================================================================
+# ADMISSION CONTROL CONSTANTS
+# ============================================================================
+
+class AdmissionConfig:
+    """Constants for exam endpoint admission control (see server_status/admission.py)"""
+    
+    # Share of a worker's request threads each endpoint may occupy at once
+    # (by URL name; at least one request is always admitted)
+    LIMITS = {
+        'submit_test': 0.5,
+        'save_answer': 0.5,
+        'take_test': 0.5,
+        'navigate_question': 0.5,
+    }
+    
+    # Queueing (ASGI only; WSGI requests are turned away at once)
+    MAX_QUEUE = 2                     # Requests per endpoint allowed to wait for a slot
+    QUEUE_TIMEOUT = 1.0               # Seconds a request waits before it is turned away
+    ASYNC_POLL_INTERVAL = 0.05        # Seconds between slot checks of a waiting async request
+    
+    # Rejection
+    RETRY_AFTER = 2                   # Minimum seconds in the 429 Retry-After header
+    RETRY_JITTER = 4                  # Up to this many seconds added, so clients spread out
+
+
 # ============================================================================
 # VALIDATION CONSTANTS
 # ============================================================================
@@ -255,6 +555,11 @@ class CacheKeys:
     QUESTION_SET = 'question_set_{test_id}'
     ACTIVE_SESSIONS = 'active_sessions'
     USER_ATTEMPTS = 'user_attempts_{user_id}'
+    RESULT_DETAIL = 'result_detail_{attempt_id}_{version}'
+    USER_FRAGMENTS = 'user:{user_id}'              # Version counters (accounts.CacheVersion)
+    SESSION_FRAGMENTS = 'session:{session_id}'
+    ANSWER_SEQUENCES = 'answer_seq_{attempt_id}_{user_id}'
+    QUESTION_CURSOR = 'question_cursor_{attempt_id}'
 
 
 # ============================================================================
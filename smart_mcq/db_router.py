@@ -0,0 +1,125 @@
+"""
+Read-replica routing for reporting views.
+
+Writes always go to the primary. Reads go to the ``replica`` alias only
+inside views decorated with ``replica_reads`` (result pages, status,
+reports), so the exam path keeps reading its own writes. A request that
+writes marks the client as sticky for ``ReplicaConfig.STICKY_SECONDS``
+with a cookie; while sticky, replica views read from the primary too, so a
+teacher who just released results never sees a stale page.
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import DEFAULT_DB_ALIAS
+
+from smart_mcq.constants import ReplicaConfig
+from smart_mcq.database import REPLICA_ALIAS
+
+
+class RoutingState:
+    """Per-request routing flags, shared by the threads serving one request"""
+
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.use_replica = False
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside ``replica_reads`` views unless the client is sticky"""
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and state.use_replica and not state.sticky and not state.wrote:
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the schema through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(view_func):
+    """Route the ORM reads of a read-only view to the replica"""
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = routing_state.get()
+        if state is None:
+            # Called outside ReplicaStickinessMiddleware (e.g. from a test)
+            return view_func(request, *args, **kwargs)
+        state.use_replica = True
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """Track writes per request and pin recent writers to the primary"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self._state(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self._stick(state, response)
+
+    async def __acall__(self, request):
+        state = self._state(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self._stick(state, response)
+
+    def _state(self, request):
+        try:
+            sticky_until = float(request.COOKIES.get(ReplicaConfig.STICKY_COOKIE, 0))
+        except ValueError:
+            sticky_until = 0
+        return RoutingState(sticky=sticky_until > time.time())
+
+    def _stick(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                ReplicaConfig.STICKY_COOKIE,
+                str(round(time.time() + ReplicaConfig.STICKY_SECONDS, 3)),
+                max_age=ReplicaConfig.STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,284 @@
+"""
+Keyset (cursor) pagination for the teacher list views.
+
+Django's ``Paginator`` uses ``OFFSET`` plus a ``COUNT(*)`` on every page, so
+deep pages of a large question bank get slower the further you go. The
+``KeysetPaginator`` here seeks straight to the next page using the ordering
+columns of the last row seen, e.g. ``(created_at, id)``, and exposes a page
+object that the shared ``components/pagination.html`` template understands.
+
+Usage:
+    paginator = KeysetPaginator(questions, 10, ordering=('-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET)
+"""
+
+import base64
+import json
+import math
+from collections.abc import Sequence
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from smart_mcq.constants import PaginationConfig
+
+
+def estimate_count(queryset):
+    """
+    Return a planner estimate of the number of rows in a queryset (PostgreSQL only).
+
+    Unfiltered querysets read ``pg_class.reltuples`` directly; filtered ones
+    use the row estimate from ``EXPLAIN``, which is derived from the same
+    statistics. Returns None when no estimate is available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        return table_row_estimate(queryset.model, queryset.db)
+
+    with connection.cursor() as cursor:
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+def table_row_estimate(model, using='default'):
+    """Return ``reltuples`` for a model's table, or None outside PostgreSQL"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that were never analyzed
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor query parameter cannot be decoded"""
+
+
+class KeysetPaginator:
+    """Cursor paginator keyed on the queryset's ordering columns"""
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'),
+                 count_mode=None, exact_count_threshold=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.count_mode = count_mode or PaginationConfig.COUNT_MODE
+        if exact_count_threshold is None:
+            exact_count_threshold = PaginationConfig.EXACT_COUNT_THRESHOLD
+        self.exact_count_threshold = exact_count_threshold
+        self._count_is_estimate = False
+
+        model = queryset.model
+        self._fields = []
+        for key in self.ordering:
+            descending = key.startswith('-')
+            name = key.lstrip('-')
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            self._fields.append((field.attname, field, descending))
+
+    # ------------------------------------------------------------------
+    # Counting
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def count(self):
+        """Total number of rows (exact or estimated depending on count_mode)"""
+        if self.count_mode == PaginationConfig.COUNT_EXACT:
+            return self.queryset.count()
+
+        if self.count_mode == PaginationConfig.COUNT_AUTO:
+            table_rows = table_row_estimate(self.queryset.model, self.queryset.db)
+            if table_rows is None or table_rows <= self.exact_count_threshold:
+                return self.queryset.count()
+
+        estimate = estimate_count(self.queryset)
+        if estimate is None:
+            return self.queryset.count()
+        self._count_is_estimate = True
+        return estimate
+
+    @property
+    def count_is_estimate(self):
+        """True when ``count`` came from planner statistics rather than COUNT(*)"""
+        self.count
+        return self._count_is_estimate
+
+    @cached_property
+    def num_pages(self):
+        if self.count == 0:
+            return 1
+        return math.ceil(self.count / self.per_page)
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for _attname, field, _descending in self._fields]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self._fields):
+                raise InvalidCursor(cursor)
+            return [
+                field.to_python(value)
+                for (_attname, field, _descending), value in zip(self._fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+
+    def _seek_filter(self, values, forward):
+        """Build ``(a, b) < (x, y)`` style row comparison as a Q object"""
+        condition = Q()
+        equal_prefix = {}
+        for (attname, _field, descending), value in zip(self._fields, values):
+            # Walking forward on a descending column means "less than"
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal_prefix, **{f'{attname}__{lookup}': value})
+            equal_prefix[attname] = value
+        return condition
+
+    def _order_by(self, forward):
+        if forward:
+            return self.ordering
+        return tuple(key[1:] if key.startswith('-') else f'-{key}' for key in self.ordering)
+
+    # ------------------------------------------------------------------
+    # Pages
+    # ------------------------------------------------------------------
+
+    def get_page(self, params):
+        """
+        Return a KeysetPage for the given query parameters.
+
+        ``after`` / ``before`` carry the cursor, ``page`` carries the display
+        number only. Invalid cursors fall back to the first page, mirroring
+        ``Paginator.get_page``.
+        """
+        after = params.get('after')
+        before = params.get('before')
+        try:
+            number = max(int(params.get('page', 1)), 1)
+        except (TypeError, ValueError):
+            number = 1
+
+        try:
+            if after:
+                return self._page_after(self.decode_cursor(after), number)
+            if before:
+                return self._page_before(self.decode_cursor(before), number)
+        except InvalidCursor:
+            pass
+        return self._page_after(None, 1)
+
+    def _page_after(self, values, number):
+        queryset = self.queryset.order_by(*self._order_by(forward=True))
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward=True))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        has_previous = values is not None
+        return KeysetPage(rows, self, number if has_previous else 1, has_previous, has_next)
+
+    def _page_before(self, values, number):
+        queryset = self.queryset.order_by(*self._order_by(forward=False))
+        queryset = queryset.filter(self._seek_filter(values, forward=False))
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        if not has_previous:
+            number = 1
+        return KeysetPage(rows, self, max(number, 1), has_previous, True)
+
+
+class KeysetPage(Sequence):
+    """Page object mirroring the parts of ``django.core.paginator.Page`` our templates use"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, number, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<KeysetPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return max(self.number - 1, 1)
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+    @property
+    def next_page_query(self):
+        """Query string fragment (without '?') for the next page link"""
+        if not self._has_next or not self.object_list:
+            return ''
+        return urlencode({
+            'after': self.paginator.encode_cursor(self.object_list[-1]),
+            'page': self.next_page_number(),
+        })
+
+    @property
+    def previous_page_query(self):
+        """Query string fragment (without '?') for the previous page link"""
+        if not self._has_previous or not self.object_list:
+            return ''
+        if self.previous_page_number() == 1:
+            return 'page=1'
+        return urlencode({
+            'before': self.paginator.encode_cursor(self.object_list[0]),
+            'page': self.previous_page_number(),
+        })
@@ -13,9 +13,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from urllib.parse import urlparse, parse_qsl
 from datetime import datetime
 from django.utils import timezone
+from smart_mcq.constants import AsgiConfig, ServerConfig
+from smart_mcq.database import configure_connections, configure_replica, database_from_url
+from smart_mcq.structured_logging import logging_config
 
 load_dotenv()
 
@@ -38,6 +40,23 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 # Dynamic CSRF trusted origins from environment
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', 'http://localhost:8000').split(',')
 
+# Serving mode: smart_mcq/asgi.py sets this so the exam endpoints route to
+# their async implementations (accounts/async_views.py)
+ASGI_MODE = os.getenv('DJANGO_ASGI_MODE', 'false').lower() == 'true'
+
+# Per-endpoint concurrency limits with 429 + Retry-After for the exam
+# endpoints (server_status/admission.py)
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'true').lower() == 'true'
+
+# Storage of new attempts' answers: 'rows' (Answer) or 'sheet' (one packed
+# AnswerSheet per attempt, PostgreSQL only; test_sessions/answer_sheets.py)
+ANSWER_STORAGE = os.getenv('ANSWER_STORAGE', 'rows').lower()
+
+# Write-behind answer saves: journal to local disk, merge into Answer in
+# bulk (test_sessions/answer_journal.py)
+ANSWER_WRITE_BEHIND = os.getenv('ANSWER_WRITE_BEHIND', 'false').lower() == 'true'
+ANSWER_JOURNAL_DIR = os.getenv('ANSWER_JOURNAL_DIR') or BASE_DIR / 'journal'
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -58,6 +77,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'server_status.middleware.RequestMetricsMiddleware',
+    'server_status.middleware.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -92,19 +113,8 @@ WSGI_APPLICATION = 'smart_mcq.wsgi.application'
 # Database configuration using Neon DB
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL:
-    tmpPostgres = urlparse(DATABASE_URL)
-    db_name = tmpPostgres.path.lstrip('/') if tmpPostgres.path else 'smart_mcq_db'
-    
     DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': db_name,
-            'USER': tmpPostgres.username,
-            'PASSWORD': tmpPostgres.password,
-            'HOST': tmpPostgres.hostname,
-            'PORT': tmpPostgres.port or 5432,
-            'OPTIONS': dict(parse_qsl(tmpPostgres.query)) if tmpPostgres.query else {},
-        }
+        'default': database_from_url(DATABASE_URL),
     }
 else:
     # Fallback database configuration
@@ -119,6 +129,20 @@ else:
         }
     }
 
+# Optional read replica for reporting views (DATABASE_REPLICA_URL); writes and
+# the exam path always use the primary
+if configure_replica(DATABASES):
+    DATABASE_ROUTERS = ['smart_mcq.db_router.ReplicaRouter']
+    MIDDLEWARE.append('smart_mcq.db_router.ReplicaStickinessMiddleware')
+
+# Persistent connections, or one connection pool per process with DB_POOL=true.
+# The pool is sized for the request threads of a worker; gunicorn.conf.py
+# re-sizes it once the final worker and thread counts are known.
+DB_REQUEST_THREADS = AsgiConfig.DB_THREADS if ASGI_MODE else int(
+    os.getenv('GUNICORN_THREADS') or ServerConfig.THREADS_PER_WORKER
+)
+configure_connections(DATABASES, workers=int(os.getenv('GUNICORN_WORKERS') or 1), threads=DB_REQUEST_THREADS)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,10 +182,26 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# collectstatic writes content-hashed copies (css/take_test.3f2a9c.css) plus
+# .gz/.br siblings, so nginx can cache them forever and serve them precompressed
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Media files (question images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
+# Media is only served after questions.views.protected_media has checked access.
+# Behind nginx, the view answers with X-Accel-Redirect and nginx sends the file;
+# without it (runserver) the view streams the file itself.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', 'false').lower() == 'true'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -174,40 +214,5 @@ LOGIN_REDIRECT_URL = '/accounts/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 # Logging configuration
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
-        },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': 'logs/django.log',
-            'formatter': 'verbose',
-        },
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['file', 'console'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'accounts.views': {
-            'handlers': ['file', 'console'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-    },
-}
+# JSON lines through a per-process queue; file I/O happens on a listener thread
+LOGGING = logging_config(BASE_DIR / 'logs' / 'django.log', console_format='simple')
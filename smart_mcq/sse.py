@@ -0,0 +1,39 @@
+"""
+Server-Sent Events helpers shared by the live exam streams.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+def format_event(data, event=None, event_id=None):
+    """Encode one SSE message; ``data`` is serialised as JSON"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    lines.append(f'data: {payload}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def format_comment(text='keepalive'):
+    """SSE comment line, used as a heartbeat to keep proxies from timing out"""
+    return f': {text}\n\n'
+
+
+def format_retry(milliseconds):
+    """Tell EventSource how long to wait before reconnecting"""
+    return f'retry: {int(milliseconds)}\n\n'
+
+
+def sse_response(stream):
+    """Wrap an iterator of SSE strings in a non-buffered streaming response"""
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable nginx proxy buffering so events reach the browser immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
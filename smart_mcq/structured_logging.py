@@ -0,0 +1,259 @@
+"""
+Non-blocking JSON logging.
+
+Request threads only put records on a bounded in-memory queue
+(``QueueLogHandler``); a listener thread per process formats them as JSON
+lines and writes them to the real handlers, so file I/O never runs on the
+request path. Records carry the request id and view name of the request that
+logged them, and high-volume INFO events are sampled before they are queued.
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+from smart_mcq.constants import LoggingConfig
+
+# {'request_id': ..., 'view': ...} of the request being served
+request_context = ContextVar('request_context', default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _get_handler(name):
+    # logging.getHandlerByName() only exists from Python 3.12
+    getter = getattr(logging, 'getHandlerByName', None)
+    handler = getter(name) if getter else logging._handlers.get(name)
+    if handler is None:
+        raise ValueError(f'Unknown logging handler {name!r}')
+    return handler
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id and view name to every record"""
+
+    def filter(self, record):
+        context = request_context.get()
+        record.request_id = context['request_id'] if context else None
+        record.view = context['view'] if context else None
+        return True
+
+
+class InfoSamplingFilter(logging.Filter):
+    """
+    Keep a fraction of INFO records. Warnings, errors and slow requests
+    (``duration_ms`` of at least ``slow_ms``) are always kept.
+    """
+
+    def __init__(self, rate=LoggingConfig.INFO_SAMPLE_RATE, slow_ms=LoggingConfig.SLOW_REQUEST_MS):
+        super().__init__()
+        self.rate = rate
+        self.slow_ms = slow_ms
+
+    def filter(self, record):
+        if record.levelno != logging.INFO or self.rate >= 1:
+            return True
+        if getattr(record, 'duration_ms', 0) >= self.slow_ms:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Queue records for a background ``QueueListener`` that feeds the named
+    handlers. The listener starts on first use in each process, so gunicorn
+    workers forked from a preloaded master get their own thread and queue.
+    When the queue is full, records are dropped (and counted) rather than
+    blocking the request.
+    """
+
+    def __init__(self, queue_=None, targets=(), queue_size=LoggingConfig.QUEUE_SIZE):
+        # Python 3.12+ dictConfig passes a queue of its own for QueueHandler
+        # subclasses; a bounded one is used instead
+        super().__init__(queue.Queue(queue_size))
+        self.handler_names = targets
+        self.listener = None
+        self.dropped = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive fork: start from an empty queue and a new listener
+            self.queue = queue.Queue(self.queue.maxsize)
+            targets = [_get_handler(name) for name in self.handler_names]
+            self.listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Resolve the message, traceback and extras here, on the calling thread,
+        # so the listener never touches request objects that may have changed
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in list(record.__dict__.items()):
+            if key not in _RECORD_ATTRIBUTES and not isinstance(value, _PLAIN_TYPES + (list, dict)):
+                record.__dict__[key] = str(value)
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # logging.shutdown() closes this handler before its targets; drain first
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    Size-rotated log file that several worker processes can append to.
+
+    Writes and rollovers are serialised with an advisory lock on a sidecar
+    ``.lock`` file, and a process reopens the file when another process has
+    rotated it away underneath it.
+    """
+
+    def __init__(self, filename, maxBytes=LoggingConfig.MAX_BYTES, backupCount=LoggingConfig.BACKUP_COUNT,
+                 encoding='utf-8'):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        self._lock_fd = None
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self.stream.fileno()).st_ino:
+            self.stream.close()
+            self.stream = self._open()
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.baseFilename + '.lock', os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            self._reopen_if_rotated()
+            super().emit(record)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def logging_config(log_file, console_format='json', level='INFO'):
+    """``LOGGING`` dict routing everything through one ``QueueLogHandler``"""
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'request_context': {
+                '()': 'smart_mcq.structured_logging.RequestContextFilter',
+            },
+            'sample_info': {
+                '()': 'smart_mcq.structured_logging.InfoSamplingFilter',
+            },
+        },
+        'formatters': {
+            'json': {
+                '()': 'smart_mcq.structured_logging.JsonFormatter',
+            },
+            'simple': {
+                'format': '{levelname} {message}',
+                'style': '{',
+            },
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'formatter': console_format,
+            },
+            'file': {
+                'class': 'smart_mcq.structured_logging.SharedRotatingFileHandler',
+                'filename': str(log_file),
+                'formatter': 'json',
+            },
+            'queue': {
+                'class': 'smart_mcq.structured_logging.QueueLogHandler',
+                'targets': ['file', 'console'],
+                'filters': ['request_context'],
+            },
+        },
+        'root': {
+            'handlers': ['queue'],
+            'level': level,
+        },
+        'loggers': {
+            'django': {
+                'handlers': ['queue'],
+                'level': level,
+                'propagate': False,
+            },
+            # One line per request; sampled, except slow or failed requests
+            'smart_mcq.requests': {
+                'handlers': ['queue'],
+                'level': level,
+                'filters': ['sample_info'],
+                'propagate': False,
+            },
+        },
+    }
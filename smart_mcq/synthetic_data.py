@@ -0,0 +1,163 @@
+"""
+Synthetic exam data for benchmarks.
+
+Builds teachers, a question bank, tests, sessions, student attempts and
+answers with bulk inserts so that benchmark commands can run against a
+realistically sized dataset without going through the views.
+"""
+
+import random
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import Group, User
+from django.utils import timezone
+
+from accounts.models import Profile
+from questions.models import Choice, Question
+from smart_mcq.constants import MultipleChoice, UserRoles
+from test_sessions.models import Answer, StudentTestAttempt, TestAttempt, TestSession
+from tests.models import Test
+
+
+@dataclass
+class SyntheticDataset:
+    """Handles to the rows created by seed_exam_dataset"""
+    teachers: list = field(default_factory=list)
+    students: list = field(default_factory=list)
+    tests: list = field(default_factory=list)
+    sessions: list = field(default_factory=list)
+    attempts: list = field(default_factory=list)
+
+    def summary(self):
+        return {
+            'teachers': len(self.teachers),
+            'students': len(self.students),
+            'tests': len(self.tests),
+            'sessions': len(self.sessions),
+            'attempts': len(self.attempts),
+            'questions': Question.objects.filter(created_by__in=self.teachers).count(),
+            'answers': Answer.objects.filter(test_attempt__in=self.attempts).count(),
+        }
+
+
+def _create_users(prefix, count, role):
+    group, _ = Group.objects.get_or_create(
+        name=UserRoles.GROUP_TEACHERS if role == UserRoles.TEACHER else UserRoles.GROUP_STUDENTS
+    )
+    # Unusable passwords - benchmarks authenticate with force_login
+    User.objects.bulk_create([
+        User(username=f'{prefix}{role}_{i}', password='!')
+        for i in range(count)
+    ])
+    users = list(User.objects.filter(username__startswith=f'{prefix}{role}_').order_by('id'))
+    Profile.objects.bulk_create([Profile(user=user, role=role) for user in users])
+    group.user_set.add(*users)
+    return users
+
+
+def seed_exam_dataset(teachers=5, questions_per_teacher=200, tests_per_teacher=5,
+                      questions_per_test=20, sessions_per_teacher=5, students_per_session=30,
+                      answered_ratio=0.8, submitted_ratio=0.7, sessions_started=True,
+                      create_attempts=True, prefix='bench_', seed=42):
+    """
+    Create a synthetic exam dataset and return a SyntheticDataset.
+
+    With ``sessions_started`` the sessions are scheduled so that they are
+    currently active; otherwise they start in the future. Attempts and
+    answers are only created for started sessions, and only when
+    ``create_attempts`` is set (load tests join the sessions themselves).
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    dataset = SyntheticDataset()
+
+    dataset.teachers = _create_users(prefix, teachers, UserRoles.TEACHER)
+    dataset.students = _create_users(prefix, students_per_session * sessions_per_teacher, UserRoles.STUDENT)
+
+    for t_index, teacher in enumerate(dataset.teachers):
+        Question.objects.bulk_create([
+            Question(
+                title=f'{prefix}Q{t_index}-{q}',
+                description='Synthetic benchmark question',
+                category=f'cat{q % 10}',
+                created_by=teacher,
+                is_active=rng.random() > 0.05,
+            )
+            for q in range(questions_per_teacher)
+        ])
+        questions = list(Question.objects.filter(created_by=teacher).order_by('id'))
+        correct_labels = {}
+        choices = []
+        for question in questions:
+            correct = rng.choice(MultipleChoice.VALID_CHOICES)
+            correct_labels[question.id] = correct
+            choices.extend(
+                Choice(question=question, label=label, text=f'Option {label}', is_correct=(label == correct))
+                for label in MultipleChoice.VALID_CHOICES
+            )
+        Choice.objects.bulk_create(choices)
+
+        active_questions = [q for q in questions if q.is_active]
+        tests = []
+        for i in range(tests_per_teacher):
+            test = Test.objects.create(
+                title=f'{prefix}Test {t_index}-{i}',
+                description='Synthetic benchmark test',
+                time_limit_minutes=60,
+                created_by=teacher,
+            )
+            test.questions.set(rng.sample(active_questions, min(questions_per_test, len(active_questions))))
+            tests.append(test)
+        dataset.tests.extend(tests)
+
+        for i in range(sessions_per_teacher):
+            if sessions_started:
+                start_time = now - timezone.timedelta(minutes=5 + i)
+            else:
+                start_time = now + timezone.timedelta(days=i + 1)
+            session = TestSession.objects.create(
+                test=tests[i % len(tests)],
+                session_name=f'{prefix}Session {t_index}-{i}',
+                start_time=start_time,
+                created_by=teacher,
+            )
+            dataset.sessions.append(session)
+
+            if not (sessions_started and create_attempts):
+                continue
+
+            roster = dataset.students[i * students_per_session:(i + 1) * students_per_session]
+            StudentTestAttempt.objects.bulk_create([
+                StudentTestAttempt(student=student, test_session=session) for student in roster
+            ])
+            student_attempts = list(StudentTestAttempt.objects.filter(test_session=session))
+            test_attempts = []
+            for sta in student_attempts:
+                submitted = rng.random() < submitted_ratio
+                test_attempts.append(TestAttempt(
+                    student_test_attempt=sta,
+                    is_submitted=submitted,
+                    submitted_at=now if submitted else None,
+                    total_time_spent=rng.randint(60, 3600) if submitted else 0,
+                ))
+            TestAttempt.objects.bulk_create(test_attempts)
+            attempts = list(TestAttempt.objects.filter(student_test_attempt__test_session=session))
+            dataset.attempts.extend(attempts)
+
+            session_questions = list(session.test.questions.all())
+            answers = []
+            for attempt in attempts:
+                for question in session_questions:
+                    if rng.random() > answered_ratio:
+                        continue
+                    selected = rng.choice(MultipleChoice.VALID_CHOICES)
+                    answers.append(Answer(
+                        test_attempt=attempt,
+                        question=question,
+                        selected_choice=selected,
+                        is_correct=(selected == correct_labels[question.id]),
+                        time_spent_seconds=rng.randint(5, 120),
+                    ))
+            Answer.objects.bulk_create(answers, batch_size=5000)
+
+    return dataset
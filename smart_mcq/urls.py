@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
+from questions.views import protected_media
 
 def home_redirect(request):
     if request.user.is_authenticated:
@@ -31,5 +32,7 @@ urlpatterns = [
     path('test-sessions/', include('test_sessions.urls')),
     path('bulk/', include('bulk_operations.urls')),
     path('status/', include('server_status.urls')),
+    # Question images; access-checked, then sent by nginx (X-Accel-Redirect)
+    path('media/<path:path>', protected_media, name='protected_media'),
     path('', home_redirect, name='home'),
 ]
@@ -0,0 +1,649 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const answerRadios = document.querySelectorAll('.answer-radio');
+    const saveStatus = document.getElementById('save-feedback');
+    const progressBar = document.querySelector('.progress-bar');
+    
+    // Timer variables
+    const timerDisplay = document.getElementById('timer-display');
+    const timerText = document.getElementById('timer-text');
+    // Values rendered by the template (see #exam-config in take_test.html)
+    const examConfig = document.getElementById('exam-config').dataset;
+    const attemptId = examConfig.attemptId;
+    
+    // Simplified Timer System: Manual submission with page lock in final minute
+    // Original test end time (without compensation minute)
+    const testEndTimeOriginal = new Date(examConfig.testEndTime);
+    const serverTimeUTC = new Date(examConfig.serverTime);
+    let clientStartTime = new Date();
+    
+    // Server-provided remaining time for original test duration
+    let serverRemainingSeconds = parseInt(examConfig.remainingSeconds, 10);
+    
+    // Page lock state
+    let pageLocked = false;
+    
+    // Simple logging for debugging
+    console.log('Simplified Timer System initialized:', {
+        testEndTimeOriginal: testEndTimeOriginal.toISOString(),
+        serverTimeUTC: serverTimeUTC.toISOString(),
+        serverRemainingSeconds: serverRemainingSeconds,
+        clientStartTime: clientStartTime.toISOString()
+    });
+    
+    // Timer state management
+    const timerKey = `test_timer_${attemptId}`;
+    let timerState = JSON.parse(localStorage.getItem(timerKey) || '{}');
+    let warningShown5min = timerState.warningShown5min || false;
+    let warningShown1min = timerState.warningShown1min || false;
+    let testSubmitted = timerState.testSubmitted || false;
+    let timerInterval = null;
+    
+    // Track pending save operations to prevent race conditions
+    let pendingSaves = 0;
+    
+    // Time tracking for current question
+    let questionStartTime = Date.now();
+    let totalTestStartTime = new Date(examConfig.startedAt);
+    
+    // Handle answer selection
+    answerRadios.forEach(radio => {
+        radio.addEventListener('change', function() {
+            if (this.checked) {
+                saveAnswer(this.dataset.questionId, this.value);
+            }
+        });
+    });
+    
+    // Reset question start time when page loads (for navigation)
+    questionStartTime = Date.now();
+    
+    // Answer writes carry a sequence number that only grows for this attempt,
+    // even across page loads. A retry resends the same number, so the server
+    // can drop duplicates and writes overtaken by a newer answer.
+    const answerSeqKey = `answer_seq_${attemptId}`;
+    const SAVE_RETRIES = 5;
+    const SUBMIT_RETRIES = 8;
+    
+    function nextAnswerSeq() {
+        const last = parseInt(localStorage.getItem(answerSeqKey) || '0', 10);
+        // Date.now() keeps the sequence increasing if localStorage was cleared
+        const seq = Math.max(last + 1, Date.now());
+        localStorage.setItem(answerSeqKey, String(seq));
+        return seq;
+    }
+    
+    // Error for a response worth retrying; carries the server's Retry-After
+    // (sent with 429 when the exam endpoints are at capacity)
+    function retryableError(response) {
+        const error = new Error(`HTTP ${response.status}`);
+        const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+        if (!isNaN(retryAfter)) {
+            error.retryAfterMs = retryAfter * 1000;
+        }
+        return error;
+    }
+    
+    function retryDelay(error, attempt) {
+        if (error.retryAfterMs !== undefined) {
+            // The server already jittered this; a little more breaks remaining ties
+            return error.retryAfterMs + Math.random() * 1000;
+        }
+        // Exponential backoff with jitter so a classroom does not retry in lockstep
+        return Math.min(8000, 500 * 2 ** attempt) * (0.5 + Math.random());
+    }
+    
+    function postAnswer(payload, attempt) {
+        return fetchWithCSRFRetry(examConfig.saveUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(payload)
+        })
+        .then(response => {
+            console.log('Save response received:', response.status); // Debug log
+            if (response.status >= 500 || response.status === 429) {
+                throw retryableError(response);
+            }
+            return response.json();
+        })
+        .catch(error => {
+            if (attempt >= SAVE_RETRIES) {
+                throw error;
+            }
+            return new Promise(resolve => setTimeout(resolve, retryDelay(error, attempt)))
+                .then(() => postAnswer(payload, attempt + 1));
+        });
+    }
+    
+    function saveAnswer(questionId, selectedChoice) {
+        // Calculate time spent on this question BEFORE sending request
+        const timeSpentSeconds = Math.floor((Date.now() - questionStartTime) / 1000);
+        
+        // Track this save operation
+        pendingSaves++;
+        
+        postAnswer({
+            question_id: questionId,
+            selected_choice: selectedChoice,
+            time_spent_seconds: timeSpentSeconds,
+            seq: nextAnswerSeq()
+        }, 0)
+        .then(data => {
+            console.log('Save data:', data); // Debug log
+            if (data.success && (data.duplicate || data.stale)) {
+                // A retry of a write that already landed, or overtaken by a newer answer
+                console.log('Answer already saved'); // Debug log
+            } else if (data.success) {
+                let progressPercentage = data.progress_percentage;
+                if (data.queued) {
+                    // Write-behind mode: the server journaled the answer without
+                    // counting; this question now counts as answered
+                    const totalQuestions = parseInt(examConfig.totalQuestions, 10);
+                    const answeredQuestions = parseInt(examConfig.answeredCount, 10) +
+                        (examConfig.currentAnswered === 'true' ? 0 : 1);
+                    progressPercentage = totalQuestions > 0 ? Math.round(answeredQuestions / totalQuestions * 100) : 0;
+                }
+                
+                // Update progress bar silently (no success message)
+                progressBar.style.width = progressPercentage + '%';
+                progressBar.setAttribute('aria-valuenow', progressPercentage);
+                
+                // Update progress text
+                const progressText = document.querySelector('.col-md-4 small');
+                if (progressText) {
+                    progressText.textContent = `Progress: ${progressPercentage}%`;
+                }
+                
+                // Update current answered count for accurate modal display
+                updateAnsweredCount();
+                console.log('Answer saved successfully'); // Debug log
+            } else {
+                console.error('Save failed:', data.error); // Debug log
+                showSaveStatus('Error saving answer: ' + data.error, 'danger');
+            }
+        })
+        .catch(error => {
+            console.error('Save error:', error); // Debug log
+            showSaveStatus('Network error occurred while saving', 'warning');
+        })
+        .finally(() => {
+            // Mark this save operation as complete
+            pendingSaves--;
+            console.log('Pending saves after completion:', pendingSaves); // Debug log
+        });
+    }
+    
+    function showSaveStatus(message, type) {
+        saveStatus.className = `alert alert-${type}`;
+        saveStatus.textContent = message;
+        saveStatus.style.display = 'block';
+        
+        // Auto-hide non-error messages after 3 seconds
+        if (type !== 'danger') {
+            setTimeout(() => {
+                if (saveStatus.style.display === 'block') {
+                    saveStatus.style.display = 'none';
+                }
+            }, 3000);
+        }
+    }
+    
+    function clearSaveStatus() {
+        saveStatus.style.display = 'none';
+    }
+    
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+
+    // Simplified fetch with CSRF token
+    function fetchWithCSRFRetry(url, options = {}) {
+        const csrfToken = getCookie('csrftoken');
+        
+        const fetchOptions = {
+            ...options,
+            headers: {
+                ...options.headers,
+                'X-CSRFToken': csrfToken
+            }
+        };
+        
+        return fetch(url, fetchOptions);
+    }
+    
+    
+    // v1.5.2: Display-only timer with server-authoritative validation
+    // Simplified timer with page lock mechanism
+    function updateTimer() {
+        if (testSubmitted) {
+            return;
+        }
+        
+        // Calculate elapsed time since page load
+        const elapsedSeconds = Math.floor((new Date() - clientStartTime) / 1000);
+        
+        // Calculate remaining time based on original test duration
+        const remainingSeconds = Math.max(0, serverRemainingSeconds - elapsedSeconds);
+        
+        // Calculate minutes and seconds for display
+        const minutes = Math.floor(remainingSeconds / 60);
+        const seconds = remainingSeconds % 60;
+        
+        // Format timer display
+        const formattedTime = `${minutes.toString().padStart(2, '0')}:${seconds.toString().padStart(2, '0')}`;
+        timerText.textContent = formattedTime;
+        
+        // Update timer appearance
+        timerDisplay.className = 'timer-display';
+        if (remainingSeconds <= 60) {
+            timerDisplay.classList.add('danger');
+        } else if (remainingSeconds <= 300) {
+            timerDisplay.classList.add('warning');
+        }
+        
+        // PAGE LOCK MECHANISM: Lock page in final minute
+        if (remainingSeconds <= 60 && !pageLocked) {
+            lockPageForFinalMinute();
+        }
+        
+        // Show warning alerts
+        if (remainingSeconds <= 300 && remainingSeconds > 295 && !warningShown5min) {
+            showWarningAlert('5 minutes remaining!', 'warning');
+            warningShown5min = true;
+            saveTimerState();
+        }
+        
+        if (remainingSeconds <= 60 && remainingSeconds > 55 && !warningShown1min) {
+            showWarningAlert('Final minute! Please submit your test now.', 'danger');
+            warningShown1min = true;
+            saveTimerState();
+        }
+        
+        // When time reaches zero, show time up message
+        if (remainingSeconds === 0) {
+            timerText.textContent = 'TIME UP';
+            showTimeUpMessage();
+        }
+    }
+    
+    // Lock page functionality - disable everything except submit button
+    function lockPageForFinalMinute() {
+        if (pageLocked) return;
+        
+        pageLocked = true;
+        console.log('Page locked for final minute - manual submission required');
+        
+        // Disable all navigation and form elements EXCEPT submit button
+        const allInputs = document.querySelectorAll('input[type="radio"], button');
+        allInputs.forEach(input => {
+            if (input.id !== 'submit-test-btn' && input.id !== 'confirm-submit-btn') {
+                input.disabled = true;
+            }
+        });
+        
+        // Add visual overlay to indicate page is locked
+        const overlay = document.createElement('div');
+        overlay.id = 'page-lock-overlay';
+        overlay.innerHTML = `
+            <div class="lock-message">
+                <h4><i class="fas fa-lock"></i> Final Minute</h4>
+                <p>Navigation is now locked. Please submit your test using the green Submit button.</p>
+                <p>You have 1 minute remaining to submit manually.</p>
+            </div>
+        `;
+        document.body.appendChild(overlay);
+        
+        // Highlight submit button
+        const submitBtn = document.getElementById('submit-test-btn');
+        if (submitBtn) {
+            submitBtn.classList.add('btn-pulse');
+            submitBtn.innerHTML = '<i class="fas fa-paper-plane"></i> SUBMIT NOW - 1 Minute Left';
+        }
+    }
+    
+    function showTimeUpMessage() {
+        // Show time up alert
+        showWarningAlert('Time is up! You must submit your test now.', 'danger');
+        
+        // Disable ALL navigation and form elements
+        const allInputs = document.querySelectorAll('input[type="radio"], button:not(#submit-test-btn):not(#confirm-submit-btn)');
+        allInputs.forEach(input => {
+            input.disabled = true;
+        });
+        
+        // Create "End Test Now" overlay
+        const timeUpOverlay = document.createElement('div');
+        timeUpOverlay.id = 'time-up-overlay';
+        timeUpOverlay.innerHTML = `
+            <div class="time-up-message">
+                <h2><i class="fas fa-exclamation-triangle"></i> TIME UP!</h2>
+                <p>Your test time has expired. You must submit your test immediately.</p>
+                <p>No further changes to answers are allowed.</p>
+                <button type="button" class="btn btn-danger btn-lg btn-pulse" id="end-test-now-btn">
+                    <i class="fas fa-paper-plane"></i> END TEST NOW
+                </button>
+            </div>
+        `;
+        document.body.appendChild(timeUpOverlay);
+        
+        // Add click handler for the "End Test Now" button
+        document.getElementById('end-test-now-btn').addEventListener('click', function() {
+            confirmSubmission();
+        });
+        
+        // Also update the original submit button as backup
+        const submitBtn = document.getElementById('submit-test-btn');
+        if (submitBtn) {
+            submitBtn.innerHTML = '<i class="fas fa-exclamation-triangle"></i> END TEST NOW';
+            submitBtn.classList.add('btn-pulse');
+            submitBtn.classList.remove('btn-success');
+            submitBtn.classList.add('btn-danger');
+        }
+    }
+    
+    function saveTimerState() {
+        const state = {
+            warningShown5min: warningShown5min,
+            warningShown1min: warningShown1min,
+            testSubmitted: testSubmitted,
+            lastUpdated: new Date().getTime()
+        };
+        localStorage.setItem(timerKey, JSON.stringify(state));
+    }
+    
+    function showWarningAlert(message, type) {
+        // Remove existing alerts
+        const existingAlert = document.querySelector('.timer-warning-alert');
+        if (existingAlert) {
+            existingAlert.remove();
+        }
+        
+        // Create new alert with close button
+        const alert = document.createElement('div');
+        alert.className = `alert alert-${type} alert-dismissible timer-warning-alert`;
+        alert.innerHTML = `
+            <div class="d-flex align-items-center">
+                <div class="flex-grow-1">
+                    <strong><i class="fas fa-clock"></i> Time Warning</strong><br>
+                    <small>${message}</small>
+                </div>
+                <button type="button" class="btn-close btn-close-white ms-2" aria-label="Close"></button>
+            </div>
+        `;
+        
+        document.body.appendChild(alert);
+        
+        // Add close button functionality
+        const closeBtn = alert.querySelector('.btn-close');
+        closeBtn.addEventListener('click', () => {
+            alert.remove();
+        });
+        
+        // Auto-hide after 8 seconds (longer for readability)
+        setTimeout(() => {
+            if (alert.parentNode) {
+                alert.remove();
+            }
+        }, 8000);
+    }
+    
+    // No auto-submit functions needed - manual submission with page lock only
+    
+    // Testing function to simulate timer end (for development/testing only)
+    window.testTimerEnd = function() {
+        console.log('Testing timer end functionality...');
+        timerText.textContent = 'TIME UP';
+        showTimeUpMessage();
+    };
+    
+    // Testing function to show warning messages (for development/testing only)
+    window.testWarning5min = function() {
+        console.log('Testing 5-minute warning...');
+        showWarningAlert('5 minutes remaining!', 'warning');
+    };
+    
+    window.testWarning1min = function() {
+        console.log('Testing 1-minute warning...');
+        showWarningAlert('Final minute! Please submit your test now.', 'danger');
+    };
+    
+    // Start timer
+    updateTimer();
+    timerInterval = setInterval(updateTimer, 1000);
+    
+    // Re-anchor the display timer on the server clock, e.g. after the laptop slept
+    function syncClock() {
+        if (testSubmitted) return;
+        fetch(examConfig.clockUrl, {credentials: 'same-origin'})
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) return;
+                serverRemainingSeconds = data.remaining_seconds;
+                clientStartTime = new Date();
+                updateTimer();
+            })
+            .catch(() => {});
+    }
+    setInterval(syncClock, 60000);
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') syncClock();
+    });
+    
+    // v1.5.2: Server-authoritative approach eliminates need for client time sync
+    // Note: Time validation is now handled entirely by server
+    // Client timer is display-only and does not control auto-submit timing
+    console.log('v1.5.2: Using server-authoritative timing - no client time sync needed');
+
+    
+    // Submit test functionality
+    const submitBtn = document.getElementById('submit-test-btn');
+    submitBtn.addEventListener('click', function() {
+        if (testSubmitted) return;
+        
+        console.log('Submit button clicked, pending saves:', pendingSaves); // Debug log
+        
+        // Check if there are pending save operations
+        if (pendingSaves > 0) {
+            console.log('Waiting for pending saves...'); // Debug log
+            showSaveStatus('Saving your last answer... Please wait.', 'info');
+            // Wait for saves to complete, then show modal
+            waitForPendingSaves().then(() => {
+                console.log('Saves completed, showing modal'); // Debug log
+                // Hide the save status message
+                clearSaveStatus();
+                showSubmissionModal();
+            });
+        } else {
+            console.log('No pending saves, showing modal immediately'); // Debug log
+            // Show submission confirmation modal immediately
+            showSubmissionModal();
+        }
+    });
+    
+    // Add event listener for modal submit button
+    document.getElementById('confirm-submit-btn').addEventListener('click', confirmSubmission);
+    
+    // Auto-focus on first radio button for better UX
+    const firstRadio = document.querySelector('.answer-radio');
+    if (firstRadio && !document.querySelector('.answer-radio:checked')) {
+        firstRadio.focus();
+    }
+    
+    // Function to update current answered count
+    function updateAnsweredCount() {
+        // Count currently checked radio buttons across all questions
+        const checkedAnswers = document.querySelectorAll('.answer-radio:checked');
+        const currentPageAnswered = checkedAnswers.length;
+        
+        // Since we're using single-question navigation, we need to use
+        // a more accurate count that accounts for saved answers
+        // For now, increment from initial count based on current page state
+        if (currentPageAnswered > 0) {
+            // This question is answered, so ensure our count reflects it
+            const currentQuestionId = document.querySelector('.answer-radio').dataset.questionId;
+            // We'll fetch the accurate count when showing the modal
+        }
+    }
+    
+    // Function to wait for all pending saves to complete
+    function waitForPendingSaves() {
+        return new Promise((resolve) => {
+            let timeout = 0;
+            const checkPending = () => {
+                console.log(`Checking pending saves: ${pendingSaves}, timeout: ${timeout}`); // Debug log
+                if (pendingSaves === 0) {
+                    console.log('All saves completed'); // Debug log
+                    resolve();
+                } else if (timeout > 50) { // Max 5 seconds wait (50 * 100ms)
+                    console.log('Timeout waiting for saves, proceeding anyway'); // Debug log
+                    pendingSaves = 0; // Reset to prevent infinite loop
+                    resolve();
+                } else {
+                    timeout++;
+                    setTimeout(checkPending, 100); // Check every 100ms
+                }
+            };
+            checkPending();
+        });
+    }
+    
+    // Submission modal functionality
+    function showSubmissionModal() {
+        // Fetch current answered count from server to ensure accuracy
+        fetchWithCSRFRetry(examConfig.saveUrl, {
+            method: 'GET'
+        })
+        .then(response => response.json())
+        .then(data => {
+            const totalQuestions = parseInt(examConfig.totalQuestions, 10);
+            const answeredQuestions = data.answered_count || parseInt(examConfig.answeredCount, 10);
+            const unansweredQuestions = totalQuestions - answeredQuestions;
+            
+            // Update modal content with accurate counts
+            document.getElementById('answered-count').textContent = answeredQuestions;
+            document.getElementById('total-count').textContent = totalQuestions;
+            document.getElementById('unanswered-count').textContent = unansweredQuestions;
+            
+            // Show/hide unanswered warning
+            const unansweredWarning = document.getElementById('unanswered-warning');
+            if (unansweredQuestions > 0) {
+                unansweredWarning.style.display = 'block';
+            } else {
+                unansweredWarning.style.display = 'none';
+            }
+            
+            // Show modal
+            const modal = new bootstrap.Modal(document.getElementById('submission-modal'));
+            modal.show();
+        })
+        .catch(error => {
+            console.error('Error fetching answer count:', error);
+            // Fallback to original behavior if fetch fails
+            const totalQuestions = parseInt(examConfig.totalQuestions, 10);
+            const answeredQuestions = parseInt(examConfig.answeredCount, 10);
+            const unansweredQuestions = totalQuestions - answeredQuestions;
+            
+            document.getElementById('answered-count').textContent = answeredQuestions;
+            document.getElementById('total-count').textContent = totalQuestions;
+            document.getElementById('unanswered-count').textContent = unansweredQuestions;
+            
+            const unansweredWarning = document.getElementById('unanswered-warning');
+            if (unansweredQuestions > 0) {
+                unansweredWarning.style.display = 'block';
+            } else {
+                unansweredWarning.style.display = 'none';
+            }
+            
+            const modal = new bootstrap.Modal(document.getElementById('submission-modal'));
+            modal.show();
+        });
+    }
+    
+    function confirmSubmission() {
+        console.log('confirmSubmission called'); // Debug log
+        if (testSubmitted) return;
+        
+        // Final check for pending saves before submission
+        if (pendingSaves > 0) {
+            console.log('Waiting for pending saves to complete...');
+            showSaveStatus('Finalizing your answers...', 'info');
+            
+            waitForPendingSaves().then(() => {
+                proceedWithSubmission();
+            });
+        } else {
+            proceedWithSubmission();
+        }
+    }
+    
+    function proceedWithSubmission() {
+        testSubmitted = true;
+        
+        // CRITICAL FIX: Properly clear timer interval
+        if (timerInterval) {
+            clearInterval(timerInterval);
+            timerInterval = null;
+        }
+        
+        saveTimerState();
+        
+        // Clear timer state from localStorage
+        localStorage.removeItem(timerKey);
+        
+        // Hide modal
+        const modalElement = document.getElementById('submission-modal');
+        const modal = bootstrap.Modal.getInstance(modalElement) || new bootstrap.Modal(modalElement);
+        modal.hide();
+        
+        postSubmission(0);
+    }
+    
+    // Submit over fetch so a busy server (429) or a dropped request is retried
+    // after Retry-After instead of leaving the student on an error page
+    function postSubmission(attempt) {
+        const form = document.getElementById('submission-form');
+        fetchWithCSRFRetry(form.action, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({})
+        })
+        .then(response => {
+            if (response.status >= 500 || response.status === 429) {
+                throw retryableError(response);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                window.location.href = data.redirect_url;
+            } else {
+                // Already submitted, session closed...: the form post shows the message
+                form.submit();
+            }
+        })
+        .catch(error => {
+            if (attempt >= SUBMIT_RETRIES) {
+                form.submit();
+                return;
+            }
+            const delay = retryDelay(error, attempt);
+            showSaveStatus(`Server busy, retrying your submission in ${Math.ceil(delay / 1000)}s...`, 'info');
+            setTimeout(() => postSubmission(attempt + 1), delay);
+        });
+    }
+});
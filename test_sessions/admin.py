@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TestSession, StudentTestAttempt, TestAttempt, Answer
+from .models import TestSession, StudentTestAttempt, TestAttempt, Answer, AnswerSheet, PackedAnswer
 
 
 @admin.register(TestSession)
@@ -61,7 +61,7 @@ class StudentTestAttemptAdmin(admin.ModelAdmin):
 @admin.register(TestAttempt)
 class TestAttemptAdmin(admin.ModelAdmin):
     list_display = ['student', 'test_session', 'current_question_index', 'progress_percentage', 'started_at', 'is_submitted']
-    list_filter = ['is_submitted', 'started_at']
+    list_filter = ['is_submitted', 'started_at', 'answer_storage']
     search_fields = ['student_test_attempt__student__username', 'student_test_attempt__test_session__test__title']
     readonly_fields = ['started_at', 'submitted_at', 'progress_percentage']
     
@@ -98,3 +98,49 @@ class AnswerAdmin(admin.ModelAdmin):
             return qs
         # For teachers, show answers for their test sessions
         return qs.filter(test_attempt__student_test_attempt__test_session__created_by=request.user)
+
+
+@admin.register(AnswerSheet)
+class AnswerSheetAdmin(admin.ModelAdmin):
+    list_display = ['test_attempt', 'answered_count', 'updated_at']
+    search_fields = ['test_attempt__student_test_attempt__student__username']
+    # Written slot by slot by the exam; edits would bypass the sequence checks
+    readonly_fields = ['test_attempt', 'question_ids', 'choices', 'time_spent', 'client_seqs', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if request.user.is_superuser:
+            return qs
+        return qs.filter(test_attempt__student_test_attempt__test_session__created_by=request.user)
+
+
+@admin.register(PackedAnswer)
+class PackedAnswerAdmin(admin.ModelAdmin):
+    """Answers of sheet attempts, listed like Answer (read-only database view)"""
+    list_display = ['student', 'question_title', 'selected_choice', 'is_correct', 'answered_at']
+    list_filter = ['is_correct', 'selected_choice']
+    search_fields = ['test_attempt__student_test_attempt__student__username', 'question__title']
+    
+    def student(self, obj):
+        return obj.test_attempt.student.username
+    
+    def question_title(self, obj):
+        return obj.question.title
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if request.user.is_superuser:
+            return qs
+        return qs.filter(test_attempt__student_test_attempt__test_session__created_by=request.user)
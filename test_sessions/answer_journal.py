@@ -0,0 +1,326 @@
+"""
+Write-behind answer journal (``ANSWER_WRITE_BEHIND=true``).
+
+At exam start and end every student saves at once, and each save used to
+be a synchronous write to ``Answer``. In write-behind mode a save appends
+one JSON line to a local journal segment and is acknowledged once that line
+is on disk. Concurrent saves share one ``fsync`` (group commit). A flusher
+thread in each process then switches to a new segment every
+``AnswerWriteConfig.JOURNAL_FLUSH_INTERVAL`` seconds and merges the closed
+one into ``Answer`` with a single conditional upsert. The segment is deleted
+only after that commits.
+
+Merges keep the rules of ``test_sessions.answers``: a row is only
+replaced by a write with a sequence at least as high, so replaying a
+segment twice, or segments of several workers in any order, is harmless,
+and records of an attempt that is already submitted are dropped.
+That lets ``flush_attempt`` merge one attempt's pending records ahead of
+the flusher. Each process indexes its unmerged records by attempt, so
+pages that show an attempt's own answers merge that attempt's local
+records without touching the disk; records saved through other workers
+reach ``Answer`` within the flush interval. Only scoring also reads the
+other processes' segments, skipping lines of other attempts unparsed.
+
+Each live process holds an exclusive ``flock`` on its segments. Segments
+whose lock can be taken belong to a process that died; live flushers and
+``manage.py flush_answer_journal`` merge them.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from questions.models import Choice
+from smart_mcq.constants import AnswerWriteConfig
+from . import answers
+from .models import Answer
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = 'answers-*.jsonl'
+
+
+def write_behind_enabled():
+    return getattr(settings, 'ANSWER_WRITE_BEHIND', False)
+
+
+class _Segment:
+    """One append-only journal file owned by this process"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        name = f'answers-{os.getpid()}-{time.time_ns()}-{uuid.uuid4().hex[:6]}.jsonl'
+        self.path = os.path.join(directory, name)
+        # Locked under a name recover_orphans does not match, then renamed:
+        # an unlocked segment would look like a dead process's and be merged
+        # and unlinked while this process still appends to it
+        creating = os.path.join(directory, f'.tmp-{name}')
+        self.fd = os.open(creating, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        os.rename(creating, self.path)
+        self.written = 0
+        self.synced = 0
+        self.records = []
+        self.by_attempt = {}  # attempt id -> its records, for flush_attempt
+        self.sync_lock = threading.Lock()
+
+    def discard(self):
+        """Delete the segment once its records are merged"""
+        with self.sync_lock:
+            # Saves still waiting for an fsync of this segment are in Answer now
+            self.synced = self.written
+            os.unlink(self.path)
+            os.close(self.fd)
+
+
+class AnswerJournal:
+    """Per-process journal writer and flusher"""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._unmerged = []  # closed segments whose merge failed; retried
+        self._merging = []   # closed segments the flusher is merging now
+        self._pid = None
+        self._stop = threading.Event()
+
+    def _start(self):
+        # Called with self._lock held. Threads and flocks do not survive fork:
+        # every gunicorn worker starts its own segment and flusher
+        if self._pid == os.getpid():
+            return
+        self._segment = _Segment(self.directory)
+        self._unmerged = []
+        self._merging = []
+        self._stop = threading.Event()
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='answer-journal', daemon=True).start()
+
+    def append(self, record):
+        """Write ``record`` to the journal and return once it is on disk"""
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        with self._lock:
+            self._start()
+            segment = self._segment
+            os.write(segment.fd, line)
+            segment.written += 1
+            segment.records.append(record)
+            segment.by_attempt.setdefault(record['attempt_id'], []).append(record)
+            position = segment.written
+        self._sync(segment, position)
+
+    def _sync(self, segment, position):
+        # Group commit: whoever gets the lock first fsyncs every line written
+        # so far; the saves that queued behind it then find their line synced
+        with segment.sync_lock:
+            if segment.synced >= position:
+                return
+            written = segment.written
+            os.fsync(segment.fd)
+            segment.synced = written
+
+    def _run(self):
+        last_orphan_check = 0
+        while not self._stop.wait(AnswerWriteConfig.JOURNAL_FLUSH_INTERVAL):
+            close_old_connections()
+            try:
+                self.flush()
+                if time.monotonic() - last_orphan_check >= AnswerWriteConfig.JOURNAL_ORPHAN_CHECK_INTERVAL:
+                    last_orphan_check = time.monotonic()
+                    recover_orphans(self.directory)
+            except Exception:
+                logger.exception('Merging the answer journal failed; will retry')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Switch to a new segment and merge the closed ones into Answer"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            if self._segment.written:
+                self._unmerged.append(self._segment)
+                self._segment = _Segment(self.directory)
+            closed, self._unmerged = self._unmerged, []
+            self._merging = closed
+        try:
+            for index, segment in enumerate(closed):
+                try:
+                    merge_records(segment.records)
+                except Exception:
+                    with self._lock:
+                        self._unmerged[:0] = closed[index:]
+                    raise
+                segment.discard()
+        finally:
+            with self._lock:
+                self._merging = []
+
+    def pending(self, attempt_id):
+        """This process's records of ``attempt_id`` that may not be in Answer yet"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return [], set()
+            segments = self._merging + self._unmerged + [self._segment]
+            records = [record for segment in segments for record in segment.by_attempt.get(attempt_id, ())]
+            return records, {segment.path for segment in segments}
+
+    def close(self):
+        """Merge what is left before the process exits"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            # The segments stay on disk and are recovered by another process
+            logger.exception('Could not merge the answer journal at exit')
+
+
+def merge_records(records):
+    """
+    Upsert journal records into Answer, keeping the newest write per
+    question. Records of submitted attempts are dropped.
+    """
+    latest = {}
+    for record in records:
+        key = (record['attempt_id'], record['question_id'])
+        if key not in latest or record['seq'] >= latest[key]['seq']:
+            latest[key] = record
+    if not latest:
+        return 0
+
+    question_ids = {question_id for _, question_id in latest}
+    correct_labels = dict(
+        Choice.objects.filter(question_id__in=question_ids, is_correct=True).values_list('question_id', 'label')
+    )
+    table = connection.ops.quote_name(Answer._meta.db_table)
+    # The WHERE clause keeps a row that already holds a newer write
+    sql = (
+        f'INSERT INTO {table} (test_attempt_id, question_id, selected_choice, is_correct, '
+        f'answered_at, time_spent_seconds, client_seq) VALUES (%s, %s, %s, %s, %s, %s, %s) '
+        f'ON CONFLICT (test_attempt_id, question_id) DO UPDATE SET '
+        f'selected_choice = EXCLUDED.selected_choice, is_correct = EXCLUDED.is_correct, '
+        f'answered_at = EXCLUDED.answered_at, time_spent_seconds = EXCLUDED.time_spent_seconds, '
+        f'client_seq = EXCLUDED.client_seq '
+        f'WHERE {table}.client_seq <= EXCLUDED.client_seq'
+    )
+    with transaction.atomic():
+        # Locks the attempts like answers.write_answer: submitted ones keep
+        # the answers they were scored on
+        open_ids = answers.open_attempts({attempt_id for attempt_id, _ in latest})
+        rows = [
+            (
+                record['attempt_id'],
+                record['question_id'],
+                record['choice'],
+                correct_labels.get(record['question_id']) == record['choice'],
+                connection.ops.adapt_datetimefield_value(datetime.fromisoformat(record['at'])),
+                record['time_spent'],
+                record['seq'],
+            )
+            for record in latest.values()
+            if record['attempt_id'] in open_ids
+        ]
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+    return len(rows)
+
+
+def _read_segment(path):
+    records = []
+    try:
+        with open(path, 'rb') as segment:
+            for line in segment:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash was never acknowledged
+                    continue
+    except FileNotFoundError:
+        # Deleted after its merge committed
+        pass
+    return records
+
+
+def _read_attempt_records(path, attempt_id):
+    # Records are written with attempt_id first, so other attempts' lines are skipped unparsed
+    prefix = b'{"attempt_id":%d,' % attempt_id
+    records = []
+    try:
+        with open(path, 'rb') as segment:
+            for line in segment:
+                if not line.startswith(prefix):
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def flush_attempt(attempt_id, other_processes=False):
+    """
+    Merge this process's pending writes of ``attempt_id`` before it is read.
+    With ``other_processes`` (scoring) the segments of other processes are
+    read for the attempt's records too, instead of waiting for their flushers.
+    """
+    records, own_paths = journal.pending(attempt_id)
+    if other_processes:
+        directory = str(settings.ANSWER_JOURNAL_DIR)
+        for path in glob.glob(os.path.join(directory, SEGMENT_PATTERN)):
+            if path not in own_paths:
+                records.extend(_read_attempt_records(path, attempt_id))
+    return merge_records(records)
+
+
+def recover_orphans(directory):
+    """Merge and delete segments left behind by processes that exited without merging"""
+    if fcntl is None:
+        return 0
+    recovered = 0
+    for path in glob.glob(os.path.join(str(directory), SEGMENT_PATTERN)):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Owned by a live process (this one included: flock locks
+                # conflict between separately opened descriptors)
+                continue
+            recovered += merge_records(_read_segment(path))
+            os.unlink(path)
+        finally:
+            os.close(fd)
+    return recovered
+
+
+journal = AnswerJournal(getattr(settings, 'ANSWER_JOURNAL_DIR', 'journal'))
+
+
+@atexit.register
+def _close_journal():
+    journal.close()
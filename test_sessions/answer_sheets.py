@@ -0,0 +1,119 @@
+"""
+Packed answer sheets (``ANSWER_STORAGE=sheet``, PostgreSQL).
+
+With row storage a 100-question exam taken by 1000 students leaves 100k
+``Answer`` rows, each with its own index entries, and scoring counts them
+per attempt. A sheet keeps an attempt's answers in one row instead: a
+fixed-width string with one choice character per question, next to
+``smallint[]`` time spent and ``bigint[]`` client sequence numbers
+(``AnswerSheet``). A save rewrites its slot in place with one UPDATE and
+keeps the ordering rules of ``test_sessions.answers``.
+
+Grading compares the choice string with the answer key of the same
+question order, character by character. Pages that read answers as rows
+use ``TestAttempt.answer_rows``, which serves sheet attempts from the
+``PackedAnswer`` view.
+"""
+
+import operator
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from questions.models import Choice
+from smart_mcq.constants import AnswerStorage
+from .models import AnswerSheet
+
+# Slot = position of the question in the sheet (1-based, like PostgreSQL arrays).
+# The WHERE clause keeps a slot that already holds a newer write.
+_WRITE_SLOT = """
+    UPDATE test_sessions_answersheet
+    SET choices = overlay(choices placing %(choice)s from array_position(question_ids, %(question_id)s) for 1),
+        time_spent[array_position(question_ids, %(question_id)s)] = %(time_spent)s,
+        client_seqs[array_position(question_ids, %(question_id)s)] = %(seq)s,
+        updated_at = %(now)s
+    WHERE test_attempt_id = %(attempt_id)s
+      AND %(question_id)s = ANY(question_ids)
+      AND (%(unordered)s OR client_seqs[array_position(question_ids, %(question_id)s)] < %(seq)s)
+"""
+
+# A question added to the test after the sheet was created gets a blank slot
+_ADD_SLOT = """
+    UPDATE test_sessions_answersheet
+    SET question_ids = array_append(question_ids, %(question_id)s),
+        choices = choices || %(blank)s,
+        time_spent = array_append(time_spent, 0::smallint),
+        client_seqs = array_append(client_seqs, 0::bigint)
+    WHERE test_attempt_id = %(attempt_id)s
+      AND NOT (%(question_id)s = ANY(question_ids))
+"""
+
+
+def create_sheet(test_attempt):
+    """Blank sheet with one slot per question of the attempt's test"""
+    question_ids = sorted(test_attempt.questions.values_list('id', flat=True))
+    sheet, _ = AnswerSheet.objects.get_or_create(
+        test_attempt=test_attempt,
+        defaults={
+            'question_ids': question_ids,
+            'choices': AnswerStorage.BLANK * len(question_ids),
+            'time_spent': [0] * len(question_ids),
+            'client_seqs': [0] * len(question_ids),
+        },
+    )
+    return sheet
+
+
+def write_answer(test_attempt, question_id, selected_choice, time_spent_seconds, seq=None):
+    """
+    Store the answer in its slot unless the slot holds a write with a
+    sequence of at least ``seq``. Returns whether it was stored.
+    """
+    params = {
+        'attempt_id': test_attempt.id,
+        'question_id': question_id,
+        'choice': selected_choice,
+        'time_spent': time_spent_seconds,
+        'seq': seq or 0,
+        'unordered': not seq,
+        'now': timezone.now(),
+        'blank': AnswerStorage.BLANK,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(_WRITE_SLOT, params)
+        if cursor.rowcount:
+            return True
+        # Nothing written: a newer write is stored, or the slot (or sheet) is missing
+        with transaction.atomic():
+            create_sheet(test_attempt)
+            cursor.execute(_ADD_SLOT, params)
+            cursor.execute(_WRITE_SLOT, params)
+            return bool(cursor.rowcount)
+
+
+def answer_key(question_ids):
+    """Correct labels aligned with ``question_ids``; '?' never matches an answer"""
+    labels = dict(
+        Choice.objects.filter(question_id__in=question_ids, is_correct=True).values_list('question_id', 'label')
+    )
+    return ''.join(labels.get(question_id, '?') for question_id in question_ids)
+
+
+def grade(sheet, key=None):
+    """Number of correct answers on ``sheet``; pass ``key`` when grading many sheets of one test"""
+    if key is None:
+        key = answer_key(sheet.question_ids)
+    # Blanks never equal a label, so one comparison pass counts the correct answers
+    return sum(map(operator.eq, sheet.choices, key))
+
+
+def grade_many(sheets):
+    """Correct-answer counts by attempt id, building each distinct answer key once"""
+    keys = {}
+    scores = {}
+    for sheet in sheets:
+        question_ids = tuple(sheet.question_ids)
+        if question_ids not in keys:
+            keys[question_ids] = answer_key(question_ids)
+        scores[sheet.test_attempt_id] = grade(sheet, keys[question_ids])
+    return scores
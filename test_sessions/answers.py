@@ -0,0 +1,136 @@
+"""
+Answer write path for the exam page.
+
+The exam page numbers its answer writes with a per-attempt sequence that
+only grows (``seq``) and resends the same number when it retries. The pair
+(question, seq) is therefore the write's idempotency key: a retry of a
+write that already landed, or an older write overtaken by a newer answer
+to the same question, must not change the stored answer.
+
+Two layers enforce that:
+
+* a compact high-water mark per attempt in the cache, ``{question_id: seq}``,
+  answers duplicates and stale retries before any database query;
+* the write itself is a conditional UPDATE (``client_seq < seq``), so the
+  database stays correct when the cache entry is missing, evicted, or lives
+  in another worker process.
+
+Attempts with packed answer sheets (``TestAttempt.answer_storage``) apply
+the same condition per slot (see test_sessions.answer_sheets).
+
+Writes lock the attempt row (``open_attempts``) and are refused once it is
+submitted, so a save racing the submit either lands before the score is
+computed or not at all.
+"""
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from smart_mcq.constants import AnswerStorage, AnswerWriteConfig, CacheKeys
+from . import answer_sheets
+from .models import Answer, AnswerSheet, TestAttempt
+
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+STALE = 'stale'
+SUBMITTED = 'submitted'
+
+
+def _sequences_key(user_id, attempt_id):
+    # The user id keeps another user's requests from reading this attempt's entry
+    return CacheKeys.ANSWER_SEQUENCES.format(attempt_id=attempt_id, user_id=user_id)
+
+
+def check_sequence(user_id, attempt_id, question_id, seq):
+    """DUPLICATE or STALE if the cache already saw ``seq`` or a later write for the question, else None"""
+    last = cache.get(_sequences_key(user_id, attempt_id), {}).get(str(question_id), 0)
+    if seq < last:
+        return STALE
+    if seq == last:
+        return DUPLICATE
+    return None
+
+
+def record_sequence(user_id, attempt_id, question_id, seq):
+    key = _sequences_key(user_id, attempt_id)
+    sequences = cache.get(key, {})
+    # Read-modify-write races between threads can only lower the mark, which
+    # sends a later duplicate to the database check instead of rejecting it here
+    if seq > sequences.get(str(question_id), 0):
+        sequences[str(question_id)] = seq
+        cache.set(key, sequences, AnswerWriteConfig.SEQUENCE_TIMEOUT)
+
+
+def write_answer(test_attempt, question, selected_choice, time_spent_seconds, seq=None):
+    """
+    Store the answer unless a write with a sequence of at least ``seq`` is
+    already stored. Returns (APPLIED or STALE, is_correct of the stored
+    answer), or (SUBMITTED, None) once the attempt is submitted.
+    Without ``seq`` (older clients) the write always applies.
+    """
+    correct_choice = question.choices.filter(is_correct=True).first()
+    is_correct = correct_choice is not None and selected_choice == correct_choice.label
+    with transaction.atomic():
+        # Holds submit_attempt's UPDATE until this write commits, so the
+        # submitted score includes it, or refuses it once submitted
+        if not open_attempts([test_attempt.id]):
+            return SUBMITTED, None
+        if test_attempt.answer_storage == AnswerStorage.SHEET:
+            if answer_sheets.write_answer(test_attempt, question.id, selected_choice, time_spent_seconds, seq):
+                return APPLIED, is_correct
+            return STALE, None
+        return _write_row(test_attempt, question, selected_choice, time_spent_seconds, seq, is_correct)
+
+
+def open_attempts(attempt_ids):
+    """
+    The ids among ``attempt_ids`` not submitted yet, locked until the
+    transaction ends. Call inside ``transaction.atomic()``.
+    """
+    return set(
+        TestAttempt.objects.select_for_update(no_key=True)
+        .filter(id__in=attempt_ids, is_submitted=False)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def _write_row(test_attempt, question, selected_choice, time_spent_seconds, seq, is_correct):
+    fields = {
+        'selected_choice': selected_choice,
+        'time_spent_seconds': time_spent_seconds,
+        'is_correct': is_correct,
+        'client_seq': seq or 0,
+        'answered_at': timezone.now(),
+    }
+    existing = Answer.objects.filter(test_attempt=test_attempt, question=question)
+    newer_than_stored = existing.filter(client_seq__lt=seq) if seq else existing
+
+    if newer_than_stored.update(**fields):
+        return APPLIED, is_correct
+    try:
+        # bulk_create skips Answer.save(), which would look up the correct choice again
+        with transaction.atomic():
+            Answer.objects.bulk_create([Answer(test_attempt=test_attempt, question=question, **fields)])
+        return APPLIED, is_correct
+    except IntegrityError:
+        # The row exists: a concurrent first write created it, or it holds a newer answer
+        if newer_than_stored.update(**fields):
+            return APPLIED, is_correct
+        return STALE, existing.values_list('is_correct', flat=True).first()
+
+
+def attempt_totals(test_attempt):
+    """(correct answers, seconds spent on questions) for scoring an attempt"""
+    if test_attempt.answer_storage == AnswerStorage.SHEET:
+        sheet = AnswerSheet.objects.filter(test_attempt=test_attempt).first()
+        if sheet is None:
+            return 0, 0
+        return answer_sheets.grade(sheet), sum(sheet.time_spent)
+    totals = test_attempt.answers.aggregate(
+        correct=Count('id', filter=Q(is_correct=True)),
+        time_spent=Sum('time_spent_seconds'),
+    )
+    return totals['correct'], totals['time_spent'] or 0
@@ -0,0 +1,528 @@
+"""
+Live exam streams: the teacher monitor and the students' "session started" wait.
+
+One ``SessionMonitor`` thread per watched TestSession (per process) polls
+for TestAttempt / Answer rows changed since its cursor,
+folds them into an in-memory view of the session and fans the resulting
+deltas out to every subscribed teacher stream. Teachers watching the same
+session therefore share one cheap producer instead of each polling full pages.
+
+Students waiting for an upcoming session hold an idle stream backed by one
+``SessionWatchBoard`` thread per process, which re-reads the few watched
+TestSession rows in a single query and wakes the waiters when one changes.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from itertools import chain
+
+from django.db import connection
+from django.utils import timezone
+
+from smart_mcq.constants import AnswerStorage, LiveMonitorConfig, MultipleChoice, SessionWaitConfig
+from .models import Answer, PackedAnswer, TestAttempt, TestSession
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One teacher stream; receives delta events through a bounded queue"""
+
+    # Queued in place of dropped deltas to tell the stream to send a snapshot
+    RESYNC = None
+    # Queued when the worker shuts down to tell the stream to finish
+    CLOSE = 'close'
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=LiveMonitorConfig.SUBSCRIBER_QUEUE_SIZE)
+        self._waker = None  # (loop, asyncio.Event) while an async stream waits
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Slow client: drop queued deltas and resync with a fresh snapshot
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait(self.CLOSE if event is self.CLOSE else self.RESYNC)
+        self._wake()
+
+    def _wake(self):
+        waker = self._waker
+        if waker is not None:
+            _wake(*waker)
+
+    def get(self, timeout):
+        """Next event, or raise ``queue.Empty`` after ``timeout`` seconds"""
+        return self.queue.get(timeout=timeout)
+
+    async def aget(self, timeout):
+        """Async ``get`` woken by the monitor thread instead of blocking a thread"""
+        self._waker = (asyncio.get_running_loop(), asyncio.Event())
+        try:
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                await asyncio.wait_for(self._waker[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                raise queue.Empty
+            return self.queue.get_nowait()
+        finally:
+            self._waker = None
+
+
+def _wake(loop, event):
+    """Set an asyncio.Event from another thread"""
+    try:
+        loop.call_soon_threadsafe(event.set)
+    except RuntimeError:
+        # The waiting stream's event loop has already shut down
+        pass
+
+
+class SessionMonitor(threading.Thread):
+    """Polling producer for one TestSession"""
+
+    def __init__(self, session_id):
+        super().__init__(name=f'live-monitor-{session_id}', daemon=True)
+        self.session_id = session_id
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.cursor = None
+        self.idle_since = None
+        self.stopped = False
+        self.ready = threading.Event()  # set once the first load finished (or failed)
+        self.load_error = None
+
+        self.students = {}   # attempt_id -> student row
+        self.answers = {}    # (attempt_id, question_id) -> selected choice
+        self.counts = {}     # question_id -> {label: answers}, kept in step with self.answers
+        self.sheet_attempts = set()  # attempts storing packed answer sheets
+        self.question_ids = []
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load the full current state of the session"""
+        session = TestSession.objects.select_related('test').get(pk=self.session_id)
+        question_ids = list(session.test.questions.order_by('id').values_list('id', flat=True))
+        changes = self._fetch_changes(since=None)
+        with self.lock:
+            self.question_ids = question_ids
+            self._apply_changes(changes)
+
+    def _student_row(self, sta, attempt):
+        student = sta.student
+        return {
+            'attempt_id': attempt.id,
+            'name': student.get_full_name() or student.username,
+            'username': student.username,
+            'joined_at': sta.joined_at,
+            'answered': 0,
+            'submitted': attempt.is_submitted,
+            'submitted_at': attempt.submitted_at,
+        }
+
+    def _fetch_changes(self, since):
+        """
+        Read rows changed since ``since``, without holding the lock.
+
+        The query window overlaps the previous poll so rows committed late with an
+        earlier auto_now timestamp are not missed; diffing against state in
+        ``_apply_changes`` makes the overlap harmless. Only this thread changes
+        the state, so reading the known attempts here is safe.
+        """
+        window_start = since - timezone.timedelta(seconds=LiveMonitorConfig.CURSOR_OVERLAP_SECONDS) if since else None
+        poll_started = timezone.now()
+
+        # TestAttempt is created alongside the join, so its started_at marks new students
+        attempts = TestAttempt.objects.filter(
+            student_test_attempt__test_session_id=self.session_id
+        ).select_related('student_test_attempt__student')
+        if window_start:
+            attempts = attempts.filter(started_at__gt=window_start)
+        new_attempts = [attempt for attempt in attempts if attempt.id not in self.students]
+
+        attempt_ids = list(self.students) + [attempt.id for attempt in new_attempts]
+        sheet_attempts = self.sheet_attempts | {
+            attempt.id for attempt in new_attempts if attempt.answer_storage == AnswerStorage.SHEET
+        }
+        submissions = []
+        answer_rows = []
+        if attempt_ids:
+            submitted = TestAttempt.objects.filter(id__in=attempt_ids, is_submitted=True)
+            if window_start:
+                submitted = submitted.filter(submitted_at__gt=window_start)
+            submissions = list(submitted.values_list('id', 'submitted_at'))
+
+            row_attempt_ids = [attempt_id for attempt_id in attempt_ids if attempt_id not in sheet_attempts]
+            answer_sources = [Answer.objects.filter(test_attempt_id__in=row_attempt_ids)]
+            if sheet_attempts:
+                # A sheet's rows all carry its last write time; the diff skips unchanged ones
+                answer_sources.append(PackedAnswer.objects.filter(test_attempt_id__in=sheet_attempts))
+            if window_start:
+                answer_sources = [answers.filter(answered_at__gt=window_start) for answers in answer_sources]
+            answer_rows = list(chain.from_iterable(
+                answers.values_list('test_attempt_id', 'question_id', 'selected_choice') for answers in answer_sources
+            ))
+        return poll_started, new_attempts, submissions, answer_rows
+
+    def _apply_changes(self, changes):
+        """Fold fetched rows into state (with the lock held) and return the changed keys"""
+        poll_started, new_attempts, submissions, answer_rows = changes
+        changed_students = set()
+        changed_questions = set()
+
+        for attempt in new_attempts:
+            self.students[attempt.id] = self._student_row(attempt.student_test_attempt, attempt)
+            if attempt.answer_storage == AnswerStorage.SHEET:
+                self.sheet_attempts.add(attempt.id)
+            changed_students.add(attempt.id)
+
+        for attempt_id, submitted_at in submissions:
+            row = self.students[attempt_id]
+            if not row['submitted']:
+                row['submitted'] = True
+                row['submitted_at'] = submitted_at
+                changed_students.add(attempt_id)
+
+        for attempt_id, question_id, choice in answer_rows:
+            key = (attempt_id, question_id)
+            previous = self.answers.get(key)
+            if previous == choice:
+                continue
+            counts = self.counts.setdefault(question_id, dict.fromkeys(MultipleChoice.VALID_CHOICES, 0))
+            if previous is None:
+                self.students[attempt_id]['answered'] += 1
+                changed_students.add(attempt_id)
+            else:
+                counts[previous] -= 1
+            counts[choice] += 1
+            self.answers[key] = choice
+            changed_questions.add(question_id)
+
+        self.cursor = poll_started
+        return changed_students, changed_questions
+
+    def _question_counts(self, question_ids):
+        counts = {}
+        for question_id in question_ids:
+            row = dict(self.counts.get(question_id) or dict.fromkeys(MultipleChoice.VALID_CHOICES, 0))
+            row['total'] = sum(row.values())
+            counts[question_id] = row
+        return counts
+
+    def _totals(self):
+        return {
+            'joined': len(self.students),
+            'submitted': sum(1 for row in self.students.values() if row['submitted']),
+            'answers': len(self.answers),
+        }
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'seq': self.seq,
+                'question_ids': self.question_ids,
+                'totals': self._totals(),
+                'students': {str(k): dict(v) for k, v in self.students.items()},
+                'questions': {str(k): v for k, v in self._question_counts(self.question_ids).items()},
+            }
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    def subscribe(self):
+        subscriber = Subscriber()
+        with self.lock:
+            self.subscribers.add(subscriber)
+            self.idle_since = None
+        return subscriber
+
+    def close_subscribers(self):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.push(Subscriber.CLOSE)
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers:
+                self.idle_since = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Producer loop
+    # ------------------------------------------------------------------
+
+    def poll(self):
+        # Subscribers read state under the lock; only the fold holds it, not the queries
+        changes = self._fetch_changes(since=self.cursor)
+        with self.lock:
+            changed_students, changed_questions = self._apply_changes(changes)
+            if not changed_students and not changed_questions:
+                return
+            self.seq += 1
+            event = {
+                'seq': self.seq,
+                'totals': self._totals(),
+                'students': {str(k): dict(self.students[k]) for k in changed_students},
+                'questions': {str(k): v for k, v in self._question_counts(changed_questions).items()},
+            }
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.push(event)
+
+    def run(self):
+        try:
+            try:
+                self.load()
+            except Exception as e:
+                logger.exception('Live monitor load failed for session %s', self.session_id)
+                self.load_error = e
+                self.stopped = True
+                return
+            finally:
+                self.ready.set()
+            while True:
+                with self.lock:
+                    idle = self.idle_since is not None and (
+                        time.monotonic() - self.idle_since > LiveMonitorConfig.IDLE_SHUTDOWN_SECONDS
+                    )
+                    if idle:
+                        self.stopped = True
+                        break
+                try:
+                    self.poll()
+                    # Release the connection between polls once it is obsolete
+                    # (immediately when pooled, after CONN_MAX_AGE otherwise)
+                    connection.close_if_unusable_or_obsolete()
+                except Exception:
+                    logger.exception('Live monitor poll failed for session %s', self.session_id)
+                    connection.close()
+                time.sleep(LiveMonitorConfig.POLL_INTERVAL_SECONDS)
+        finally:
+            _remove_monitor(self)
+            connection.close()
+
+
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+def _remove_monitor(monitor):
+    with _monitors_lock:
+        if _monitors.get(monitor.session_id) is monitor:
+            del _monitors[monitor.session_id]
+
+
+def get_monitor(session_id):
+    """Return the running monitor for a session, starting one if needed"""
+    with _monitors_lock:
+        monitor = _monitors.get(session_id)
+        if monitor is None or monitor.stopped or not monitor.is_alive():
+            monitor = SessionMonitor(session_id)
+            monitor.start()
+            _monitors[session_id] = monitor
+    # The monitor thread loads the session; waiting outside the process-wide
+    # lock means a slow load only holds up viewers of the same session
+    monitor.ready.wait()
+    if monitor.load_error is not None:
+        raise monitor.load_error
+    return monitor
+
+
+def session_fingerprint(start_time, updated_at, is_active):
+    """State of a TestSession row that students waiting on it care about"""
+    return (start_time, updated_at, is_active)
+
+
+class SessionWatchBoard(threading.Thread):
+    """Shared poller of TestSession rows that students are waiting on"""
+
+    def __init__(self):
+        super().__init__(name='session-watch-board', daemon=True)
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.watchers = {}  # session_id -> number of waiting streams
+        self.states = {}    # session_id -> fingerprint, None once deleted
+        self.version = 0
+        self.async_waiters = set()
+        self.idle_since = None
+        self.stopped = False
+
+    def watch(self, fingerprints):
+        """Register interest in sessions, seeding state from the caller's read"""
+        with self.condition:
+            for session_id, fingerprint in fingerprints.items():
+                self.watchers[session_id] = self.watchers.get(session_id, 0) + 1
+                self.states.setdefault(session_id, fingerprint)
+            self.idle_since = None
+
+    def unwatch(self, session_ids):
+        with self.condition:
+            for session_id in session_ids:
+                remaining = self.watchers.get(session_id, 0) - 1
+                if remaining > 0:
+                    self.watchers[session_id] = remaining
+                else:
+                    self.watchers.pop(session_id, None)
+                    self.states.pop(session_id, None)
+            if not self.watchers:
+                self.idle_since = time.monotonic()
+
+    def state(self, session_id):
+        with self.condition:
+            return self.states.get(session_id)
+
+    async def async_wait(self, version, timeout):
+        """Wait on the event loop until the board changes from ``version`` or the timeout passes"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            if self.version != version:
+                return self.version
+            self.async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                self.async_waiters.discard(waiter)
+        return self.version
+
+    def wake_all(self):
+        """Wake every waiter so it re-checks its sessions and the shutdown flag"""
+        with self.condition:
+            self.version += 1
+            for waiter in self.async_waiters:
+                _wake(*waiter)
+
+    def poll(self):
+        with self.condition:
+            session_ids = list(self.watchers)
+        if not session_ids:
+            return
+        rows = TestSession.objects.filter(id__in=session_ids).values_list(
+            'id', 'start_time', 'updated_at', 'is_active'
+        )
+        current = {row[0]: session_fingerprint(*row[1:]) for row in rows}
+        with self.condition:
+            changed = False
+            for session_id in session_ids:
+                if session_id not in self.watchers:
+                    continue
+                fingerprint = current.get(session_id)
+                if self.states.get(session_id) != fingerprint:
+                    self.states[session_id] = fingerprint
+                    changed = True
+        if changed:
+            self.wake_all()
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    if self.idle_since is not None and (
+                        time.monotonic() - self.idle_since > SessionWaitConfig.IDLE_SHUTDOWN_SECONDS
+                    ):
+                        self.stopped = True
+                        break
+                try:
+                    self.poll()
+                    connection.close_if_unusable_or_obsolete()
+                except Exception:
+                    logger.exception('Session watch poll failed')
+                    connection.close()
+                time.sleep(SessionWaitConfig.POLL_INTERVAL_SECONDS)
+        finally:
+            connection.close()
+
+
+_board = None
+_board_lock = threading.Lock()
+
+
+def get_watch_board():
+    """Return this process's watch board, restarting it after a fork or idle stop"""
+    global _board
+    with _board_lock:
+        if _board is None or _board.pid != os.getpid() or _board.stopped or not _board.is_alive():
+            _board = SessionWatchBoard()
+            _board.start()
+        return _board
+
+
+_shutdown = threading.Event()
+
+
+def streams_open():
+    """False once this process has started shutting down its streams"""
+    return not _shutdown.is_set()
+
+
+def shutdown_streams():
+    """Ask every open stream in this process to finish (called when a worker exits)"""
+    _shutdown.set()
+    with _monitors_lock:
+        monitors = list(_monitors.values())
+    for monitor in monitors:
+        monitor.close_subscribers()
+    board = _board
+    if board is not None:
+        board.wake_all()
+
+
+def _session_event(board, waiting):
+    """Event for the first waiting session that started, changed or was cancelled"""
+    now = timezone.now()
+    for session_id, original in waiting.items():
+        fingerprint = board.state(session_id)
+        if fingerprint is None or not fingerprint[2]:
+            return {'type': 'cancelled', 'session_id': session_id}
+        if fingerprint != original:
+            return {'type': 'updated', 'session_id': session_id, 'start_time': fingerprint[0]}
+        if fingerprint[0] <= now:
+            return {'type': 'started', 'session_id': session_id, 'start_time': fingerprint[0]}
+    return None
+
+
+def _next_wait(waiting, deadline):
+    """Seconds to sleep before re-checking, or None once the deadline has passed"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    next_start = min(fingerprint[0] for fingerprint in waiting.values())
+    until_start = (next_start - timezone.now()).total_seconds()
+    return max(0.05, min(remaining, until_start))
+
+
+async def async_wait_for_session_event(board, waiting, timeout):
+    """
+    Wait until one of the ``waiting`` sessions (id -> fingerprint) starts,
+    is edited or is cancelled, returning the event, or None on timeout.
+
+    Start times are checked against the clock locally, so a session starting
+    on schedule fires without waiting for the board's next poll.
+    """
+    deadline = time.monotonic() + timeout
+    version = board.version
+    while streams_open():
+        event = _session_event(board, waiting)
+        if event:
+            return event
+        wait = _next_wait(waiting, deadline)
+        if wait is None:
+            return None
+        version = await board.async_wait(version, wait)
+    return None
@@ -0,0 +1,35 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from smart_mcq.constants import ExpiryConfig
+from test_sessions.submission import finalize_expired
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Submit the unsubmitted attempts of sessions whose end time has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds')
+        parser.add_argument('--interval', type=float, default=ExpiryConfig.SWEEP_INTERVAL)
+        parser.add_argument('--batch-size', type=int, default=ExpiryConfig.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            finalized = finalize_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Finalised {finalized} expired attempt(s)'))
+            return
+
+        while True:
+            close_old_connections()
+            try:
+                finalized = finalize_expired(batch_size=options['batch_size'])
+                if finalized:
+                    logger.info('Finalised %d expired attempt(s)', finalized)
+            except Exception:
+                logger.exception('Sweeping expired attempts failed; will retry')
+            time.sleep(options['interval'])
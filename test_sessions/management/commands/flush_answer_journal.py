@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from test_sessions.answer_journal import recover_orphans
+
+
+class Command(BaseCommand):
+    help = 'Merge answer journal segments left behind by stopped or crashed processes into Answer'
+
+    def handle(self, *args, **options):
+        # Segments of running processes are locked and skipped; their flushers merge them
+        merged = recover_orphans(settings.ANSWER_JOURNAL_DIR)
+        self.stdout.write(self.style.SUCCESS(f'Merged {merged} journaled answer(s)'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_sessions', '0005_testsession_session_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['test_attempt', 'is_correct'], name='answer_attempt_correct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testattempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['-submitted_at', '-id'], name='attempt_submitted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['created_by', '-start_time', '-id'], name='session_owner_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by', '-created_at', '-id'], name='session_owner_active_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_sessions', '0006_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='client_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:38
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_question_image_variants'),
+        ('test_sessions', '0007_answer_client_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackedAnswer',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('selected_choice', models.CharField(max_length=1)),
+                ('is_correct', models.BooleanField()),
+                ('answered_at', models.DateTimeField()),
+                ('time_spent_seconds', models.IntegerField()),
+                ('client_seq', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'test_sessions_packedanswer',
+                'ordering': ['answered_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AnswerSheet',
+            fields=[
+                ('test_attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='answer_sheet', serialize=False, to='test_sessions.testattempt')),
+                ('question_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+                ('choices', models.TextField()),
+                ('time_spent', django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(), size=None)),
+                ('client_seqs', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='testattempt',
+            name='answer_storage',
+            field=models.CharField(choices=[('rows', 'Answer rows'), ('sheet', 'Packed answer sheet')], default='rows', max_length=8),
+        ),
+        # Answer-shaped rows for PackedAnswer: one per answered slot of each sheet
+        migrations.RunSQL(
+            """
+            CREATE VIEW test_sessions_packedanswer AS
+            SELECT
+                sheet.test_attempt_id::bigint * 65536 + slot.position AS id,
+                sheet.test_attempt_id,
+                slot.question_id,
+                substr(sheet.choices, slot.position::int, 1) AS selected_choice,
+                coalesce(substr(sheet.choices, slot.position::int, 1) = answer_key.label, false) AS is_correct,
+                sheet.updated_at AS answered_at,
+                sheet.time_spent[slot.position]::integer AS time_spent_seconds,
+                sheet.client_seqs[slot.position] AS client_seq
+            FROM test_sessions_answersheet sheet
+            CROSS JOIN LATERAL unnest(sheet.question_ids) WITH ORDINALITY AS slot(question_id, position)
+            LEFT JOIN questions_choice answer_key
+                ON answer_key.question_id = slot.question_id AND answer_key.is_correct
+            WHERE substr(sheet.choices, slot.position::int, 1) <> '-';
+            """,
+            reverse_sql="DROP VIEW IF EXISTS test_sessions_packedanswer;",
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_sessions', '0008_answer_sheet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studenttestattempt',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['test_session'], name='attempt_open_session_idx'),
+        ),
+    ]
@@ -1,10 +1,15 @@
 import secrets
 import string
 from datetime import timedelta
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.functional import cached_property
 from tests.models import Test
+from accounts.fragment_cache import bump_attempt
+from smart_mcq.constants import AnswerStorage
+from .shuffle import AttemptLayout
 
 
 def generate_access_code():
@@ -32,6 +37,19 @@ class TestSession(models.Model):
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            # Session list: filter(created_by) ordered by (-start_time, -id)
+            models.Index(
+                fields=['created_by', '-start_time', '-id'],
+                name='session_owner_start_idx',
+            ),
+            # Teacher dashboard: filter(created_by, is_active=True) ordered by (-created_at, -id)
+            models.Index(
+                fields=['created_by', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='session_owner_active_idx',
+            ),
+        ]
 
     def __str__(self):
         if self.session_name:
@@ -96,6 +114,14 @@ class StudentTestAttempt(models.Model):
     class Meta:
         unique_together = ['student', 'test_session']
         ordering = ['-joined_at']
+        indexes = [
+            # Expiry sweeper: sessions that still have incomplete joins (test_sessions/submission.py)
+            models.Index(
+                fields=['test_session'],
+                condition=models.Q(is_completed=False),
+                name='attempt_open_session_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.test_session.test.title}"
@@ -104,11 +130,17 @@ class StudentTestAttempt(models.Model):
 class TestAttempt(models.Model):
     """Track detailed test attempt progress and state"""
     student_test_attempt = models.OneToOneField(StudentTestAttempt, on_delete=models.CASCADE, related_name='attempt_detail')
-    current_question_index = models.IntegerField(default=0)  # 0-based index
+    current_question_index = models.IntegerField(default=0)  # 0-based; written through from the cached cursor (test_sessions/navigation.py)
     started_at = models.DateTimeField(auto_now_add=True)
     submitted_at = models.DateTimeField(null=True, blank=True)
     is_submitted = models.BooleanField(default=False)
     total_time_spent = models.IntegerField(default=0)  # in seconds
+    # Fixed when the attempt starts (settings.ANSWER_STORAGE)
+    answer_storage = models.CharField(
+        max_length=8,
+        choices=AnswerStorage.STORAGE_CHOICES,
+        default=AnswerStorage.ROWS,
+    )
     
     # v1.4.1: Result Release Control fields
     result_released_at = models.DateTimeField(
@@ -127,6 +159,14 @@ class TestAttempt(models.Model):
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # Student dashboard: completed attempts ordered by (-submitted_at, -id)
+            models.Index(
+                fields=['-submitted_at', '-id'],
+                condition=models.Q(is_submitted=True),
+                name='attempt_submitted_at_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student_test_attempt.student.username} - {self.student_test_attempt.test_session.test.title} - Attempt"
@@ -147,22 +187,45 @@ class TestAttempt(models.Model):
     def questions(self):
         return self.test.questions.all()
     
-    @property
+    @cached_property
     def total_questions(self):
         return self.questions.count()
     
+    @property
+    def answer_rows(self):
+        """This attempt's answers as Answer-shaped rows, whichever way they are stored"""
+        if self.answer_storage == AnswerStorage.SHEET:
+            return self.packed_answers
+        return self.answers
+    
+    @cached_property
+    def layout(self):
+        """This student's question order and choice labels (see test_sessions.shuffle)"""
+        test = self.test
+        return AttemptLayout(
+            self.student_test_attempt.test_session_id,
+            self.student_test_attempt.student_id,
+            test.shuffle_questions,
+            test.shuffle_choices,
+        )
+    
+    @property
+    def question_order(self):
+        """Question ids in the order this student sees them"""
+        return self.layout.order(self.questions.values_list('id', flat=True))
+    
     @property
     def current_question(self):
-        questions = list(self.questions)
-        if 0 <= self.current_question_index < len(questions):
-            return questions[self.current_question_index]
+        order = self.question_order
+        if 0 <= self.current_question_index < len(order):
+            return self.test.questions.get(id=order[self.current_question_index])
         return None
     
     @property
     def progress_percentage(self):
         if self.total_questions == 0:
             return 0
-        answered_count = self.answers.count()
+        answered_count = self.answer_rows.count()
         return round((answered_count / self.total_questions) * 100)
     
     @property
@@ -267,6 +330,7 @@ class TestAttempt(models.Model):
         self.result_released_at = timezone.now()
         self.released_by = released_by_user
         self.save()
+        bump_attempt(self.student_test_attempt.student_id, self.student_test_attempt.test_session_id)
 
 
 class Answer(models.Model):
@@ -277,10 +341,20 @@ class Answer(models.Model):
     is_correct = models.BooleanField(default=False)
     answered_at = models.DateTimeField(auto_now=True)
     time_spent_seconds = models.IntegerField(default=0)
+    # Sequence number of the client write stored here; older or repeated
+    # writes (retries arriving late) are ignored (see test_sessions.answers)
+    client_seq = models.PositiveBigIntegerField(default=0)
     
     class Meta:
         unique_together = ['test_attempt', 'question']
         ordering = ['answered_at']
+        indexes = [
+            # Scoring: answers.filter(is_correct=True).count() per attempt
+            models.Index(
+                fields=['test_attempt', 'is_correct'],
+                name='answer_attempt_correct_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.test_attempt.student.username} - Q{self.question.id} - {self.selected_choice}"
@@ -291,3 +365,56 @@ class Answer(models.Model):
         if correct_choice:
             self.is_correct = (self.selected_choice == correct_choice.label)
         super().save(*args, **kwargs)
+
+
+class AnswerSheet(models.Model):
+    """
+    All answers of one attempt in a single row (AnswerStorage.SHEET).
+
+    Slot i holds the answer to ``question_ids[i]``: its label is character i
+    of ``choices`` (AnswerStorage.BLANK while unanswered), with the seconds
+    spent in ``time_spent[i]`` and the client sequence number of the stored
+    write in ``client_seqs[i]``. Saves rewrite one slot in place
+    (see test_sessions/answer_sheets.py).
+    """
+    test_attempt = models.OneToOneField(
+        TestAttempt, on_delete=models.CASCADE, primary_key=True, related_name='answer_sheet'
+    )
+    question_ids = ArrayField(models.IntegerField())
+    choices = models.TextField()
+    time_spent = ArrayField(models.SmallIntegerField())
+    client_seqs = ArrayField(models.BigIntegerField())
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Answer sheet of attempt {self.test_attempt_id}"
+    
+    @property
+    def answered_count(self):
+        return len(self.choices) - self.choices.count(AnswerStorage.BLANK)
+
+
+class PackedAnswer(models.Model):
+    """
+    Read-only Answer-shaped rows unpacked from answer sheets by the
+    ``test_sessions_packedanswer`` database view, so result pages, the live
+    monitor and the admin read sheet attempts like row attempts.
+    """
+    id = models.BigIntegerField(primary_key=True)  # test_attempt_id * 2^16 + slot
+    test_attempt = models.ForeignKey(
+        TestAttempt, on_delete=models.DO_NOTHING, db_constraint=False, related_name='packed_answers'
+    )
+    question = models.ForeignKey('questions.Question', on_delete=models.DO_NOTHING, db_constraint=False)
+    selected_choice = models.CharField(max_length=1)
+    is_correct = models.BooleanField()
+    answered_at = models.DateTimeField()
+    time_spent_seconds = models.IntegerField()
+    client_seq = models.BigIntegerField()
+    
+    class Meta:
+        managed = False
+        db_table = 'test_sessions_packedanswer'
+        ordering = ['answered_at']
+    
+    def __str__(self):
+        return f"{self.test_attempt_id} - Q{self.question_id} - {self.selected_choice}"
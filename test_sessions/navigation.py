@@ -0,0 +1,66 @@
+"""
+Question cursor of an exam attempt.
+
+Every Previous/Next click used to save the whole ``TestAttempt`` row just
+to change ``current_question_index``. The cursor now lives in the cache
+(``CacheKeys.QUESTION_CURSOR``) and is written through to the row with
+``update_fields`` at most every ``NavigationConfig.WRITE_THROUGH_INTERVAL``
+seconds, and when the attempt is submitted.
+
+The exam page carries its own position: the navigation forms post the
+index they show and the redirect names the question in the URL, so a
+request served by another worker process (each has its own cache) still
+lands on the right question. Only a bare exam URL reads the cursor; after
+a cache miss it is reconciled from the last index written to the row.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from smart_mcq.constants import CacheKeys, NavigationConfig
+
+
+def _key(attempt_id):
+    return CacheKeys.QUESTION_CURSOR.format(attempt_id=attempt_id)
+
+
+def _clamp(test_attempt, index):
+    # The question set can change while the cursor is cached
+    return max(0, min(index, test_attempt.total_questions - 1))
+
+
+def _entry(test_attempt):
+    entry = cache.get(_key(test_attempt.id))
+    if entry is None:
+        # Reconcile from the row; the next move writes through again
+        stored = test_attempt.current_question_index
+        entry = {'index': stored, 'stored': stored, 'stored_at': 0}
+    return entry
+
+
+def current_index(test_attempt):
+    """The attempt's cursor, sets ``current_question_index`` on the instance to it"""
+    index = _clamp(test_attempt, _entry(test_attempt)['index'])
+    test_attempt.current_question_index = index
+    return index
+
+
+def move_to(test_attempt, index):
+    """Move the cursor to ``index``, writing it to the row if the last write is old enough"""
+    index = _clamp(test_attempt, index)
+    entry = _entry(test_attempt)
+    entry['index'] = index
+    test_attempt.current_question_index = index
+    now = time.time()
+    if index != entry['stored'] and now - entry['stored_at'] >= NavigationConfig.WRITE_THROUGH_INTERVAL:
+        test_attempt.save(update_fields=['current_question_index'])
+        entry['stored'] = index
+        entry['stored_at'] = now
+    cache.set(_key(test_attempt.id), entry, NavigationConfig.CURSOR_TIMEOUT)
+    return index
+
+
+def forget(test_attempt):
+    """Drop the cached cursor once ``current_question_index`` holds it (on submit)"""
+    cache.delete(_key(test_attempt.id))
@@ -0,0 +1,90 @@
+"""
+Per-student question order and choice labels.
+
+Tests with ``shuffle_questions`` / ``shuffle_choices`` show every student
+their own question order and A-D layout. Both are derived from (session,
+student) with a seeded PRNG, so nothing is stored per student: the same
+inputs always give the same permutation, in any process.
+
+Answers are always stored and graded under the question's own labels.
+The exam page sends the label the student saw; ``original_label`` maps it
+back before the write, and ``display_label`` maps stored answers forward
+for the exam page and the student's result review.
+
+The question order depends on the test's question set, so it is cached on
+the tuple of question ids. Choice layouts are seeded per question and need
+no question list, so saving an answer costs no extra query.
+"""
+
+import hashlib
+import random
+from functools import lru_cache
+
+from django.conf import settings
+
+from smart_mcq.constants import ShuffleConfig
+
+LABELS = 'ABCD'
+
+
+def _seed(*parts):
+    # Keyed so that students cannot work out each other's layouts from ids
+    digest = hashlib.blake2b(
+        ':'.join(map(str, parts)).encode(),
+        digest_size=8,
+        key=settings.SECRET_KEY.encode()[:64],
+    ).digest()
+    return int.from_bytes(digest, 'big')
+
+
+@lru_cache(maxsize=ShuffleConfig.CACHED_ORDERS)
+def question_order(session_id, student_id, question_ids):
+    """``question_ids`` (a tuple) in this student's order"""
+    order = sorted(question_ids)
+    random.Random(_seed('questions', session_id, student_id)).shuffle(order)
+    return tuple(order)
+
+
+@lru_cache(maxsize=ShuffleConfig.CACHED_CHOICE_LAYOUTS)
+def choice_layout(session_id, student_id, question_id):
+    """Original labels in the order this student sees them: layout[i] is shown as LABELS[i]"""
+    layout = list(LABELS)
+    random.Random(_seed('choices', session_id, student_id, question_id)).shuffle(layout)
+    return ''.join(layout)
+
+
+class AttemptLayout:
+    """What one attempt shows: question order and, per question, the choice labels"""
+
+    def __init__(self, session_id, student_id, shuffle_questions, shuffle_choices):
+        self.session_id = session_id
+        self.student_id = student_id
+        self.shuffle_questions = shuffle_questions
+        self.shuffle_choices = shuffle_choices
+
+    def order(self, question_ids):
+        """Question ids in display order; ``question_ids`` in the test's own order"""
+        if not self.shuffle_questions:
+            return tuple(question_ids)
+        return question_order(self.session_id, self.student_id, tuple(question_ids))
+
+    def _layout(self, question_id):
+        if not self.shuffle_choices:
+            return LABELS
+        return choice_layout(self.session_id, self.student_id, question_id)
+
+    def original_label(self, question_id, shown_label):
+        """The stored label of the choice shown as ``shown_label``"""
+        return self._layout(question_id)[LABELS.index(shown_label)]
+
+    def display_label(self, question_id, label):
+        """The label the student sees for the stored label ``label``"""
+        if not label:
+            return label
+        return LABELS[self._layout(question_id).index(label)]
+
+    def display_choices(self, question_id, choices):
+        """``choices`` in display order, each with a ``display_label`` attribute"""
+        for choice in choices:
+            choice.display_label = self.display_label(question_id, choice.label)
+        return sorted(choices, key=lambda choice: choice.display_label)
@@ -0,0 +1,136 @@
+"""
+Submitting an attempt.
+
+The submit view used to read ``is_submitted``, score the attempt and then
+save the whole row, so two concurrent submissions (a double click, or a
+retry after a lost response) could both pass the check. ``submit_attempt``
+marks the attempt with one conditional UPDATE (``WHERE is_submitted =
+false``) instead: only the request whose UPDATE matched the row goes on to
+score it, in the same transaction, from a single aggregate over its answers
+(``answers.attempt_totals``). Answer saves are refused once the attempt is
+submitted, so the score stays the one the student submitted.
+
+Students who close the tab never submit. ``finalize_expired`` (run by
+``manage.py finalize_expired_attempts``) submits their attempts once the
+session's end time has passed, in batches of set-based UPDATEs, and marks
+every attempt of the session completed. Scores need no extra work: they
+are the aggregate over the answers, which were graded as they were saved.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, IntegerField, Value
+from django.db.models.functions import Cast, Extract, Greatest
+from django.utils import timezone
+
+from accounts import fragment_cache
+from smart_mcq.constants import ExpiryConfig
+from . import answers, navigation
+from .models import StudentTestAttempt, TestAttempt, TestSession
+
+
+@dataclass
+class Submission:
+    """Score of an attempt, as computed by the request that submitted it"""
+    submitted_at: datetime
+    total_time_spent: int
+    total_questions: int
+    correct_answers: int
+    question_time_spent: int
+
+    @property
+    def incorrect_answers(self):
+        return self.total_questions - self.correct_answers
+
+    @property
+    def score_percentage(self):
+        if self.total_questions == 0:
+            return 0
+        return round((self.correct_answers / self.total_questions) * 100)
+
+
+def submit_attempt(test_attempt):
+    """
+    Submit and score ``test_attempt``. Returns a Submission, or None when
+    another request submitted it first.
+    """
+    now = timezone.now()
+    total_time_spent = int((now - test_attempt.started_at).total_seconds())
+    # The cached question cursor is written through with the submission
+    navigation.current_index(test_attempt)
+
+    with transaction.atomic():
+        submitted = TestAttempt.objects.filter(id=test_attempt.id, is_submitted=False).update(
+            is_submitted=True,
+            submitted_at=now,
+            total_time_spent=total_time_spent,
+            current_question_index=test_attempt.current_question_index,
+        )
+        if not submitted:
+            return None
+        correct_answers, question_time_spent = answers.attempt_totals(test_attempt)
+
+    test_attempt.is_submitted = True
+    test_attempt.submitted_at = now
+    test_attempt.total_time_spent = total_time_spent
+    navigation.forget(test_attempt)
+    return Submission(
+        submitted_at=now,
+        total_time_spent=total_time_spent,
+        total_questions=test_attempt.total_questions,
+        correct_answers=correct_answers,
+        question_time_spent=question_time_spent,
+    )
+
+
+def finalize_expired(now=None, batch_size=ExpiryConfig.BATCH_SIZE):
+    """
+    Submit the unsubmitted attempts of every session that has ended and mark
+    its attempts completed. Returns the number of attempts submitted.
+    """
+    now = now or timezone.now()
+    # TestSession.end_time in SQL: start + time limit + 1 minute of grace
+    ends_at = F('start_time') + ExpressionWrapper(
+        (F('test__time_limit_minutes') + 1) * Value(timedelta(minutes=1)), output_field=DurationField()
+    )
+    # Only the sweeper completes joins, so every session with an open attempt
+    # has an incomplete join; the partial index holds just those
+    open_sessions = StudentTestAttempt.objects.filter(is_completed=False).values('test_session_id')
+    sessions = TestSession.objects.alias(ends_at=ends_at).filter(
+        id__in=open_sessions,
+        is_active=True,
+        ends_at__lte=now,
+    ).select_related('test')
+
+    finalized = 0
+    for session in sessions:
+        end_time = session.end_time
+        pending = TestAttempt.objects.filter(student_test_attempt__test_session=session, is_submitted=False)
+        # Time spent as if the student had submitted at the end of the session
+        time_spent = _seconds_since_start(end_time)
+        while True:
+            batch = list(pending.values_list('id', 'student_test_attempt__student_id')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                # The condition skips attempts submitted since the batch was read
+                finalized += TestAttempt.objects.filter(
+                    id__in=[attempt_id for attempt_id, _ in batch], is_submitted=False
+                ).update(is_submitted=True, submitted_at=end_time, total_time_spent=time_spent)
+            fragment_cache.bump_attempts([student_id for _, student_id in batch], session.id)
+
+        StudentTestAttempt.objects.filter(test_session=session, is_completed=False).update(is_completed=True)
+    return finalized
+
+
+def _seconds_since_start(end_time):
+    """Whole seconds from an attempt's ``started_at`` to ``end_time``, at least 0, in SQL"""
+    elapsed = ExpressionWrapper(Value(end_time) - F('started_at'), output_field=DurationField())
+    if connection.features.has_native_duration_field:
+        seconds = Cast(Extract(elapsed, 'epoch'), IntegerField())
+    else:
+        # Durations are microsecond counts without a native type (SQLite)
+        seconds = Cast(elapsed, IntegerField()) / Value(1_000_000)
+    return Greatest(seconds, Value(0))
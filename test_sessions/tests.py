@@ -1,3 +1,301 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from questions.models import Choice, Question
+from smart_mcq.constants import AnswerWriteConfig
+from tests.models import Test
+from . import answer_journal, answers, live, shuffle, submission
+from .models import Answer, StudentTestAttempt, TestAttempt, TestSession
+
+
+class AttemptTestCase(TestCase):
+    """An attempt at a two-question test whose correct choice is B"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher')
+        cls.student = User.objects.create_user('student')
+        cls.questions = []
+        for number in range(2):
+            question = Question.objects.create(title=f'Q{number}', description='', created_by=cls.teacher)
+            for label in 'ABCD':
+                Choice.objects.create(question=question, label=label, text=label, is_correct=label == 'B')
+            cls.questions.append(question)
+        cls.test = Test.objects.create(title='Test', description='', time_limit_minutes=30, created_by=cls.teacher)
+        cls.test.questions.set(cls.questions)
+        cls.session = TestSession.objects.create(
+            test=cls.test, start_time=timezone.now() - timedelta(minutes=5), created_by=cls.teacher
+        )
+        student_attempt = StudentTestAttempt.objects.create(student=cls.student, test_session=cls.session)
+        cls.attempt = TestAttempt.objects.create(student_test_attempt=student_attempt)
+
+    def setUp(self):
+        cache.clear()
+
+    def fresh_attempt(self):
+        return TestAttempt.objects.get(id=self.attempt.id)
+
+
+class SubmitAttemptTests(AttemptTestCase):
+    def test_only_first_submit_wins(self):
+        answers.write_answer(self.attempt, self.questions[0], 'B', 10, seq=1)
+        first = self.fresh_attempt()
+        second = self.fresh_attempt()
+
+        result = submission.submit_attempt(first)
+        self.assertIsNotNone(result)
+        self.assertEqual(result.correct_answers, 1)
+        self.assertEqual(result.total_questions, 2)
+
+        # A stale instance still reads is_submitted=False, the conditional UPDATE refuses it
+        self.assertFalse(second.is_submitted)
+        self.assertIsNone(submission.submit_attempt(second))
+        self.assertIsNone(submission.submit_attempt(self.fresh_attempt()))
+
+        stored = self.fresh_attempt()
+        self.assertTrue(stored.is_submitted)
+        self.assertEqual(stored.submitted_at, result.submitted_at)
+
+    def test_answers_are_refused_after_submit(self):
+        answers.write_answer(self.attempt, self.questions[0], 'B', 10, seq=1)
+        stale = self.fresh_attempt()
+        submission.submit_attempt(self.fresh_attempt())
+
+        # The request loaded the attempt before it was submitted
+        self.assertEqual(answers.write_answer(stale, self.questions[1], 'B', 5, seq=2), (answers.SUBMITTED, None))
+        self.assertEqual(answers.write_answer(stale, self.questions[0], 'A', 5, seq=3), (answers.SUBMITTED, None))
+        self.assertEqual(
+            list(Answer.objects.filter(test_attempt=self.attempt).values_list('question_id', 'selected_choice')),
+            [(self.questions[0].id, 'B')],
+        )
+
+
+class AnswerSequenceTests(AttemptTestCase):
+    def test_stale_seq_is_rejected(self):
+        question = self.questions[0]
+        self.assertEqual(answers.write_answer(self.attempt, question, 'B', 5, seq=2), (answers.APPLIED, True))
+        self.assertEqual(answers.write_answer(self.attempt, question, 'A', 9, seq=1), (answers.STALE, True))
+
+        stored = Answer.objects.get(test_attempt=self.attempt, question=question)
+        self.assertEqual((stored.selected_choice, stored.client_seq), ('B', 2))
+
+    def test_check_sequence_uses_high_water_mark(self):
+        user_id, attempt_id, question_id = self.student.id, self.attempt.id, self.questions[0].id
+        self.assertIsNone(answers.check_sequence(user_id, attempt_id, question_id, 1))
+
+        answers.record_sequence(user_id, attempt_id, question_id, 3)
+        self.assertEqual(answers.check_sequence(user_id, attempt_id, question_id, 2), answers.STALE)
+        self.assertEqual(answers.check_sequence(user_id, attempt_id, question_id, 3), answers.DUPLICATE)
+        self.assertIsNone(answers.check_sequence(user_id, attempt_id, question_id, 4))
+
+
+class ShuffleTests(TestCase):
+    def test_choice_labels_round_trip(self):
+        for student_id in range(1, 20):
+            layout = shuffle.AttemptLayout(7, student_id, shuffle_questions=True, shuffle_choices=True)
+            for question_id in range(1, 10):
+                shown = [layout.display_label(question_id, label) for label in shuffle.LABELS]
+                self.assertEqual(sorted(shown), list(shuffle.LABELS))
+                for label in shuffle.LABELS:
+                    self.assertEqual(layout.original_label(question_id, layout.display_label(question_id, label)), label)
+
+    def test_unshuffled_labels_are_unchanged(self):
+        layout = shuffle.AttemptLayout(7, 1, shuffle_questions=False, shuffle_choices=False)
+        for label in shuffle.LABELS:
+            self.assertEqual(layout.display_label(3, label), label)
+            self.assertEqual(layout.original_label(3, label), label)
+
+    def test_question_order_is_a_stable_permutation(self):
+        question_ids = list(range(1, 30))
+        layout = shuffle.AttemptLayout(7, 1, shuffle_questions=True, shuffle_choices=False)
+        order = layout.order(question_ids)
+        self.assertEqual(sorted(order), question_ids)
+        self.assertEqual(order, shuffle.AttemptLayout(7, 1, True, False).order(question_ids))
+
+
+class AnswerJournalTests(AttemptTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        # Flushes happen when a test asks for them, not on the flusher's schedule
+        patcher = mock.patch.object(AnswerWriteConfig, 'JOURNAL_FLUSH_INTERVAL', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.journal = answer_journal.AnswerJournal(self.directory)
+        self.addCleanup(self.journal._stop.set)
+
+    def segment_paths(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+
+    def record(self, question, choice, seq, attempt=None):
+        return {
+            'attempt_id': (attempt or self.attempt).id,
+            'question_id': question.id,
+            'choice': choice,
+            'time_spent': 5,
+            'seq': seq,
+            'at': timezone.now().isoformat(),
+        }
+
+    def stored(self, question):
+        return Answer.objects.filter(test_attempt=self.attempt, question=question).values_list(
+            'selected_choice', 'client_seq'
+        ).first()
+
+    def write_orphan(self, records):
+        path = os.path.join(self.directory, f'answers-0-{time.time_ns()}-dead.jsonl')
+        with open(path, 'w') as segment:
+            for record in records:
+                segment.write(json.dumps(record, separators=(',', ':')) + '\n')
+        return path
+
+    def test_concurrent_saves_share_one_fsync(self):
+        question = self.questions[0]
+        self.journal.append(self.record(question, 'A', 1))
+        segment = self.journal._segment
+
+        with mock.patch.object(answer_journal.os, 'fsync', wraps=os.fsync) as fsync:
+            # Hold the sync lock so both saves write their line before either syncs
+            with segment.sync_lock:
+                savers = [
+                    threading.Thread(target=self.journal.append, args=(self.record(question, choice, seq),))
+                    for choice, seq in (('B', 2), ('C', 3))
+                ]
+                for saver in savers:
+                    saver.start()
+                while segment.written < 3:
+                    time.sleep(0.001)
+            for saver in savers:
+                saver.join()
+        self.assertEqual(fsync.call_count, 1)
+        self.assertEqual(segment.synced, 3)
+
+    def test_merge_keeps_the_highest_seq(self):
+        question = self.questions[0]
+        answer_journal.merge_records([self.record(question, 'C', 3), self.record(question, 'A', 2)])
+        self.assertEqual(self.stored(question), ('C', 3))
+
+        # A replayed or late segment with an older write leaves the row alone
+        answer_journal.merge_records([self.record(question, 'D', 1)])
+        self.assertEqual(self.stored(question), ('C', 3))
+        answer_journal.merge_records([self.record(question, 'B', 4)])
+        self.assertEqual(self.stored(question), ('B', 4))
+
+    def test_merge_skips_submitted_attempts(self):
+        TestAttempt.objects.filter(id=self.attempt.id).update(is_submitted=True)
+        self.assertEqual(answer_journal.merge_records([self.record(self.questions[0], 'B', 1)]), 0)
+        self.assertIsNone(self.stored(self.questions[0]))
+
+    def test_recover_orphans_skips_live_segments(self):
+        orphan = self.write_orphan([self.record(self.questions[0], 'B', 1)])
+        self.journal.append(self.record(self.questions[1], 'A', 1))
+        live = self.journal._segment.path
+
+        self.assertEqual(answer_journal.recover_orphans(self.directory), 1)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(live))
+        self.assertEqual(self.stored(self.questions[0]), ('B', 1))
+        self.assertIsNone(self.stored(self.questions[1]))
+
+    def test_new_segments_are_locked_before_they_are_visible(self):
+        self.journal.append(self.record(self.questions[0], 'A', 1))
+        self.assertEqual(self.segment_paths(), [self.journal._segment.path])
+        self.assertEqual(answer_journal.recover_orphans(self.directory), 0)
+
+    def test_flush_attempt(self):
+        question, other_question = self.questions
+        self.journal.append(self.record(question, 'B', 1))
+        foreign = self.write_orphan([self.record(other_question, 'C', 1)])
+
+        with mock.patch.object(answer_journal, 'journal', self.journal), \
+                override_settings(ANSWER_JOURNAL_DIR=self.directory):
+            self.assertEqual(answer_journal.flush_attempt(self.attempt.id), 1)
+            self.assertEqual(self.stored(question), ('B', 1))
+            self.assertIsNone(self.stored(other_question))
+
+            self.assertEqual(answer_journal.flush_attempt(self.attempt.id, other_processes=True), 2)
+            self.assertEqual(self.stored(other_question), ('C', 1))
+        # Records stay in their segments until the flusher merges and deletes them
+        self.assertTrue(os.path.exists(foreign))
+
+
+class SessionMonitorTests(AttemptTestCase):
+    def test_poll_keeps_counts_in_step_with_changed_answers(self):
+        question = self.questions[0]
+        answers.write_answer(self.attempt, question, 'A', 5, seq=1)
+        monitor = live.SessionMonitor(self.session.id)
+        monitor.load()
+        self.assertEqual(monitor.snapshot()['questions'][str(question.id)], {'A': 1, 'B': 0, 'C': 0, 'D': 0, 'total': 1})
+
+        subscriber = monitor.subscribe()
+        answers.write_answer(self.attempt, question, 'B', 5, seq=2)
+        monitor.poll()
+        delta = subscriber.queue.get_nowait()
+        self.assertEqual(delta['questions'], {str(question.id): {'A': 0, 'B': 1, 'C': 0, 'D': 0, 'total': 1}})
+        self.assertEqual(delta['totals']['answers'], 1)
+
+        # Re-reading the overlap window changes nothing, so no delta is sent
+        monitor.poll()
+        self.assertTrue(subscriber.queue.empty())
+
+
+class FinalizeExpiredTests(AttemptTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Ended: a 30 minute test plus the minute of grace, started 40 minutes ago
+        TestSession.objects.filter(id=cls.session.id).update(start_time=timezone.now() - timedelta(minutes=40))
+        cls.session.refresh_from_db()
+        TestAttempt.objects.filter(id=cls.attempt.id).update(started_at=cls.session.start_time + timedelta(minutes=2))
+
+        cls.submitted_student = User.objects.create_user('submitted')
+        joined = StudentTestAttempt.objects.create(student=cls.submitted_student, test_session=cls.session)
+        cls.submitted_at = cls.session.start_time + timedelta(minutes=10)
+        cls.submitted = TestAttempt.objects.create(
+            student_test_attempt=joined, is_submitted=True, submitted_at=cls.submitted_at, total_time_spent=480
+        )
+
+    def test_expired_attempt_is_submitted_at_session_end(self):
+        self.assertEqual(submission.finalize_expired(), 1)
+
+        attempt = self.fresh_attempt()
+        self.assertTrue(attempt.is_submitted)
+        self.assertEqual(attempt.submitted_at, self.session.end_time)
+        self.assertEqual(attempt.total_time_spent, 29 * 60)
+
+    def test_submitted_attempts_are_untouched(self):
+        submission.finalize_expired()
+        submitted = TestAttempt.objects.get(id=self.submitted.id)
+        self.assertEqual((submitted.submitted_at, submitted.total_time_spent), (self.submitted_at, 480))
+
+    def test_joins_are_completed_once(self):
+        submission.finalize_expired()
+        self.assertFalse(StudentTestAttempt.objects.filter(test_session=self.session, is_completed=False).exists())
+        # Nothing is left for the next sweep
+        self.assertEqual(submission.finalize_expired(), 0)
+
+    def test_running_sessions_are_skipped(self):
+        now = self.session.end_time - timedelta(seconds=1)
+        self.assertEqual(submission.finalize_expired(now=now), 0)
+        self.assertFalse(self.fresh_attempt().is_submitted)
+        self.assertTrue(StudentTestAttempt.objects.filter(test_session=self.session, is_completed=False).exists())
+
+    def test_command_runs_one_sweep(self):
+        out = StringIO()
+        call_command('finalize_expired_attempts', stdout=out)
+        self.assertIn('Finalised 1 expired attempt(s)', out.getvalue())
+        self.assertTrue(self.fresh_attempt().is_submitted)
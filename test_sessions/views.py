@@ -4,8 +4,10 @@ from django.contrib import messages
 from django.http import Http404
 from django.utils import timezone
 from datetime import timezone as dt_timezone
-from django.core.paginator import Paginator
+from smart_mcq.constants import PaginationConfig
+from smart_mcq.pagination import KeysetPaginator
 from .models import TestSession
+from accounts.fragment_cache import bump_session
 from tests.models import Test
 import pytz
 
@@ -24,12 +26,11 @@ def teacher_required(view_func):
 @teacher_required
 def session_list(request):
     """Display list of test sessions created by the teacher with pagination"""
-    sessions = TestSession.objects.filter(created_by=request.user).order_by('-start_time')
+    sessions = TestSession.objects.filter(created_by=request.user).select_related('test')
     
-    # Pagination
-    paginator = Paginator(sessions, 10)  # Show 10 sessions per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (start_time, id) - no OFFSET scans on deep pages
+    paginator = KeysetPaginator(sessions, PaginationConfig.LIST_PAGE_SIZE, ordering=('-start_time', '-id'))
+    page_obj = paginator.get_page(request.GET)
     
     return render(request, 'test_sessions/session_list.html', {
         'sessions': page_obj,
@@ -173,6 +174,7 @@ def session_edit(request, pk):
             session.session_name = request.POST.get('session_name', '').strip()
             session.start_time = start_datetime_utc
             session.save()
+            bump_session(session.pk)
             
             # Success message with timezone info
             start_local_str = start_datetime_local.strftime('%b %d, %Y %I:%M %p %Z')
@@ -200,6 +202,7 @@ def session_delete(request, pk):
     if request.method == 'POST':
         session.is_active = False
         session.save()
+        bump_session(session.pk)
         messages.success(request, 'Test session deleted successfully!')
         return redirect('test_sessions:session_list')
     
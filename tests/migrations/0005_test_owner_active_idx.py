@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_question_owner_active_idx'),
+        ('tests', '0004_remove_test_organization'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by', '-created_at', '-id'], name='test_owner_active_idx'),
+        ),
+    ]
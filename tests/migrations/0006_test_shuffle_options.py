@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0005_test_owner_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False, help_text='Show each student the answer choices of a question in their own order'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='shuffle_questions',
+            field=models.BooleanField(default=False, help_text='Show each student the questions in their own order'),
+        ),
+    ]
@@ -38,9 +38,25 @@ class Test(models.Model):
         blank=True,
         help_text="When to automatically release results (for scheduled mode)"
     )
+    shuffle_questions = models.BooleanField(
+        default=False,
+        help_text="Show each student the questions in their own order"
+    )
+    shuffle_choices = models.BooleanField(
+        default=False,
+        help_text="Show each student the answer choices of a question in their own order"
+    )
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Teacher test list: filter(created_by, is_active=True) ordered by (-created_at, -id)
+            models.Index(
+                fields=['created_by', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='test_owner_active_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -2,7 +2,8 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator
+from smart_mcq.constants import PaginationConfig
+from smart_mcq.pagination import KeysetPaginator
 from .models import Test
 from questions.models import Question
 
@@ -29,12 +30,11 @@ def test_list(request):
     tests = Test.objects.filter(
         created_by=request.user,
         is_active=True
-    ).order_by('-created_at')
+    )
     
-    # Pagination
-    paginator = Paginator(tests, 10)  # Show 10 tests per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id) - no OFFSET scans on deep pages
+    paginator = KeysetPaginator(tests, PaginationConfig.LIST_PAGE_SIZE, ordering=('-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET)
     
     context = {
         'tests': page_obj,
@@ -63,7 +63,9 @@ def test_create(request):
             is_practice_test=request.POST.get('is_practice_test', 'True') == 'True',
             result_release_mode=request.POST.get('result_release_mode', 'immediate'),
             answer_visibility_level=request.POST.get('answer_visibility_level', 'with_answers'),
-            scheduled_release_time=scheduled_release_time
+            scheduled_release_time=scheduled_release_time,
+            shuffle_questions=request.POST.get('shuffle_questions') == 'on',
+            shuffle_choices=request.POST.get('shuffle_choices') == 'on',
         )
         
         # Add selected questions to test
@@ -112,6 +114,8 @@ def test_edit(request, pk):
         test.result_release_mode = request.POST.get('result_release_mode', 'immediate')
         test.answer_visibility_level = request.POST.get('answer_visibility_level', 'with_answers')
         test.scheduled_release_time = scheduled_release_time
+        test.shuffle_questions = request.POST.get('shuffle_questions') == 'on'
+        test.shuffle_choices = request.POST.get('shuffle_choices') == 'on'
         test.save()
         
         # Update selected questions